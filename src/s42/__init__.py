@@ -1,6 +1,6 @@
-from s42.const import ADDRESS_MAP
 from s42.template import get_template
-from s42.datastructures import Country
+from s42.datastructures import get_country
+from s42.mapping import get_mapper
 
 __all__ = ['render']
 
@@ -11,15 +11,7 @@ def render(country_code, fields):
 
 
 def mnemonic_to_codes(country, dto, pop=True):
-    elements = {}
-    f = dict.get if not pop else dict.pop
-    for name in list(dto.keys()):
-        if name not in ADDRESS_MAP[country]:
-            continue
-        code = ADDRESS_MAP[country][name]
-        elements[code] = f(dto, name)
-
-    return elements
+    return get_mapper(country).map(dto, pop=pop)
 
 
 def create_dps(dto, pop=False):
@@ -34,7 +26,35 @@ def create_dps(dto, pop=False):
         raise TypeError(
             "The Data Transfer Object must declare a `country` member.")
 
-    iso = Country.fromcode(country)
+    iso = get_country(country)
     dto['country_name'] = str(iso)
-    return iso, mnemonic_to_codes(iso.numeric3, dto, pop=pop)
+    return iso, get_mapper(iso.numeric3).map(dto, pop=pop)
+
+
+def create_dps_many(records, pop=False):
+    """Create delivery point specifications from an iterable of
+    Python dictionaries; see :func:`create_dps`.
 
+    The country and the mapper of each distinct `country` member are
+    resolved once per batch.
+
+    Returns:
+        list: a list of ``(country, elements)`` tuples in input order.
+    """
+    countries = {}
+    result = []
+    for dto in records:
+        country = dto.pop('country')
+        if country is None:
+            raise TypeError(
+                "The Data Transfer Object must declare a `country` member.")
+        try:
+            iso, name, mapper = countries[country]
+        except KeyError:
+            iso = get_country(country)
+            name = str(iso)
+            mapper = get_mapper(iso.numeric3)
+            countries[country] = (iso, name, mapper)
+        dto['country_name'] = name
+        result.append((iso, mapper.map(dto, pop=pop)))
+    return result
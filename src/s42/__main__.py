@@ -0,0 +1,42 @@
+"""Command line interface of the package.
+
+Run ``python -m s42 --help`` for the available commands.
+"""
+import argparse
+import json
+import sys
+
+from s42.const import TEMPLATE_DIR
+from s42.template.analysis import analyze_directory
+from s42.template.analysis import analyze_file
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m s42')
+    subparsers = parser.add_subparsers(dest='command')
+    inspect = subparsers.add_parser('inspect',
+        help="report the static cost of templates as JSON")
+    inspect.add_argument('files', nargs='*',
+        help="template files; defaults to all files in --directory")
+    inspect.add_argument('--directory', default=TEMPLATE_DIR)
+    inspect.add_argument('--repeat', type=int, default=5,
+        help="the number of parses timed per template")
+    args = parser.parse_args(argv)
+
+    if args.command == 'inspect':
+        if args.files:
+            results = dict((src, analyze_file(src, args.repeat))
+                for src in args.files)
+        else:
+            results = analyze_directory(args.directory, args.repeat)
+    else:
+        parser.print_help()
+        return 2
+
+    json.dump(results, sys.stdout, indent=2, sort_keys=True)
+    sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
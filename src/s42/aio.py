@@ -0,0 +1,199 @@
+"""Coroutines rendering addresses without blocking the event loop.
+
+Renders are offloaded to an executor, at most `max_concurrency` at a
+time, and templates are loaded once per country however many requests
+for it arrive concurrently::
+
+    import s42.aio
+
+    lines = await s42.aio.render('NL', elements, timeout=0.5)
+
+Use :func:`configure` or an :class:`AsyncRenderer` instance to choose
+the executor. With a :class:`concurrent.futures.ProcessPoolExecutor`,
+templates are loaded by each worker process on first use.
+"""
+import asyncio
+import concurrent.futures
+import weakref
+
+from s42.bulk.threads import render_lines
+from s42.template import TEMPLATES
+from s42.template import get_template
+from s42.template import get_template_path
+
+
+def render_elements(country_code, elements, s42_version='6',
+    patdl_version='2.6'):
+    """Render address elements into a list of line strings with the
+    cached template of `country_code`. Used as the task submitted to
+    process executors.
+    """
+    tpl = get_template(country_code, s42_version, patdl_version)
+    return render_lines(tpl, elements)
+
+
+def render_elements_many(country_code, chunk, s42_version='6',
+    patdl_version='2.6'):
+    """Render a list of dictionaries of address elements; see
+    :func:`render_elements`.
+    """
+    tpl = get_template(country_code, s42_version, patdl_version)
+    return _render_lines_many(tpl, chunk)
+
+
+class AsyncRenderer(object):
+    """Renders addresses from coroutines by offloading the work to an
+    executor.
+
+    Concurrency is bounded by a semaphore that is held until the
+    executor finishes a task, so tasks whose caller timed out still
+    count against the limit while they run. Timeouts raise
+    :class:`asyncio.TimeoutError`; the task itself cannot be interrupted
+    and runs to completion.
+    """
+
+    def __init__(self, executor=None, max_concurrency=None, timeout=None,
+        cache=TEMPLATES):
+        """Initialize a new :class:`AsyncRenderer` instance.
+
+        Args:
+            executor: a :class:`concurrent.futures.Executor`. Defaults to
+                the default executor of the event loop.
+            max_concurrency: the maximum number of tasks submitted to
+                the executor at once, or ``None`` for no limit.
+            timeout: the default timeout of a call, in seconds.
+            cache: the :class:`~s42.template.cache.TemplateCache`
+                holding the templates used by thread executors.
+        """
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.cache = cache
+        self._state = weakref.WeakKeyDictionary()
+
+    def _get_state(self, loop):
+        # Semaphores and futures are bound to an event loop.
+        try:
+            return self._state[loop]
+        except KeyError:
+            pass
+        semaphore = asyncio.Semaphore(self.max_concurrency)\
+            if self.max_concurrency else None
+        state = self._state[loop] = (semaphore, {})
+        return state
+
+    def _in_process(self):
+        return isinstance(self.executor, concurrent.futures.ProcessPoolExecutor)
+
+    async def get_template(self, country_code, s42_version='6',
+        patdl_version='2.6'):
+        """Return the template of `country_code`, loading it in the
+        executor if it is not cached. Concurrent calls for a template
+        that is being loaded wait for the same load.
+        """
+        src = get_template_path(country_code, s42_version, patdl_version)
+        if src in self.cache:
+            return self.cache.get(src)
+        loop = asyncio.get_running_loop()
+        loading = self._get_state(loop)[1]
+        future = loading.get(src)
+        if future is None:
+            future = loading[src] = loop.run_in_executor(self.executor,
+                self.cache.get, src)
+            future.add_done_callback(lambda f: loading.pop(src, None))
+        # A caller that times out must not cancel the load of the others.
+        return await asyncio.shield(future)
+
+    async def render(self, country_code, elements, s42_version='6',
+        patdl_version='2.6', timeout=None):
+        """Render a dictionary of address elements into a list of line
+        strings.
+
+        Args:
+            timeout: the timeout of the call in seconds, including the
+                time spent waiting for the executor. Defaults to the
+                timeout of the renderer.
+        """
+        return await asyncio.wait_for(self._render(render_elements,
+            render_lines, country_code, elements, s42_version, patdl_version),
+            timeout if timeout is not None else self.timeout)
+
+    async def render_many(self, country_code, records, s42_version='6',
+        patdl_version='2.6', chunksize=64, timeout=None):
+        """Render a sequence of dictionaries of address elements,
+        submitting them to the executor in chunks of `chunksize`.
+
+        Returns:
+            list: a list of line strings for each item of `records`, in
+                order.
+        """
+        records = list(records)
+        chunks = [records[i:i + chunksize]
+            for i in range(0, len(records), chunksize)]
+        tasks = [self._render(render_elements_many, _render_lines_many,
+            country_code, chunk, s42_version, patdl_version)
+            for chunk in chunks]
+        results = await asyncio.wait_for(asyncio.gather(*tasks),
+            timeout if timeout is not None else self.timeout)
+        return [x for chunk in results for x in chunk]
+
+    async def _render(self, task, thread_task, country_code, payload,
+        s42_version, patdl_version):
+        if self._in_process():
+            return await self._submit(task, country_code, payload,
+                s42_version, patdl_version)
+        tpl = await self.get_template(country_code, s42_version, patdl_version)
+        return await self._submit(thread_task, tpl, payload)
+
+    async def _submit(self, func, *args):
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_state(loop)[0]
+        if semaphore is None:
+            return await loop.run_in_executor(self.executor, func, *args)
+
+        await semaphore.acquire()
+        try:
+            future = loop.run_in_executor(self.executor, func, *args)
+        except BaseException:
+            semaphore.release()
+            raise
+        future.add_done_callback(lambda f: _release(semaphore, f))
+        return await asyncio.shield(future)
+
+
+def _render_lines_many(template, chunk):
+    return [render_lines(template, x) for x in chunk]
+
+
+def _release(semaphore, future):
+    semaphore.release()
+    if not future.cancelled():
+        # Retrieve the exception of a task whose caller has gone, so
+        # that it is not reported as never retrieved.
+        future.exception()
+
+
+_renderer = AsyncRenderer()
+
+
+def configure(executor=None, max_concurrency=None, timeout=None):
+    """Replace the :class:`AsyncRenderer` used by the module-level
+    coroutines; see :class:`AsyncRenderer` for the arguments.
+    """
+    global _renderer
+    _renderer = AsyncRenderer(executor, max_concurrency, timeout)
+    return _renderer
+
+
+async def render(country_code, elements, s42_version='6', patdl_version='2.6',
+    timeout=None):
+    """See :meth:`AsyncRenderer.render`."""
+    return await _renderer.render(country_code, elements, s42_version,
+        patdl_version, timeout)
+
+
+async def render_many(country_code, records, s42_version='6',
+    patdl_version='2.6', chunksize=64, timeout=None):
+    """See :meth:`AsyncRenderer.render_many`."""
+    return await _renderer.render_many(country_code, records, s42_version,
+        patdl_version, chunksize, timeout)
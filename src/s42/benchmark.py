@@ -0,0 +1,380 @@
+"""Benchmarks of template loading and rendering.
+
+Run ``python -m s42.benchmark --help`` for the available benchmarks.
+"""
+from os.path import basename
+from os.path import join
+import argparse
+import gc
+import glob
+import json
+import math
+import multiprocessing
+import random
+import sys
+import threading
+import time
+import timeit
+
+from s42.bulk.reuse import ReusableRenderer
+from s42.const import TEMPLATE_DIR
+from s42.template import Template
+from s42.template import get_template
+from s42.template.compiled import CompiledTemplate
+from s42.template.compiled import compile_template
+from s42.test.utils import get_test_fixture
+
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+#: The number of seconds before an arrival that a worker stops sleeping
+#: and polls the clock, since sleeps overshoot by tens to hundreds of
+#: microseconds.
+SPIN_TIME = 0.0005
+
+
+def time_template_load(src, repeat=20):
+    """Return a dictionary holding the fastest and mean time, in
+    seconds, to construct a :class:`~s42.template.Template` from the
+    file at `src`. The file is read once, so only parsing is measured.
+    """
+    with open(src, 'rb') as f:
+        doc = f.read()
+    timings = timeit.repeat(lambda: Template(doc), number=1, repeat=repeat)
+    return {
+        'min': min(timings),
+        'mean': sum(timings) / len(timings)
+    }
+
+
+def bench_load(directory=TEMPLATE_DIR, repeat=20):
+    """Measure the load time of every template in `directory` and of
+    the directory as a whole.
+
+    Returns:
+        dict: a mapping of filenames to the result of
+            :func:`time_template_load`, and the sum of the timings of
+            all templates under the ``'total'`` key.
+    """
+    results = {}
+    total = {'min': 0.0, 'mean': 0.0}
+    for src in sorted(glob.glob(join(directory, '*.xml'))):
+        timings = results[basename(src)] = time_template_load(src, repeat)
+        for key in total:
+            total[key] += timings[key]
+    results['total'] = total
+    return results
+
+
+class GCMonitor(object):
+    """Counts the collections of the garbage collector and the time
+    spent in them while it is installed in :data:`gc.callbacks`.
+    """
+
+    def __init__(self):
+        self.collections = [0, 0, 0]
+        self.pause = 0.0
+        self._start = None
+
+    def __call__(self, phase, info):
+        if phase == 'start':
+            self._start = timeit.default_timer()
+        elif self._start is not None:
+            self.pause += timeit.default_timer() - self._start
+            self.collections[info['generation']] += 1
+            self._start = None
+
+    def __enter__(self):
+        gc.callbacks.append(self)
+        return self
+
+    def __exit__(self, *args):
+        gc.callbacks.remove(self)
+
+
+def time_gc(render, dtos, renders):
+    """Render `renders` addresses, cycling through `dtos`, and return a
+    dictionary holding the elapsed time and the collections and pause
+    time of the garbage collector.
+    """
+    gc.collect()
+    with GCMonitor() as monitor:
+        start = timeit.default_timer()
+        for i in range(renders):
+            render(dtos[i % len(dtos)])
+        elapsed = timeit.default_timer() - start
+    return {
+        'elapsed': elapsed,
+        'collections': monitor.collections,
+        'pause': monitor.pause
+    }
+
+
+def bench_gc(countries=('NL', 'US'), renders=100000):
+    """Compare the garbage collector pressure of rendering the test
+    fixtures with :meth:`~s42.template.Template.render` and with a
+    :class:`~s42.bulk.reuse.ReusableRenderer`.
+    """
+    results = {}
+    for country in countries:
+        tpl = get_template(country)
+        dtos = [x['data'] for x in get_test_fixture(country)]
+        reusable = ReusableRenderer(tpl)
+        results[country] = {
+            'render': time_gc(lambda x: [str(y) for y in tpl.render(x)],
+                dtos, renders),
+            'reuse': time_gc(reusable.render, dtos, renders)
+        }
+    return results
+
+
+class LatencyHistogram(object):
+    """A histogram of integer latencies with buckets of logarithmically
+    increasing width, in the manner of HdrHistogram.
+
+    Values below ``2 ** precision`` are counted exactly; larger values
+    share a bucket with the values that agree in their `precision` most
+    significant bits, so the relative error of a reported value is
+    below ``2 ** (1 - precision)`` at any magnitude.
+    """
+
+    def __init__(self, precision=7):
+        self.precision = precision
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, value):
+        shift = max(value.bit_length() - self.precision, 0)
+        key = (shift << self.precision) | (value >> shift)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Add the values recorded by `other`, a histogram of the same
+        precision.
+        """
+        assert other.precision == self.precision
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        self.max = max(self.max, other.max)
+
+    def get_value(self, key):
+        """Return the highest value counted by the bucket `key`."""
+        shift = key >> self.precision
+        significand = key & ((1 << self.precision) - 1)
+        return ((significand + 1) << shift) - 1
+
+    def percentile(self, percentile):
+        """Return the value below or at which `percentile` percent of
+        the recorded values fall, or ``None`` if the histogram is empty.
+        """
+        if not self.count:
+            return None
+        rank = max(int(math.ceil(percentile / 100.0 * self.count)), 1)
+        seen = 0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen >= rank:
+                return min(self.get_value(key), self.max)
+        return self.max
+
+
+def get_renderer(path, country):
+    """Return a callable rendering address elements with the template
+    of `country` through one of the rendering paths of the package:
+    ``'render'``, ``'optimized'``, ``'reuse'`` or ``'compiled'``.
+    """
+    if path == 'render':
+        tpl = get_template(country)
+        return lambda x: [str(y) for y in tpl.render(x)]
+    elif path == 'optimized':
+        tpl = get_template(country, optimize=True)
+        return lambda x: [str(y) for y in tpl.render(x)]
+    elif path == 'reuse':
+        return ReusableRenderer(get_template(country)).render
+    elif path == 'compiled':
+        return CompiledTemplate(compile_template(get_template(country))).render
+    raise ValueError("Unknown path: " + repr(path))
+
+
+def get_arrivals(rate, duration, poisson=False, seed=0):
+    """Return a list holding the offsets, in seconds, at which
+    requests arrive at `rate` requests per second during `duration`
+    seconds, either at fixed intervals or as a Poisson process.
+    """
+    if not poisson:
+        return [i / float(rate) for i in range(int(rate * duration))]
+    rng = random.Random(seed)
+    arrivals = []
+    offset = rng.expovariate(rate)
+    while offset < duration:
+        arrivals.append(offset)
+        offset += rng.expovariate(rate)
+    return arrivals
+
+
+def run_latency(task):
+    """Render the arrivals assigned to a single worker and return the
+    :class:`LatencyHistogram` of their latencies in nanoseconds.
+
+    Latency is measured from the scheduled arrival time rather than from
+    the start of the render, so a render that is delayed by the previous
+    one is charged for the wait, as an open-loop client would see it.
+    The worker sleeps until :data:`SPIN_TIME` before each arrival and
+    then polls the clock, so that the overshoot of the sleep is not
+    charged to the render.
+
+    `start` is a :func:`time.time` value, which, unlike
+    :func:`time.perf_counter`, can be compared across processes; it is
+    converted to the performance counter of the worker once.
+    """
+    country, path, arrivals, start = task
+    render = get_renderer(path, country)
+    dtos = [x['data'] for x in get_test_fixture(country)]
+    timer = time.perf_counter
+    start = timer() + (start - time.time())
+    histogram = LatencyHistogram()
+    for i, offset in arrivals:
+        scheduled = start + offset
+        delay = scheduled - timer()
+        if delay > SPIN_TIME:
+            time.sleep(delay - SPIN_TIME)
+        while timer() < scheduled:
+            # Release the GIL to the other worker threads.
+            time.sleep(0)
+        render(dtos[i % len(dtos)])
+        histogram.record(int((timer() - scheduled) * 1e9))
+    return histogram
+
+
+def bench_latency(countries=('NL', 'US'), rate=1000, duration=5.0,
+    workers=4, processes=False, path='render', poisson=False, lead=0.5):
+    """Measure the latency percentiles of rendering the test fixtures of
+    each country under an open-loop load.
+
+    Args:
+        countries: the ISO 3166 Alpha 2 codes of the templates.
+        rate: the number of renders started per second.
+        duration: the number of seconds that the load is applied for.
+        workers: the number of threads or processes sharing the load;
+            arrival ``i`` is rendered by worker ``i % workers``.
+        processes: a boolean indicating if the workers are processes.
+        path: the rendering path; see :func:`get_renderer`.
+        poisson: a boolean indicating if arrivals follow a Poisson
+            process instead of fixed intervals.
+        lead: the number of seconds between starting the workers and
+            the first arrival, during which they load the templates.
+
+    Returns:
+        dict: a mapping of country codes to the count, mean, minimum,
+            maximum and percentiles of the latencies in microseconds.
+    """
+    arrivals = list(enumerate(get_arrivals(rate, duration, poisson)))
+    results = {}
+    for country in countries:
+        start = time.time() + lead
+        tasks = [(country, path, arrivals[i::workers], start)
+            for i in range(workers)]
+        if processes:
+            pool = multiprocessing.Pool(workers)
+            try:
+                histograms = pool.map(run_latency, tasks)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            histograms = [None] * workers
+            def target(i):
+                histograms[i] = run_latency(tasks[i])
+            threads = [threading.Thread(target=target, args=(i,))
+                for i in range(workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        histogram = LatencyHistogram()
+        for x in histograms:
+            histogram.merge(x)
+        results[country] = summarize_latency(histogram)
+    return results
+
+
+def summarize_latency(histogram):
+    to_us = lambda x: x / 1000.0 if x is not None else None
+    summary = {
+        'count': histogram.count,
+        'mean': to_us(histogram.total / float(histogram.count))
+            if histogram.count else None,
+        'min': to_us(histogram.min),
+        'max': to_us(histogram.max)
+    }
+    for percentile in PERCENTILES:
+        summary['p{0:g}'.format(percentile)] = to_us(
+            histogram.percentile(percentile))
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m s42.benchmark')
+    subparsers = parser.add_subparsers(dest='benchmark')
+    load = subparsers.add_parser('load', help="template load time")
+    load.add_argument('--directory', default=TEMPLATE_DIR)
+    load.add_argument('--repeat', type=int, default=20)
+    pressure = subparsers.add_parser('gc',
+        help="garbage collector pressure of bulk rendering")
+    pressure.add_argument('--country', action='append', dest='countries')
+    pressure.add_argument('--renders', type=int, default=100000)
+    latency = subparsers.add_parser('latency',
+        help="latency percentiles under an open-loop load")
+    latency.add_argument('--country', action='append', dest='countries')
+    latency.add_argument('--rate', type=float, default=1000)
+    latency.add_argument('--duration', type=float, default=5.0)
+    latency.add_argument('--workers', type=int, default=4)
+    latency.add_argument('--processes', action='store_true')
+    latency.add_argument('--path', default='render',
+        choices=['render', 'optimized', 'reuse', 'compiled'])
+    latency.add_argument('--poisson', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.benchmark == 'load':
+        results = bench_load(args.directory, args.repeat)
+    elif args.benchmark == 'gc':
+        results = bench_gc(args.countries or ('NL', 'US'), args.renders)
+    elif args.benchmark == 'latency':
+        results = {
+            'config': {
+                'rate': args.rate,
+                'duration': args.duration,
+                'workers': args.workers,
+                'processes': args.processes,
+                'path': args.path,
+                'poisson': args.poisson
+            },
+            'countries': bench_latency(args.countries or ('NL', 'US'),
+                args.rate, args.duration, args.workers, args.processes,
+                args.path, args.poisson)
+        }
+    else:
+        parser.print_help()
+        return 2
+
+    json.dump(results, sys.stdout, indent=2, sort_keys=True)
+    sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
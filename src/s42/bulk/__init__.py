@@ -0,0 +1,15 @@
+from s42.bulk.checked import CheckedRenderer
+from s42.bulk.errors import ErrorTable
+from s42.bulk.errors import QuarantineFile
+from s42.bulk.io import JSONLSource
+from s42.bulk.io import MappedJSONLSource
+from s42.bulk.io import ThreadedWriter
+from s42.bulk.io import open_stream
+from s42.bulk.io import open_writer
+from s42.bulk.jobs import JobRunner
+from s42.bulk.records import render_record
+from s42.bulk.reuse import ReusableRenderer
+from s42.bulk.router import CountryRouter
+from s42.bulk.threads import ThreadedRenderer
+from s42.bulk.fingerprint import DeltaRenderer
+from s42.bulk.fingerprint import FingerprintStore
@@ -0,0 +1,175 @@
+from s42.bulk.errors import ERROR_INCOMPLETE
+from s42.bulk.errors import ERROR_INVALID_CODE
+from s42.bulk.errors import ERROR_INVALID_RECORD
+from s42.bulk.errors import ERROR_NO_COUNTRY
+from s42.bulk.errors import ERROR_NO_MAPPING
+from s42.bulk.errors import ERROR_NO_TEMPLATE
+from s42.bulk.errors import ERROR_RENDER
+from s42.bulk.errors import ERROR_UNKNOWN_COUNTRY
+from s42.bulk.errors import ErrorTable
+from s42.bulk.errors import describe
+from s42.const import ISO3166_MAP
+from s42.datastructures import Code
+from s42.datastructures import Country
+from s42.datastructures import get_country
+from s42.mapping import get_mapper
+from s42.template import get_template
+from s42.template.exc import TemplateDoesNotExist
+
+
+class CheckedRenderer(object):
+    """Renders a batch of records, collecting the records that cannot
+    be rendered into an :class:`~s42.bulk.errors.ErrorTable` and,
+    optionally, a :class:`~s42.bulk.errors.QuarantineFile` instead of
+    raising.
+
+    Records are checked before they are rendered with lookups that are
+    cached per country and per element code, so the checks cost a few
+    dictionary lookups per record and the records that pass them are
+    rendered exactly as :func:`~s42.bulk.records.render_record` would.
+    """
+
+    def __init__(self, errors=None, quarantine=None, mnemonic=True,
+        complete=False, s42_version='6', patdl_version='2.6'):
+        """Initialize a new :class:`CheckedRenderer` instance.
+
+        Args:
+            errors: the :class:`~s42.bulk.errors.ErrorTable` receiving
+                the failures. A new table is created if omitted.
+            quarantine: a :class:`~s42.bulk.errors.QuarantineFile`
+                receiving the failed records, or ``None``.
+            mnemonic: a boolean indicating if records are keyed by
+                mnemonic field names, as expected by
+                :func:`~s42.create_dps`, or by element codes.
+            complete: a boolean indicating if records that do not
+                populate the required elements of the lines they select
+                are rejected as ``'incomplete'``.
+        """
+        self.errors = errors if errors is not None else ErrorTable()
+        self.quarantine = quarantine
+        self.mnemonic = mnemonic
+        self.complete = complete
+        self.s42_version = s42_version
+        self.patdl_version = patdl_version
+        self._countries = {}
+        self._codes = set()
+
+    def check(self, record):
+        """Return the ``(code, detail)`` tuple of the error that prevents
+        `record` from being rendered, or ``None`` if the checks pass.
+        Rendering errors are not detected.
+        """
+        error, prepared = self._prepare(record)
+        if error is None and self.complete:
+            error = self._check_complete(*prepared)
+        return error
+
+    def render(self, records):
+        """Render an iterable of records.
+
+        Yields:
+            tuple: an ``(index, lines)`` tuple for each record that was
+                rendered, where `index` is the position of the record
+                in `records`. The failed records are skipped.
+        """
+        for index, record in enumerate(records):
+            lines = self._render(index, record)
+            if lines is not None:
+                yield index, lines
+
+    def render_source(self, source):
+        """Render the records of a :class:`~s42.bulk.io.JSONLSource`.
+        Lines that do not hold valid JSON fail as ``'invalid-record'``.
+
+        Yields:
+            tuple: an ``(offset, lines)`` tuple for each record that was
+                rendered, where `offset` is the byte offset of its line.
+        """
+        for offset, line in source.iter_lines():
+            try:
+                record = source.parse(line)
+            except ValueError as e:
+                self._fail(offset, line, ERROR_INVALID_RECORD, str(e))
+                continue
+            lines = self._render(offset, record)
+            if lines is not None:
+                yield offset, lines
+
+    def _render(self, index, record):
+        error, prepared = self._prepare(record)
+        if error is None and self.complete:
+            error = self._check_complete(*prepared)
+        if error is not None:
+            self._fail(index, record, *error)
+            return None
+        template, elements = prepared
+        try:
+            return [str(x) for x in template.render(elements)]
+        except Exception as e:
+            self._fail(index, record, ERROR_RENDER, describe(e))
+            return None
+
+    def _fail(self, index, record, code, detail):
+        self.errors.add(index, code, detail)
+        if self.quarantine is not None:
+            self.quarantine.add(index, code, detail, record)
+
+    def _prepare(self, record):
+        if not isinstance(record, dict):
+            return (ERROR_INVALID_RECORD, type(record).__name__), None
+        value = record.get('country')
+        if value is None:
+            return (ERROR_NO_COUNTRY, None), None
+        try:
+            error, country = self._countries[value]
+        except KeyError:
+            error, country = self._countries[value] = self._load_country(value)
+        except TypeError:
+            return (ERROR_UNKNOWN_COUNTRY, repr(value)), None
+        if error is not None:
+            return error, None
+
+        iso, template, mapper = country
+        if self.mnemonic:
+            fields = dict(record)
+            fields['country_name'] = str(iso)
+            return None, (template, mapper.map(fields))
+
+        elements = dict(record)
+        del elements['country']
+        for key in elements:
+            if key in self._codes:
+                continue
+            try:
+                Code.fromstring(key)
+            except ValueError:
+                return (ERROR_INVALID_CODE, key), None
+            self._codes.add(key)
+        return None, (template, elements)
+
+    def _load_country(self, value):
+        if not isinstance(value, Country) and value not in ISO3166_MAP:
+            return (ERROR_UNKNOWN_COUNTRY, str(value)), None
+        iso = get_country(value)
+        mapper = None
+        if self.mnemonic:
+            try:
+                mapper = get_mapper(iso.numeric3)
+            except KeyError:
+                return (ERROR_NO_MAPPING, iso.alpha2), None
+        try:
+            template = get_template(iso.alpha2, self.s42_version,
+                self.patdl_version)
+        except TemplateDoesNotExist:
+            return (ERROR_NO_TEMPLATE, iso.alpha2), None
+        return None, (iso, template, mapper)
+
+    def _check_complete(self, template, elements):
+        try:
+            missing = template.validate(elements)
+        except Exception as e:
+            return (ERROR_RENDER, describe(e))
+        if not missing:
+            return None
+        return (ERROR_INCOMPLETE, dict((identifier.symbolic,
+            [str(x) for x in codes]) for identifier, codes in missing))
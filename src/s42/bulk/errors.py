@@ -0,0 +1,125 @@
+import array
+import collections
+import json
+
+from s42.bulk.io import open_writer
+
+
+#: The record is not a JSON object or a dictionary.
+ERROR_INVALID_RECORD = 'invalid-record'
+
+#: The record does not declare its country.
+ERROR_NO_COUNTRY = 'no-country'
+
+#: The country of the record is not an ISO 3166 code.
+ERROR_UNKNOWN_COUNTRY = 'unknown-country'
+
+#: No mnemonic mapping is defined for the country of the record.
+ERROR_NO_MAPPING = 'no-mapping'
+
+#: No template exists for the country of the record.
+ERROR_NO_TEMPLATE = 'no-template'
+
+#: The record is keyed by an invalid element code.
+ERROR_INVALID_CODE = 'invalid-code'
+
+#: The record does not populate the required elements of a selected line.
+ERROR_INCOMPLETE = 'incomplete'
+
+#: Rendering the record raised an exception.
+ERROR_RENDER = 'render-error'
+
+ERROR_CODES = (
+    ERROR_INVALID_RECORD,
+    ERROR_NO_COUNTRY,
+    ERROR_UNKNOWN_COUNTRY,
+    ERROR_NO_MAPPING,
+    ERROR_NO_TEMPLATE,
+    ERROR_INVALID_CODE,
+    ERROR_INCOMPLETE,
+    ERROR_RENDER
+)
+
+
+def describe(exc):
+    """Return the detail recorded for a failure raised as `exc`."""
+    return "{0}: {1}".format(type(exc).__name__, exc)
+
+
+class ErrorTable(object):
+    """A compact table of the records that failed in a batch.
+
+    The index and the error code of each failure are held in typed
+    arrays; the optional details are kept only for the failures that
+    have them.
+    """
+
+    def __init__(self):
+        self._indexes = array.array('Q')
+        self._codes = array.array('B')
+        self._details = {}
+
+    def add(self, index, code, detail=None):
+        """Record that the record at `index` failed with the error
+        `code`, one of :data:`ERROR_CODES`.
+        """
+        if detail is not None:
+            self._details[len(self._codes)] = detail
+        self._indexes.append(index)
+        self._codes.append(ERROR_CODES.index(code))
+
+    def counts(self):
+        """Return a dictionary mapping error codes to the number of
+        records that failed with them.
+        """
+        counts = collections.Counter(self._codes)
+        return dict((ERROR_CODES[k], v) for k, v in counts.items())
+
+    def clear(self):
+        del self._indexes[:]
+        del self._codes[:]
+        self._details.clear()
+
+    def __iter__(self):
+        """Yield ``(index, code, detail)`` tuples in the order in which
+        the failures were added.
+        """
+        for i, (index, code) in enumerate(zip(self._indexes, self._codes)):
+            yield index, ERROR_CODES[code], self._details.get(i)
+
+    def __len__(self):
+        return len(self._codes)
+
+
+class QuarantineFile(object):
+    """Writes failed records to a file holding one JSON object per
+    line, with the members ``index``, ``error``, ``detail`` and
+    ``record``. The file is compressed if its extension is ``.gz``,
+    ``.bz2``, ``.xz`` or ``.lzma``, on a separate thread if `threaded`
+    is true; see :func:`~s42.bulk.io.open_writer`.
+    """
+
+    def __init__(self, filepath, threaded=True):
+        self.filepath = filepath
+        self.count = 0
+        self._file = open_writer(filepath, threaded)
+
+    def add(self, index, code, detail, record):
+        if isinstance(record, bytes):
+            record = record.decode('utf-8', 'replace')
+        self._file.write(json.dumps({
+            'index': index,
+            'error': code,
+            'detail': detail,
+            'record': record
+        }, default=repr) + '\n')
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import sqlite3
+
+from s42 import create_dps
+from s42.datastructures import Code
+from s42.template import get_template
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    run INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run INTEGER PRIMARY KEY AUTOINCREMENT
+);
+"""
+
+
+def get_consumed_codes(template):
+    """Return the result of :meth:`~s42.template.Template.consumed_codes`,
+    or ``None`` if the codes consumed by `template` are not known.
+    """
+    try:
+        return template.consumed_codes()
+    except ValueError:
+        return None
+
+
+def get_fingerprint(template, elements, codes):
+    """Return a digest of the template version and of the values of
+    the elements in `elements` that `template` consumes.
+
+    Args:
+        template: a :class:`~s42.template.Template` instance.
+        elements: a dictionary keyed by S42 element code.
+        codes: the result of :func:`get_consumed_codes` for `template`.
+            If ``None``, all elements are taken into account.
+    """
+    consumed = []
+    for code, value in elements.items():
+        code = str(Code.fromstring(code))
+        if codes is None or code in codes:
+            consumed.append((code, value))
+    consumed.sort()
+    payload = json.dumps([template.digest, consumed], sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class FingerprintStore(object):
+    """A sqlite file holding the fingerprint of each record key as of
+    the run that last saw it.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._conn = sqlite3.connect(filepath)
+        self._conn.executescript(SCHEMA)
+
+    def begin_run(self):
+        """Start a new run and return its number."""
+        with self._conn:
+            cursor = self._conn.execute("INSERT INTO runs DEFAULT VALUES")
+        return cursor.lastrowid
+
+    def get_many(self, keys):
+        """Return a dictionary mapping the given keys to their stored
+        fingerprint. Unknown keys are omitted.
+        """
+        result = {}
+        keys = list(keys)
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            result.update(self._conn.execute(
+                "SELECT key, fingerprint FROM fingerprints WHERE key IN ({0})"
+                .format(','.join('?' * len(chunk))), chunk))
+        return result
+
+    def put_many(self, rows, run):
+        """Store ``(key, fingerprint)`` tuples as seen by `run`."""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO fingerprints (key, fingerprint, run)"
+                " VALUES (?, ?, ?)", [(k, f, run) for k, f in rows])
+
+    def get_unseen(self, run):
+        """Return a list of the keys that `run` did not see."""
+        return [x[0] for x in self._conn.execute(
+            "SELECT key FROM fingerprints WHERE run != ? ORDER BY key",
+            (run,))]
+
+    def purge(self, run):
+        """Delete the fingerprints of the keys that `run` did not see.
+
+        Returns:
+            int: the number of deleted fingerprints.
+        """
+        with self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM fingerprints WHERE run != ?", (run,))
+        return cursor.rowcount
+
+    def delete_many(self, keys):
+        with self._conn:
+            self._conn.executemany(
+                "DELETE FROM fingerprints WHERE key = ?", [(k,) for k in keys])
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class DeltaRenderer(object):
+    """Renders only the records whose fingerprint changed since the
+    previous run, i.e. records that are new, whose consumed elements
+    changed, or whose template changed.
+
+    Fingerprints of a batch are stored once the caller has consumed
+    the results of that batch, so an interrupted run re-renders the
+    records whose output may not have been written. The fingerprints
+    of records that are no longer in the input are kept until
+    :meth:`purge` is called after a complete run.
+    """
+
+    def __init__(self, store, key='id', batch_size=1000):
+        """Initialize a new :class:`DeltaRenderer` instance.
+
+        Args:
+            store: a :class:`FingerprintStore` instance.
+            key: the member of each record holding its unique key.
+            batch_size: the number of records whose fingerprints are
+                looked up and stored together.
+        """
+        self.store = store
+        self.key = key
+        self.batch_size = batch_size
+        self.run = None
+        self._codes = {}
+
+    def render(self, records):
+        """Yield ``(key, lines)`` tuples for the records of `records`
+        that changed since the previous run. Records are dictionaries
+        keyed by mnemonic field names, as accepted by
+        :func:`~s42.create_dps`.
+        """
+        self.run = self.store.begin_run()
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) == self.batch_size:
+                for result in self._render_batch(batch):
+                    yield result
+                batch = []
+        for result in self._render_batch(batch):
+            yield result
+
+    def get_deleted(self):
+        """Return the keys of the records that were stored by previous
+        runs but not seen by the last call to :meth:`render`, once it
+        is exhausted.
+        """
+        return self.store.get_unseen(self.run)
+
+    def purge(self):
+        """Delete the fingerprints of the records that were not seen by
+        the last call to :meth:`render`, once it is exhausted, so that
+        the store only holds the records of the current input.
+
+        Returns:
+            list: the keys of the deleted records.
+        """
+        deleted = self.get_deleted()
+        self.store.purge(self.run)
+        return deleted
+
+    def _render_batch(self, batch):
+        if not batch:
+            return
+        keys = [str(x[self.key]) for x in batch]
+        stored = self.store.get_many(keys)
+        rows = []
+        for key, record in zip(keys, batch):
+            record = dict(record)
+            record.pop(self.key)
+            iso, elements = create_dps(record)
+            template = get_template(iso.alpha2)
+            fingerprint = get_fingerprint(template, elements,
+                self._get_codes(template))
+            rows.append((key, fingerprint))
+            if stored.get(key) == fingerprint:
+                continue
+            yield key, [str(x) for x in template.render(elements)]
+        self.store.put_many(rows, self.run)
+
+    def _get_codes(self, template):
+        try:
+            return self._codes[template.digest]
+        except KeyError:
+            pass
+        codes = self._codes[template.digest] = get_consumed_codes(template)
+        return codes
@@ -0,0 +1,395 @@
+import array
+import bisect
+import bz2
+import gzip
+import io
+import json
+import lzma
+import mmap
+import os
+import struct
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+#: The codecs of compressed files, by filename extension.
+CODECS = {
+    '.gz': gzip,
+    '.bz2': bz2,
+    '.xz': lzma,
+    '.lzma': lzma
+}
+
+#: The size of the buffers of compressed streams.
+BUFFER_SIZE = 1 << 20
+
+
+def get_codec(filepath):
+    """Return the module compressing the file at `filepath`, based on
+    its extension, or ``None`` if it is not compressed.
+    """
+    return CODECS.get(os.path.splitext(filepath)[1].lower())
+
+
+def open_stream(filepath, mode='rb', buffer_size=BUFFER_SIZE,
+    compresslevel=None):
+    """Open a file that is compressed with gzip, bz2 or lzma if its
+    extension is ``.gz``, ``.bz2``, ``.xz`` or ``.lzma``, with a buffer
+    of `buffer_size` bytes between the codec and the caller.
+
+    Args:
+        filepath: the path of the file.
+        mode: ``'rb'``, ``'wb'``, ``'rt'`` or ``'wt'``. Text streams
+            are encoded as UTF-8.
+        compresslevel: the compression level, or the preset for lzma.
+            Defaults to 6 for gzip and to the default of the codec
+            otherwise.
+    """
+    assert mode in ('rb', 'wb', 'rt', 'wt'), mode
+    codec = get_codec(filepath)
+    binary = mode[0] + 'b'
+    if codec is None:
+        stream = open(filepath, binary, buffer_size)
+    else:
+        kwargs = {}
+        if codec is lzma:
+            if compresslevel is not None and binary == 'wb':
+                kwargs['preset'] = compresslevel
+        elif binary == 'wb':
+            kwargs['compresslevel'] = compresslevel\
+                if compresslevel is not None else (6 if codec is gzip else 9)
+        raw = codec.open(filepath, binary, **kwargs)
+        stream = io.BufferedReader(raw, buffer_size) if binary == 'rb'\
+            else io.BufferedWriter(raw, buffer_size)
+    if mode[1] == 't':
+        stream = io.TextIOWrapper(stream, encoding='utf-8')
+    return stream
+
+
+class ThreadedWriter(object):
+    """Writes text to a binary stream on a separate thread, so that the
+    caller does not wait for the stream, e.g. for its compression codec.
+
+    Strings are encoded as UTF-8 and collected into chunks of
+    `chunk_size` bytes that are passed to the thread through a queue of
+    at most `queue_size` chunks. Like a text stream, the writer does not
+    accept bytes. An error raised by the stream is raised by the next
+    call to :meth:`write` or by :meth:`close`.
+    """
+
+    def __init__(self, stream, chunk_size=BUFFER_SIZE, queue_size=4):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self._buffer = []
+        self._buffered = 0
+        self._error = None
+        self._queue = queue.Queue(queue_size)
+        self._thread = threading.Thread(target=self._run,
+            name='s42-threaded-writer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def write(self, text):
+        """Write the string `text` and return the number of characters
+        written.
+        """
+        if self._error is not None:
+            raise self._error
+        if isinstance(text, bytes):
+            raise TypeError("write() argument must be str, not bytes")
+        data = text.encode('utf-8')
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self.chunk_size:
+            self._flush()
+        return len(text)
+
+    def _flush(self):
+        if self._buffer:
+            self._queue.put(b''.join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+
+    def _run(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                break
+            if self._error is not None:
+                continue
+            try:
+                self.stream.write(chunk)
+            except Exception as e:
+                self._error = e
+
+    def close(self):
+        """Write the remaining data, wait for the thread and close the
+        stream.
+        """
+        if self._thread is None:
+            return
+        self._flush()
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        try:
+            self.stream.close()
+        except Exception as e:
+            if self._error is None:
+                self._error = e
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def open_writer(filepath, threaded=True, buffer_size=BUFFER_SIZE,
+    compresslevel=None):
+    """Open a file for writing text encoded as UTF-8, compressed as its
+    extension indicates; see :func:`open_stream`. If `threaded` is true
+    and the file is compressed, compression runs on a separate thread
+    and a :class:`ThreadedWriter` is returned; otherwise the file is a
+    text stream. Either accepts strings only and supports the context
+    manager protocol.
+    """
+    if threaded and get_codec(filepath) is not None:
+        return ThreadedWriter(open_stream(filepath, 'wb', buffer_size,
+            compresslevel), buffer_size)
+    return open_stream(filepath, 'wt', buffer_size, compresslevel)
+
+
+class JSONLSource(object):
+    """A file holding one JSON record per line that can be split into
+    byte ranges aligned to line boundaries.
+
+    Files compressed with gzip, bz2 or lzma are decompressed as they
+    are read; their offsets are positions in the decompressed data and
+    they cannot be split into ranges, so a
+    :class:`~s42.bulk.jobs.JobRunner` renders them as a single shard.
+    """
+
+    @property
+    def size(self):
+        return os.path.getsize(self.filepath)
+
+    @property
+    def compressed(self):
+        return get_codec(self.filepath) is not None
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+
+    def get_stamp(self):
+        """Return a tuple identifying the current contents of the file."""
+        st = os.stat(self.filepath)
+        return [st.st_size, st.st_mtime]
+
+    def ranges(self, n):
+        """Split the file into at most `n` contiguous ``(start, end)`` byte
+        ranges, each starting at the beginning of a line. A compressed
+        file is a single range.
+        """
+        if self.compressed:
+            return [(0, None)]
+        size = self.size
+        offsets = [0]
+        with open(self.filepath, 'rb') as f:
+            for i in range(1, n):
+                f.seek(max((size * i) // n, offsets[-1]))
+                if f.tell() > 0:
+                    f.seek(f.tell() - 1)
+                    f.readline()
+                offset = f.tell()
+                if offset > offsets[-1] and offset < size:
+                    offsets.append(offset)
+        offsets.append(size)
+        return list(zip(offsets[:-1], offsets[1:]))
+
+    def iter_lines(self, start=0, end=None):
+        """Yield ``(offset, line)`` tuples for the non-blank lines starting
+        in the byte range `start` to `end`.
+        """
+        with open_stream(self.filepath) as f:
+            offset = 0
+            if not self.compressed:
+                f.seek(start)
+                offset = start
+            for line in f:
+                if end is not None and offset >= end:
+                    break
+                if offset >= start and line.strip():
+                    yield offset, line
+                offset += len(line)
+
+    def read(self, start=0, end=None):
+        """Yield ``(offset, record)`` tuples for the records starting in
+        the byte range `start` to `end`.
+        """
+        for offset, line in self.iter_lines(start, end):
+            yield offset, self.parse(line)
+
+    @staticmethod
+    def parse(line):
+        return json.loads(line.decode('utf-8'))
+
+    def __iter__(self):
+        for offset, record in self.read():
+            yield record
+
+
+#: The size and modification time of the indexed file, and the number
+#: of offsets that follow.
+INDEX_HEADER = struct.Struct('<QdQ')
+
+
+class MappedJSONLSource(JSONLSource):
+    """A :class:`JSONLSource` that memory-maps its file and indexes the
+    offset of every record.
+
+    The index is built by a single scan of the file and cached in a
+    sidecar file, which is rebuilt when the size or the modification
+    time of the input changes. It allows random access to records,
+    e.g. to re-render selected records, and splits the file into
+    ranges holding the same number of records without seeking.
+
+    Instances can be passed to worker processes; each process maps the
+    file and loads the index on first use.
+    """
+
+    def __init__(self, filepath, index_path=None):
+        """Initialize a new :class:`MappedJSONLSource` instance.
+
+        Args:
+            filepath: the path of the input file.
+            index_path: the path of the cached index. Defaults to the
+                path of the input file followed by ``.idx``.
+        """
+        JSONLSource.__init__(self, filepath)
+        if self.compressed:
+            raise ValueError("Compressed files cannot be memory-mapped.")
+        self.index_path = index_path or (filepath + '.idx')
+        self._file = None
+        self._map = None
+        self._offsets = None
+
+    def _get_map(self):
+        if self._map is None:
+            self._file = open(self.filepath, 'rb')
+            if os.fstat(self._file.fileno()).st_size == 0:
+                # Empty files cannot be mapped.
+                self._map = b''
+            else:
+                self._map = mmap.mmap(self._file.fileno(), 0,
+                    access=mmap.ACCESS_READ)
+        return self._map
+
+    def get_offsets(self):
+        """Return an :class:`array.array` holding the byte offset of
+        each non-blank line, loading or building the index if needed.
+        """
+        if self._offsets is None:
+            st = os.stat(self.filepath)
+            offsets = self._load_index(st)
+            if offsets is None:
+                offsets = self._build_index()
+                self._save_index(st, offsets)
+            self._offsets = offsets
+        return self._offsets
+
+    def _load_index(self, st):
+        try:
+            with open(self.index_path, 'rb') as f:
+                size, mtime, count = INDEX_HEADER.unpack(
+                    f.read(INDEX_HEADER.size))
+                if size != st.st_size or mtime != st.st_mtime:
+                    return None
+                offsets = array.array('Q')
+                offsets.fromfile(f, count)
+        except (IOError, OSError, EOFError, struct.error):
+            return None
+        return offsets
+
+    def _build_index(self):
+        buf = self._get_map()
+        size = len(buf)
+        offsets = array.array('Q')
+        pos = 0
+        while pos < size:
+            end = buf.find(b'\n', pos)
+            end = size if end < 0 else end + 1
+            if buf[pos:end].strip():
+                offsets.append(pos)
+            pos = end
+        return offsets
+
+    def _save_index(self, st, offsets):
+        tmp = self.index_path + '.tmp'
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(INDEX_HEADER.pack(st.st_size, st.st_mtime,
+                    len(offsets)))
+                offsets.tofile(f)
+            os.rename(tmp, self.index_path)
+        except (IOError, OSError):
+            # The index is a cache; a read-only location only costs a
+            # rebuild on the next run.
+            pass
+
+    def get_line(self, i):
+        """Return the bytes of the `i`-th record, including the line
+        terminator.
+        """
+        start = self.get_offsets()[i]
+        return self._slice(start)
+
+    def _slice(self, start):
+        buf = self._get_map()
+        end = buf.find(b'\n', start)
+        end = len(buf) if end < 0 else end + 1
+        return buf[start:end]
+
+    def ranges(self, n):
+        """Split the file into at most `n` contiguous ``(start, end)``
+        byte ranges holding the same number of records, give or take one.
+        """
+        offsets = self.get_offsets()
+        count = len(offsets)
+        if not count:
+            return [(0, self.size)]
+        starts = sorted(set(offsets[(count * i) // n] for i in range(n)))
+        starts[0] = 0
+        return list(zip(starts, starts[1:] + [self.size]))
+
+    def iter_lines(self, start=0, end=None):
+        offsets = self.get_offsets()
+        i = bisect.bisect_left(offsets, start)
+        j = len(offsets) if end is None else bisect.bisect_left(offsets, end)
+        for k in range(i, j):
+            offset = offsets[k]
+            yield offset, self._slice(offset)
+
+    def close(self):
+        if self._file is not None:
+            if not isinstance(self._map, bytes):
+                self._map.close()
+            self._file.close()
+        self._file = self._map = None
+
+    def __len__(self):
+        return len(self.get_offsets())
+
+    def __getitem__(self, i):
+        return self.parse(self.get_line(i))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update({'_file': None, '_map': None, '_offsets': None})
+        return state
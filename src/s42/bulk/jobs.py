@@ -0,0 +1,350 @@
+import collections
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+import zlib
+
+from s42.bulk.errors import ERROR_INVALID_RECORD
+from s42.bulk.errors import ERROR_RENDER
+from s42.bulk.errors import QuarantineFile
+from s42.bulk.errors import describe
+from s42.bulk.io import JSONLSource
+from s42.bulk.io import open_writer
+from s42.bulk.records import render_record
+
+
+STRATEGY_RANGE = 'range'
+STRATEGY_HASH = 'hash'
+
+MANIFEST_FILENAME = 'manifest.json'
+
+SHARD_FILENAME = 'shard-{0:05d}.jsonl'
+
+ERRORS_FILENAME = 'shard-{0:05d}.errors.jsonl'
+
+#: The number of records rendered by a task.
+BATCH_SIZE = 256
+
+
+class JobManifest(object):
+    """The checkpoint of a :class:`JobRunner`, recording the parameters
+    of the job and the shards that have been completed.
+    """
+
+    def __init__(self, filepath, params):
+        self.filepath = filepath
+        self.params = params
+        self.completed = set()
+
+    def load(self):
+        """Load the completed shards from the manifest file, if it exists.
+
+        Raises:
+            ValueError: the manifest was written for a different job or
+                for a different version of the input file.
+        """
+        if not os.path.exists(self.filepath):
+            return
+        with open(self.filepath) as f:
+            manifest = json.load(f)
+        if manifest['params'] != self.params:
+            raise ValueError(
+                "The checkpoint at {0} does not match this job.".format(
+                    self.filepath))
+        self.completed = set(manifest['completed'])
+
+    def save(self):
+        tmp = self.filepath + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({
+                'params': self.params,
+                'completed': sorted(self.completed)
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(tmp, self.filepath)
+
+
+def render_shard(task):
+    """Render the records of a single shard into its output file.
+
+    Each output line holds the byte offset of the input record and the
+    JSON-encoded result, separated by a tab, so that shards can be
+    merged back into input order. Records that cannot be parsed or
+    rendered are written to the errors file of the shard, as by a
+    :class:`~s42.bulk.errors.QuarantineFile` indexed by byte offset.
+    """
+    source, shard, shards, strategy, span, render, dst, errors = task
+    lines = source.iter_lines(*span)
+    if strategy == STRATEGY_HASH:
+        lines = ((offset, line) for offset, line in lines
+            if (zlib.crc32(line) & 0xffffffff) % shards == shard)
+    batches = ((source, render, x) for x in get_batches(lines))
+    write_shard(map(render_batch, batches), dst, errors)
+    return shard
+
+
+def render_batch(task):
+    """Render a list of ``(offset, line)`` tuples.
+
+    Returns:
+        tuple: a list of ``(offset, result)`` tuples holding the
+            JSON-encoded result of each record, and a list of the
+            arguments of :meth:`~s42.bulk.errors.QuarantineFile.add`
+            for each record that failed.
+    """
+    source, render, batch = task
+    results = []
+    failures = []
+    for offset, line in batch:
+        try:
+            record = source.parse(line)
+        except ValueError as e:
+            failures.append((offset, ERROR_INVALID_RECORD, str(e), line))
+            continue
+        try:
+            result = render(record)
+        except Exception as e:
+            failures.append((offset, ERROR_RENDER, describe(e), record))
+            continue
+        results.append((offset, json.dumps(result)))
+    return results, failures
+
+
+def write_shard(results, dst, errors):
+    """Write the results of :func:`render_batch`, in input order, to the
+    output file `dst` and the errors file `errors` of a shard. The files
+    are renamed into place once complete.
+    """
+    tmp = dst + '.tmp'
+    errors_tmp = errors + '.tmp'
+    with open(tmp, 'w') as f, QuarantineFile(errors_tmp) as quarantine:
+        for rendered, failures in results:
+            for offset, result in rendered:
+                f.write("{0}\t{1}\n".format(offset, result))
+            for failure in failures:
+                quarantine.add(*failure)
+    os.rename(errors_tmp, errors)
+    os.rename(tmp, dst)
+
+
+def get_batches(iterable, size=None):
+    """Yield lists of at most `size` consecutive items of `iterable`;
+    `size` defaults to :data:`BATCH_SIZE`.
+    """
+    size = size or BATCH_SIZE
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class JobRunner(object):
+    """Renders an input file of JSON records in shards across worker
+    processes, checkpointing completed shards so that an interrupted
+    job resumes where it stopped.
+
+    Shards are either contiguous byte ranges of the input file or sets
+    of records selected by the CRC-32 of their line. Each shard writes
+    its own output file in the working directory; the outputs are
+    merged into input order once all shards are complete. Records that
+    fail do not stop their shard: they are collected in an errors file
+    per shard, see :meth:`merge_errors`.
+    """
+
+    def __init__(self, source, workdir, shards=8, processes=None,
+        strategy=STRATEGY_RANGE, render=render_record, threaded=True):
+        """Initialize a new :class:`JobRunner` instance.
+
+        Args:
+            source: a filepath or a :class:`~s42.bulk.io.JSONLSource`
+                instance holding the input records, e.g. a
+                :class:`~s42.bulk.io.MappedJSONLSource` to split large
+                files by record count using a cached offset index.
+            workdir: the directory holding the checkpoint manifest and
+                the output of each shard. It is created if it does not
+                exist.
+            shards: the number of shards. Compressed sources cannot be
+                split into byte ranges and are rendered as a single
+                shard: they are decompressed once, by the current
+                process, and their records are rendered in batches by
+                the worker processes. An interrupted job on a
+                compressed source therefore starts over.
+            processes: the number of worker processes. Defaults to the
+                number of CPUs; if 1, shards are rendered in the current
+                process.
+            strategy: either ``'range'`` or ``'hash'``. Ignored for
+                compressed sources.
+            render: a picklable callable that returns the JSON-encodable
+                result of a record.
+            threaded: a boolean indicating if the merged files are
+                compressed on a separate thread when their extension
+                calls for it; see :func:`~s42.bulk.io.open_writer`.
+        """
+        if strategy not in (STRATEGY_RANGE, STRATEGY_HASH):
+            raise ValueError("Unknown strategy: " + repr(strategy))
+        if not isinstance(source, JSONLSource):
+            source = JSONLSource(source)
+        if source.compressed:
+            shards, strategy = 1, STRATEGY_RANGE
+        self.source = source
+        self.workdir = workdir
+        self.shards = shards
+        self.processes = processes
+        self.strategy = strategy
+        self.render = render
+        self.threaded = threaded
+
+    def get_spans(self):
+        """Return a list holding the byte range read by each shard."""
+        if self.strategy == STRATEGY_HASH:
+            return [(0, None)] * self.shards
+        return self.source.ranges(self.shards)
+
+    def get_shard_path(self, shard):
+        return os.path.join(self.workdir, SHARD_FILENAME.format(shard))
+
+    def get_errors_path(self, shard):
+        return os.path.join(self.workdir, ERRORS_FILENAME.format(shard))
+
+    def get_manifest(self, spans):
+        return JobManifest(os.path.join(self.workdir, MANIFEST_FILENAME), {
+            'source': os.path.abspath(self.source.filepath),
+            'stamp': self.source.get_stamp(),
+            'strategy': self.strategy,
+            'spans': [list(x) for x in spans]
+        })
+
+    def run(self, dst=None, errors=None):
+        """Render all shards that are not yet completed and, if `dst`
+        is provided, merge the outputs into it. Completed shards whose
+        output files are missing are rendered again.
+
+        Args:
+            dst: the path of the merged output file.
+            errors: the path of the merged errors file; see
+                :meth:`merge_errors`.
+
+        Returns:
+            list: the indexes of the shards rendered by this call.
+        """
+        if not os.path.exists(self.workdir):
+            os.makedirs(self.workdir)
+        spans = self.get_spans()
+        manifest = self.get_manifest(spans)
+        manifest.load()
+
+        tasks = []
+        for shard, span in enumerate(spans):
+            if shard in manifest.completed and self._is_complete(shard):
+                continue
+            tasks.append((self.source, shard, len(spans), self.strategy,
+                span, self.render, self.get_shard_path(shard),
+                self.get_errors_path(shard)))
+
+        rendered = []
+        if self.processes == 1:
+            results = map(render_shard, tasks)
+            self._checkpoint(manifest, results, rendered)
+        elif tasks:
+            pool = multiprocessing.Pool(self.processes)
+            try:
+                if self.source.compressed:
+                    results = (self._render_stream(pool, x) for x in tasks)
+                else:
+                    results = pool.imap_unordered(render_shard, tasks)
+                self._checkpoint(manifest, results, rendered)
+            finally:
+                pool.terminate()
+                pool.join()
+
+        if dst is not None:
+            self.merge(dst, len(spans))
+        if errors is not None:
+            self.merge_errors(errors, len(spans))
+        return sorted(rendered)
+
+    def _render_stream(self, pool, task):
+        # Pool.imap would read the whole input ahead of the workers, so
+        # the number of batches in flight is bounded instead.
+        source, shard, shards, strategy, span, render, dst, errors = task
+        window = 2 * (self.processes or multiprocessing.cpu_count())
+        pending = collections.deque()
+
+        def results():
+            for batch in get_batches(source.iter_lines(*span)):
+                pending.append(pool.apply_async(render_batch,
+                    ((source, render, batch),)))
+                if len(pending) >= window:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+
+        write_shard(results(), dst, errors)
+        return shard
+
+    def _is_complete(self, shard):
+        return os.path.exists(self.get_shard_path(shard))\
+            and os.path.exists(self.get_errors_path(shard))
+
+    def _checkpoint(self, manifest, results, rendered):
+        for shard in results:
+            manifest.completed.add(shard)
+            manifest.save()
+            rendered.append(shard)
+
+    def merge(self, dst, shards=None):
+        """Merge the output of the shards into `dst`, one JSON-encoded
+        result per line in input order. `dst` is compressed if its
+        extension is ``.gz``, ``.bz2``, ``.xz`` or ``.lzma``, on a
+        separate thread unless :attr:`threaded` is false; see
+        :func:`~s42.bulk.io.open_writer`.
+        """
+        if shards is None:
+            shards = len(self.get_spans())
+        files = [open(self.get_shard_path(i)) for i in range(shards)]
+        try:
+            streams = [map(self._parse_output, f) for f in files]
+            with open_writer(dst, self.threaded) as f:
+                for offset, result in heapq.merge(*streams):
+                    f.write(result)
+        finally:
+            for f in files:
+                f.close()
+
+    def merge_errors(self, dst, shards=None):
+        """Merge the errors files of the shards into `dst`, one JSON
+        object per failed record in input order, as written by a
+        :class:`~s42.bulk.errors.QuarantineFile` whose ``index`` member
+        is the byte offset of the record.
+
+        Returns:
+            int: the number of failed records.
+        """
+        if shards is None:
+            shards = len(self.get_spans())
+        files = [open(self.get_errors_path(i)) for i in range(shards)]
+        count = 0
+        try:
+            streams = [map(self._parse_error, f) for f in files]
+            with open_writer(dst, self.threaded) as f:
+                for offset, line in heapq.merge(*streams):
+                    f.write(line)
+                    count += 1
+        finally:
+            for f in files:
+                f.close()
+        return count
+
+    @staticmethod
+    def _parse_error(line):
+        return json.loads(line)['index'], line
+
+    @staticmethod
+    def _parse_output(line):
+        offset, result = line.split('\t', 1)
+        return int(offset), result
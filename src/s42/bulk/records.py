@@ -0,0 +1,12 @@
+from s42 import create_dps
+from s42.template import get_template
+
+
+def render_record(record):
+    """Render a record keyed by mnemonic field names, holding the
+    ISO 3166 code of its country in its ``country`` member, into a
+    list of address lines.
+    """
+    iso, elements = create_dps(dict(record))
+    rendition = get_template(iso.alpha2).render(elements)
+    return [str(x) for x in rendition]
@@ -0,0 +1,53 @@
+from s42.datastructures import AddressDTO
+
+
+class ReusableRenderer(object):
+    """Renders addresses with a single template into lists of line
+    strings, reusing its scratch objects between records.
+
+    The elements of each record are loaded into one
+    :class:`~s42.datastructures.AddressDTO` that is reset between
+    records, and the text of each line is assembled in a reused buffer
+    by :meth:`~s42.template.lines.Line.get_text` instead of through an
+    :class:`~s42.template.rendition.AddressRendition` and its node
+    tree. The output is identical to rendering with
+    :meth:`~s42.template.base.Template.render`. Instances are not
+    thread-safe; use one per thread.
+    """
+
+    def __init__(self, template, lines=None):
+        """Initialize a new :class:`ReusableRenderer` instance.
+
+        Args:
+            template: a :class:`~s42.template.base.Template` instance.
+            lines: an iterable of line names restricting the lines that
+                are rendered; see
+                :meth:`~s42.template.base.Template.resolve_lines`.
+        """
+        self.template = template
+        self.selection = template.resolve_lines(lines)\
+            if lines is not None else None
+        self._dto = AddressDTO({})
+        self._parts = []
+
+    def render(self, elements):
+        """Render a dictionary of address elements keyed by element code
+        into a list of line strings.
+        """
+        dto = self._dto
+        dto.reset(elements)
+        try:
+            return [line.get_text(dto, self._parts) for line
+                in self.template.iter_selected_lines(dto, self.selection)]
+        finally:
+            # Do not keep the values of the record alive.
+            dto.reset()
+
+    def render_many(self, records):
+        """Render an iterable of dictionaries; see :meth:`render`.
+
+        Yields:
+            a list of line strings for each item of `records`, in order.
+        """
+        for elements in records:
+            yield self.render(elements)
@@ -0,0 +1,100 @@
+import collections
+import itertools
+
+from s42.bulk.threads import render_lines
+from s42.datastructures import get_country
+from s42.mapping import get_mapper
+from s42.template import get_template
+
+
+class CountryRouter(object):
+    """Renders a stream of records of mixed countries.
+
+    The stream is consumed in windows of at most `window` records. The
+    records of a window are bucketed by the value of their ``country``
+    member, which may be an ISO 3166 Alpha 2, Alpha 3 or numeric code,
+    and each bucket is mapped and rendered as a whole with the mapper
+    and template of its country, which are resolved once per distinct
+    value. The results of a window are yielded in input order before
+    the next window is read, so memory use does not depend on the
+    length of the stream.
+    """
+
+    def __init__(self, window=1024, render=render_lines, s42_version='6',
+        patdl_version='2.6'):
+        """Initialize a new :class:`CountryRouter` instance.
+
+        Args:
+            window: the maximum number of records buffered at once.
+            render: a callable accepting a template and a dictionary of
+                address elements and returning the result of a record.
+            s42_version: the S42 version of the templates.
+            patdl_version: the PATDL version of the templates.
+        """
+        if window < 1:
+            raise ValueError("The window must hold at least one record.")
+        self.window = window
+        self.render = render
+        self.s42_version = s42_version
+        self.patdl_version = patdl_version
+        self._routes = {}
+
+    def get_route(self, country):
+        """Return the ``(country, mapper, template)`` tuple used for the
+        records whose ``country`` member is `country`.
+
+        Raises:
+            KeyError: `country` is not an ISO 3166 code, or no mnemonic
+                mapping is defined for it.
+            TemplateDoesNotExist: no template exists for `country`.
+        """
+        try:
+            return self._routes[country]
+        except KeyError:
+            pass
+        iso = get_country(country)
+        route = self._routes[country] = (iso, get_mapper(iso.numeric3),
+            get_template(iso.alpha2, self.s42_version, self.patdl_version))
+        return route
+
+    def route(self, records):
+        """Render an iterable of records keyed by mnemonic field names,
+        as :func:`~s42.bulk.records.render_record` does.
+
+        Yields:
+            the result of each record, in input order.
+        """
+        records = iter(records)
+        while True:
+            window = list(itertools.islice(records, self.window))
+            if not window:
+                break
+            for result in self.route_window(window):
+                yield result
+
+    def route_window(self, records):
+        """Render a list of records; see :meth:`route`.
+
+        Returns:
+            list: the result of each record, in input order.
+        """
+        buckets = collections.OrderedDict()
+        for i, record in enumerate(records):
+            country = record.get('country')
+            if country is None:
+                raise TypeError(
+                    "The Data Transfer Object must declare a `country` member.")
+            buckets.setdefault(country, []).append(i)
+
+        results = [None] * len(records)
+        for country, indexes in buckets.items():
+            iso, mapper, template = self.get_route(country)
+            name = str(iso)
+            fields = []
+            for i in indexes:
+                record = dict(records[i])
+                record['country_name'] = name
+                fields.append(record)
+            for i, elements in zip(indexes, mapper.map_many(fields)):
+                results[i] = self.render(template, elements)
+        return results
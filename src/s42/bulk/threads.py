@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def render_lines(template, dto):
+    """Render `dto` with `template` into a list of address lines."""
+    return [str(x) for x in template.render(dto)]
+
+
+class ThreadedRenderer(object):
+    """Renders batches of addresses on a pool of threads.
+
+    :class:`~s42.template.Template` instances are immutable, so a single
+    template is shared by all threads. On interpreters with a global
+    interpreter lock this mostly helps when the caller overlaps
+    rendering with I/O; free-threaded builds render in parallel.
+    """
+
+    def __init__(self, max_workers=None, chunksize=64):
+        """Initialize a new :class:`ThreadedRenderer` instance.
+
+        Args:
+            max_workers: the maximum number of threads.
+            chunksize: the number of addresses rendered by a thread
+                per task.
+        """
+        self.chunksize = chunksize
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def render_many(self, template, dtos):
+        """Render a sequence of :class:`~s42.datastructures.AddressDTO`
+        instances or dictionaries with `template`.
+
+        Returns:
+            list: a list of address lines for each item of `dtos`,
+                in order.
+        """
+        dtos = list(dtos)
+        chunks = [dtos[i:i + self.chunksize]
+            for i in range(0, len(dtos), self.chunksize)]
+        results = []
+        for chunk in self._executor.map(
+                lambda x: [render_lines(template, dto) for dto in x], chunks):
+            results.extend(chunk)
+        return results
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
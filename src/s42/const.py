@@ -4,6 +4,8 @@ from os.path import join
 import collections
 import json
 import re
+import threading
+import xml.etree.ElementTree as ElementTree
 
 SHARE_DIR = '/usr/share/s42'
 
@@ -14,19 +16,110 @@ FIXTURE_DIR = join(SHARE_DIR, 'fixtures')
 TEMPLATE_FILENAME = "S42-{0}-{2}-PATDL.v.{1}.xml"
 
 
-# Parse the S42 conceptual hierarchy by finding all element codes
-# from the hierarchy XML file.
-CODE_PATTERN = '(?:(?P<issuer>[A-Z]))?(?P<code>[0-9]{2})\.(?P<subtype>[0-9]{2})(?:\-(?P<instance>[0-9])\-(?P<part>[0-9]))?'
-HIERARCHY = collections.defaultdict(list)
+CODE_PATTERN = '(?:(?P<issuer>[A-Z]))?(?P<code>[0-9]{2})\\.(?P<subtype>[0-9]{2})(?:\\-(?P<instance>[0-9])\\-(?P<part>[0-9]))?'
+
+
+class HierarchyIndex(object):
+    """An index of the S42 conceptual hierarchy, mapping element codes
+    to their sub-types and sub-type codes to their base element, and
+    assigning a stable integer identifier to each code.
+
+    Identifiers are assigned in document order to the codes declared
+    in the hierarchy, and then to the codes of the templates that are
+    loaded, see :meth:`~s42.datastructures.Code.declare`. Codes that
+    only appear in input are not assigned one.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._codes = []
+        self._subtypes = collections.OrderedDict()
+        self._bases = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def fromfile(cls, filepath):
+        """Build a :class:`HierarchyIndex` from the hierarchy XML file
+        at `filepath`.
+        """
+        code_re = re.compile("^{0}$".format(CODE_PATTERN))
+        index = cls()
+        for element in ElementTree.parse(filepath).getroot().iter():
+            code = (element.text or '').strip()
+            match = code_re.match(code)
+            if match is None:
+                continue
+            issuer, base, subtype, instance, part = match.groups()
+            if instance:
+                index.add_subtype("{0}{1}.{2}".format(issuer, base, subtype),
+                    code)
+            else:
+                index.add_base(code)
+        return index
+
+    def add(self, code):
+        """Return the identifier of `code`, assigning one if it has
+        none.
+        """
+        try:
+            return self._ids[code]
+        except KeyError:
+            pass
+        with self._lock:
+            if code not in self._ids:
+                self._codes.append(code)
+                self._ids[code] = len(self._codes) - 1
+            return self._ids[code]
+
+    def add_base(self, code):
+        self.add(code)
+        self._subtypes.setdefault(code, ())
+
+    def add_subtype(self, base, code):
+        self.add_base(base)
+        self.add(code)
+        self._subtypes[base] += (code,)
+        self._bases[code] = base
+
+    def get_id(self, code):
+        """Return the identifier of `code`, or ``None`` if it has none."""
+        return self._ids.get(code)
 
-doc = open(join(SHARE_DIR, 'hierarchy.xml')).read()
-for issuer, code, subtype, instance, part in re.findall(CODE_PATTERN, doc):
-    base = "{0}{1}.{2}".format(issuer, code, subtype)
-    if not instance:
-        HIERARCHY[base] = []
-        continue
-    assert part
-    HIERARCHY[base].append("{0}-{1}-{2}".format(base, instance, part))
+    def get_code(self, identifier):
+        return self._codes[identifier]
+
+    def get_base(self, code):
+        """Return the base element of a sub-type code, or ``None``."""
+        return self._bases.get(code)
+
+    def get_subtypes(self, code):
+        """Return a tuple holding the sub-types declared for `code`."""
+        return self._subtypes.get(code, ())
+
+    def get_default(self, code):
+        """Return the default sub-type of `code`, i.e. its first declared
+        sub-type, or ``None`` if it has none.
+        """
+        subtypes = self._subtypes.get(code)
+        return subtypes[0] if subtypes else None
+
+    def bases(self):
+        return list(self._subtypes.keys())
+
+    def __contains__(self, code):
+        return code in self._subtypes or code in self._bases
+
+    def __len__(self):
+        return len(self._codes)
+
+
+#: The index of the S42 conceptual hierarchy.
+HIERARCHY_INDEX = HierarchyIndex.fromfile(join(SHARE_DIR, 'hierarchy.xml'))
+
+#: A mapping of element codes to the list of their sub-type codes.
+HIERARCHY = collections.defaultdict(list)
+for base in HIERARCHY_INDEX.bases():
+    HIERARCHY[base] = list(HIERARCHY_INDEX.get_subtypes(base))
 
 
 #: A mapping of mnemmonic field names to S42 elements
@@ -62,13 +155,7 @@ for element in json.load(open(abspath(join(dirname(__file__), 'iso3166.json'))))
     ISO3166_MAP[element.get('numeric3')] = element
 
 
-del re
 del join
-del issuer
-del code
-del subtype
-del instance
-del part
-del doc
+del base
 
 
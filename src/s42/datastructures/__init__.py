@@ -1,4 +1,5 @@
 from s42.datastructures.addressdto import AddressDTO
 from s42.datastructures.code import Code
 from s42.datastructures.country import Country
+from s42.datastructures.country import get_country
 from s42.datastructures.lineidentifier import LineIdentifier
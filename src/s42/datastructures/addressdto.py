@@ -3,21 +3,58 @@ from s42.datastructures.code import Code
 
 class AddressDTO(object):
 
+    @property
+    def mask(self):
+        """Return a bitmask with the bit of the
+        :attr:`~s42.datastructures.Code.id` of each element set. Elements
+        whose code has no identifier are not represented.
+        """
+        return self._mask
+
     @classmethod
     def fromdict(cls, dto):
         return cls(dto)
 
     def __init__(self, elements):
         self._elements = {}
+        self._mask = 0
+        self.reset(elements)
+
+    def reset(self, elements=None):
+        """Remove all elements and load `elements`, if provided, so that
+        the instance can be reused for another address.
+        """
+        self._elements.clear()
+        self._mask = 0
+        if not elements:
+            return
         for code, value in elements.items():
             code = Code.fromstring(code)
             self._elements[code] = value
+            if code.id is not None:
+                self._mask |= 1 << code.id
 
-        self._keys = set(self._elements.keys())
+    def copy(self):
+        """Return a new :class:`AddressDTO` holding the same elements."""
+        return type(self)(self._elements)
+
+    def set(self, code, value):
+        """Set the value of an address element by its code. A value of
+        ``None`` removes the element.
+        """
+        code = Code.fromstring(code)
+        if value is None:
+            self._elements.pop(code, None)
+            if code.id is not None:
+                self._mask &= ~(1 << code.id)
+        else:
+            self._elements[code] = value
+            if code.id is not None:
+                self._mask |= 1 << code.id
 
     def get(self, code):
         """Get the value of an address element by its code."""
-        if isinstance(code, str):
+        if not isinstance(code, Code):
             code = Code.fromstring(code)
         return self._elements.get(code)\
             or self._elements.get(code.base)
@@ -26,6 +63,9 @@ class AddressDTO(object):
         """Return a boolean indicating if the specified element has a
         value.
         """
-        if isinstance(code, str):
+        if not isinstance(code, Code):
             code = Code.fromstring(code)
-        return bool(set([code, code.base]) & self._keys)
+        if self._mask & code.mask:
+            return True
+        # Codes without an identifier are not represented in the mask.
+        return code.id is None and code in self._elements
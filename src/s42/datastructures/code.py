@@ -1,18 +1,41 @@
 import re
 
 from s42.const import CODE_PATTERN
-from s42.const import HIERARCHY
+from s42.const import HIERARCHY_INDEX
 
 CODE_RE = re.compile("^{0}$".format(CODE_PATTERN))
 
 
 class Code(object):
-    """Represents a S42 element identifier."""
+    """Represents a S42 element identifier.
+
+    Instances are immutable. The codes of the S42 hierarchy and of the
+    loaded templates, see :meth:`declare`, have an identifier and are
+    interned by :meth:`fromstring`, so their strings are parsed once per
+    process. Other codes, e.g. those that only appear in input, have no
+    identifier and are parsed on every call, so that input cannot grow
+    the cache.
+    """
+    _instances = {}
 
     @property
     def base(self):
         return type(self).fromstring(self._base)
 
+    @property
+    def id(self):
+        """Return the integer identifier of the code in the
+        :data:`~s42.const.HIERARCHY_INDEX`, or ``None`` if it has none.
+        """
+        return self._id
+
+    @property
+    def mask(self):
+        """Return a bitmask with the bits of the code and of its base
+        element set, for those that have an identifier.
+        """
+        return self._mask
+
     @property
     def default(self):
         return self._default
@@ -29,11 +52,43 @@ class Code(object):
         # using an element directly in a template, the format xx.yy and
         # the format xx.yy-z-z with each z taking the value of zero are 
         # considered equivalent (NEN 2011:31).
+        if isinstance(code, cls):
+            if code._id is not None:
+                return code
+            # The code may have been declared since it was parsed.
+            code = code._str
+        try:
+            return cls._instances[code]
+        except (KeyError, TypeError):
+            pass
         try:
             kwargs = CODE_RE.match(code).groupdict()
-        except AttributeError:
-            raise ValueError("Invalid code: " + code)
-        return cls(**kwargs)
+        except (AttributeError, TypeError):
+            raise ValueError("Invalid code: " + str(code))
+        instance = cls(**kwargs)
+        if instance._id is None:
+            return instance
+        instance = cls._instances.setdefault(str(instance), instance)
+        cls._instances[code] = instance
+        return instance
+
+    @classmethod
+    def declare(cls, code):
+        """Return the :class:`Code` instance for `code`, assigning an
+        identifier to it and to its base element in the
+        :data:`~s42.const.HIERARCHY_INDEX` if they have none. Used for
+        the codes referenced by templates.
+
+        An :class:`~s42.datastructures.AddressDTO` holding the code that
+        was built before the code was declared does not set its bit in
+        :attr:`~s42.datastructures.AddressDTO.mask`.
+        """
+        instance = cls.fromstring(code)
+        if instance._id is None:
+            HIERARCHY_INDEX.add(instance._base)
+            HIERARCHY_INDEX.add(instance._str)
+            instance = cls.fromstring(instance._str)
+        return instance
 
     def __init__(self, code, subtype, instance=None, part=None, issuer=None):
         self._code = code
@@ -42,23 +97,38 @@ class Code(object):
         self._part = part or None
         self._issuer = issuer or 'U'
         self._default = self
-        self._base = "{0}{1}.{2}".format(issuer, code, subtype)
-        if HIERARCHY.get(self._base) and not bool(instance):
-            self._default = type(self).fromstring(HIERARCHY[self._base][0])
+        self._base = "{0}{1}.{2}".format(self._issuer, code, subtype)
+        self._str = str(self)
+        self._hash = hash(tuple(self._str))
+        self._id = HIERARCHY_INDEX.get_id(self._str)
+        self._mask = 0
+        for identifier in (self._id, HIERARCHY_INDEX.get_id(self._base)):
+            if identifier is not None:
+                self._mask |= 1 << identifier
+        default = HIERARCHY_INDEX.get_default(self._base)
+        if default is not None and not bool(instance):
+            self._default = type(self).fromstring(default)
 
     def is_base(self):
         return self._instance is None
 
     def __hash__(self):
-        return hash(tuple(self))
+        return self._hash
 
     def __eq__(self, other):
         return hash(self) == hash(other)
 
+    def __ne__(self, other):
+        return not self == other
+
     def __iter__(self):
         return iter(str(self))
 
     def __str__(self):
+        try:
+            return self._str
+        except AttributeError:
+            pass
         element = "{0}{1}.{2}".format(
             self._issuer, self._code, self._subtype)
         if self._instance is not None:
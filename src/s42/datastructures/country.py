@@ -41,3 +41,26 @@ except ImportError:
                 repr(self._alpha3),
                 repr(self._numeric3)
             )
+
+
+_countries = {}
+
+
+def get_country(code):
+    """Return the :class:`Country` identified by an ISO 3166 alpha2,
+    alpha3 or numeric3 code.
+
+    Instances are interned, whichever implementation of :class:`Country`
+    is in use, so that every record referring to the same country shares
+    a single object.
+    """
+    if isinstance(code, Country):
+        return code
+    try:
+        return _countries[code]
+    except KeyError:
+        pass
+    country = Country.fromcode(code)
+    country = _countries.setdefault(country.numeric3, country)
+    _countries[code] = country
+    return country
@@ -2,6 +2,14 @@
 
 class LineIdentifier(object):
 
+    @property
+    def numeric(self):
+        return self._numeric
+
+    @property
+    def symbolic(self):
+        return self._symbolic
+
     @classmethod
     def fromxml(cls, element):
         assert element.tag == 'lineName'
@@ -11,6 +19,18 @@ class LineIdentifier(object):
         self._numeric = numeric
         self._symbolic = symbolic
 
+    def matches(self, name):
+        """Return a boolean indicating if `name` refers to this line,
+        either by its numeric name (e.g. ``'009'`` or ``9``) or by its
+        symbolic name.
+        """
+        if isinstance(name, LineIdentifier):
+            return name == self
+        if isinstance(name, int):
+            return self._numeric is not None and self._numeric.isdigit()\
+                and int(self._numeric) == name
+        return name in (self._numeric, self._symbolic)
+
     def __iter__(self):
         return iter([self._numeric, self._symbolic])
 
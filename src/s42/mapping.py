@@ -0,0 +1,108 @@
+from s42.const import ADDRESS_MAP
+
+
+class MnemonicMapper(object):
+    """Converts records keyed by mnemonic field names (e.g. ``postcode``)
+    into dictionaries keyed by S42 element codes for a single country.
+
+    The field table from :data:`~s42.const.ADDRESS_MAP` is compiled
+    once into a tuple of ``(name, code)`` pairs, so converting a record
+    is a single pass over the known fields instead of a lookup per key
+    in the record.
+    """
+
+    @property
+    def country(self):
+        return self._country
+
+    @property
+    def fields(self):
+        return tuple(name for name, code in self._fields)
+
+    def __init__(self, country, mapping):
+        """Initialize a new :class:`MnemonicMapper` instance.
+
+        Args:
+            country: the ISO 3166 numeric code of the country.
+            mapping: a dictionary mapping mnemonic field names to
+                S42 element codes.
+        """
+        self._country = country
+        self._fields = tuple(mapping.items())
+        self._mapping = dict(mapping)
+
+    def map(self, record, pop=False):
+        """Return a dictionary holding the values of the known fields
+        in `record`, keyed by their S42 element code.
+
+        Args:
+            record: a dictionary keyed by mnemonic field names.
+            pop: a boolean indicating if the mapped fields are removed
+                from `record`.
+
+        Returns:
+            dict
+        """
+        elements = {code: record[name] for name, code in self._fields
+            if name in record}
+        if pop:
+            for name, code in self._fields:
+                record.pop(name, None)
+        return elements
+
+    def map_many(self, records, pop=False):
+        """Map an iterable of records; see :meth:`map`.
+
+        Returns:
+            list
+        """
+        fields = self._fields
+        if pop:
+            return [self.map(x, pop=True) for x in records]
+        return [{code: x[name] for name, code in fields if name in x}
+            for x in records]
+
+    def compile_schema(self, columns):
+        """Return a tuple of ``(index, code)`` pairs for the columns of
+        a tuple row that hold a known field. Unknown columns are
+        ignored.
+
+        Args:
+            columns: a sequence of mnemonic field names declaring the
+                order of the values in a row.
+        """
+        return tuple((i, self._mapping[name]) for i, name in enumerate(columns)
+            if name in self._mapping)
+
+    def map_rows(self, rows, columns):
+        """Map an iterable of tuple rows laid out as declared by
+        `columns` into dictionaries keyed by S42 element code. Columns
+        holding ``None`` are considered absent.
+
+        Returns:
+            list
+        """
+        schema = self.compile_schema(columns)
+        return [{code: row[i] for i, code in schema if row[i] is not None}
+            for row in rows]
+
+    def __repr__(self):
+        return "<MnemonicMapper: {0}>".format(self._country)
+
+
+_mappers = {}
+
+
+def get_mapper(country):
+    """Return the compiled :class:`MnemonicMapper` for the country
+    identified by its ISO 3166 numeric code.
+
+    Raises:
+        KeyError: no mnemonic mapping is defined for `country`.
+    """
+    try:
+        return _mappers[country]
+    except KeyError:
+        pass
+    mapper = _mappers[country] = MnemonicMapper(country, ADDRESS_MAP[country])
+    return mapper
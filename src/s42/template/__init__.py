@@ -1,21 +1,147 @@
+from os.path import basename
+from os.path import exists
 from os.path import join
+import functools
+import gc
+import glob
+import json
 
+from s42.const import FIXTURE_DIR
 from s42.const import TEMPLATE_DIR
 from s42.const import TEMPLATE_FILENAME
+from s42.template.adaptive import load_profile
 from s42.template.base import Template
+from s42.template.cache import TemplateCache
+from s42.template.compiled import CompiledTemplate
+from s42.template.reload import TemplateReloader
+from s42.template.shared import SharedTemplateStore
 
 
 __all__ = [
+    'CompiledTemplate',
+    'SharedTemplateStore',
     'Template',
-    'get_template'
+    'TemplateReloader',
+    'get_template',
+    'preload'
 ]
 
 
-def get_template(country_code, s42_version='6', patdl_version='2.6'):
+#: The process-wide cache of parsed templates, keyed by filepath.
+TEMPLATES = TemplateCache(Template.fromfilepath)
+
+#: The process-wide cache of optimized templates, keyed by filepath.
+OPTIMIZED_TEMPLATES = TemplateCache(
+    functools.partial(Template.fromfilepath, optimize=True))
+
+
+def _load_profiled(key):
+    src, profile = key
+    tpl = OPTIMIZED_TEMPLATES.get(src)
+    return load_profile(tpl, profile) or tpl
+
+
+#: The process-wide cache of optimized templates with their conditions
+#: reordered by a profile, keyed by filepath and profile path.
+PROFILED_TEMPLATES = TemplateCache(_load_profiled)
+
+
+def get_template_path(country_code, s42_version='6', patdl_version='2.6'):
+    """Return the filepath of the PATDL template for the given
+    ISO 3166 Alpha 2 country code, S42 version and PATDL version.
+    """
+    src = TEMPLATE_FILENAME.format(
+        s42_version, patdl_version, country_code)
+    return join(TEMPLATE_DIR, src)
+
+
+def get_template(country_code, s42_version='6', patdl_version='2.6',
+    optimize=False, profile=None):
     """Return a :class:`~s42.template.base.Template` instance
     by providing an ISO 3166 Alpha 2 country code, the S42
     version and the PATDL version.
+
+    Templates are parsed once per process and cached. If `optimize` is
+    true, the template is loaded with its selectors optimized, see
+    :mod:`s42.template.optimizer`. If `profile` is the path of a file
+    written by :meth:`~s42.template.adaptive.TriggerProfiler.save`, the
+    optimized template is returned with its conditions reordered as
+    profiled, see :func:`~s42.template.adaptive.load_profile`; the
+    template cached without the profile is not modified.
     """
-    src = TEMPLATE_FILENAME.format(
-        s42_version, patdl_version, country_code)
-    return Template.fromfilepath(join(TEMPLATE_DIR, src))
+    src = get_template_path(country_code, s42_version, patdl_version)
+    if profile is not None:
+        if not optimize:
+            raise ValueError(
+                "Adaptive ordering requires an optimized template.")
+        tpl = PROFILED_TEMPLATES.get((src, profile))
+        if tpl.digest != OPTIMIZED_TEMPLATES.get(src).digest:
+            # The optimized template was replaced, e.g. by a
+            # TemplateReloader, since the reordered copy was made.
+            tpl = PROFILED_TEMPLATES.load((src, profile))
+            PROFILED_TEMPLATES.set((src, profile), tpl)
+        return tpl
+    cache = OPTIMIZED_TEMPLATES if optimize else TEMPLATES
+    return cache.get(src)
+
+
+def get_available_countries(s42_version='6', patdl_version='2.6'):
+    """Return a sorted list of the ISO 3166 Alpha 2 country codes for
+    which a template exists in :data:`~s42.const.TEMPLATE_DIR`.
+    """
+    prefix, suffix = TEMPLATE_FILENAME.format(
+        s42_version, patdl_version, '\0').split('\0')
+    countries = []
+    for src in glob.glob(join(TEMPLATE_DIR, prefix + '*' + suffix)):
+        countries.append(basename(src)[len(prefix):-len(suffix)])
+    return sorted(countries)
+
+
+def preload(countries=None, s42_version='6', patdl_version='2.6',
+    warmup=True, freeze=True, optimize=False, profile=None):
+    """Load templates into the process-wide cache ahead of the first
+    request, e.g. in the master process of a pre-fork server.
+
+    Args:
+        countries: an iterable of ISO 3166 Alpha 2 country codes. If
+            omitted, all templates in :data:`~s42.const.TEMPLATE_DIR`
+            are loaded.
+        warmup: a boolean indicating if the test fixtures of each
+            country, if any, are rendered once after loading.
+        freeze: a boolean indicating if all objects tracked by the
+            garbage collector are moved to the permanent generation
+            with :func:`gc.freeze`, so that forked children do not
+            touch their pages during collections. Ignored on Python
+            versions that do not provide :func:`gc.freeze`.
+        optimize: see :func:`get_template`.
+        profile: see :func:`get_template`; requires `optimize`.
+
+    Returns:
+        dict: a mapping of country codes to
+            :class:`~s42.template.base.Template` instances.
+    """
+    if countries is None:
+        countries = get_available_countries(s42_version, patdl_version)
+
+    templates = {}
+    for country_code in countries:
+        tpl = templates[country_code] = get_template(
+            country_code, s42_version, patdl_version, optimize, profile)
+        if warmup:
+            _warmup(tpl, country_code)
+
+    if freeze and hasattr(gc, 'freeze'):
+        gc.collect()
+        gc.freeze()
+    return templates
+
+
+def _warmup(tpl, country_code):
+    src = join(FIXTURE_DIR, country_code + '.json')
+    if not exists(src):
+        return
+    with open(src) as f:
+        fixtures = json.load(f)
+    for fixture in fixtures:
+        for line in tpl.render(fixture['data']):
+            str(line)
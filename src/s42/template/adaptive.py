@@ -0,0 +1,202 @@
+"""Orders the conditions of the triggers of an optimized template by
+the failure rates and costs observed on sample addresses.
+
+The conditions of a trigger of an optimized template are evaluated
+until one fails, so the order that rejects the addresses of a given
+data set at the lowest cost is the one that evaluates first the
+conditions with the lowest ratio of cost to failure rate. The order
+does not change the lines that are selected; ``hasResult`` conditions
+are kept last because their procedures may raise.
+"""
+import json
+import os
+import timeit
+
+from s42.datastructures import AddressDTO
+from s42.template.trigger import CONDITION_TAGS
+
+
+def get_tag(condition):
+    return CONDITION_TAGS[type(condition)]
+
+
+class TriggerProfiler(object):
+    """Records how often each condition of the triggers of a template
+    fails, and how long it takes to evaluate, over a window of sample
+    addresses, and then renders with a copy of the template in which
+    the conditions are reordered accordingly.
+    """
+
+    def __init__(self, template, window=1000):
+        """Initialize a new :class:`TriggerProfiler` instance.
+
+        Args:
+            template: a :class:`~s42.template.base.Template` instance
+                loaded with ``optimize=True``.
+            window: the number of addresses observed by :meth:`render`
+                before the conditions are reordered.
+
+        Raises:
+            ValueError: the template is not optimized.
+        """
+        if template.optimization is None:
+            raise ValueError(
+                "Adaptive ordering requires an optimized template.")
+        self.template = template
+        self.window = window
+        self.count = 0
+        self.applied = False
+        self._stats = {}
+
+    def observe(self, dto):
+        """Evaluate every condition of every trigger holding more than
+        one condition against `dto`, recording its outcome and cost.
+        """
+        if isinstance(dto, dict):
+            dto = AddressDTO.fromdict(dto)
+        timer = timeit.default_timer
+        for i, selector in enumerate(self.template.selectors):
+            for j, trigger in enumerate(selector.groups):
+                if len(trigger.conditions) < 2:
+                    continue
+                stats = self._stats.setdefault((i, j), {})
+                for condition in trigger.conditions:
+                    start = timer()
+                    try:
+                        satisfied = condition.is_satisfied(dto)
+                    except Exception:
+                        satisfied = False
+                    elapsed = timer() - start
+                    counters = stats.setdefault(get_tag(condition),
+                        [0, 0, 0.0])
+                    counters[0] += 1
+                    counters[1] += not satisfied
+                    counters[2] += elapsed
+        self.count += 1
+
+    def render(self, dto):
+        """Render `dto` with the template, observing it first while the
+        window is not full. The reordered copy of the template is used
+        once the window is full.
+        """
+        if isinstance(dto, dict):
+            dto = AddressDTO.fromdict(dto)
+        if not self.applied:
+            self.observe(dto)
+            if self.count >= self.window:
+                self.apply()
+        return self.template.render(dto)
+
+    def get_orders(self):
+        """Return a dictionary mapping the ``(selector, group)`` index
+        of each profiled trigger to the list of the tags of its
+        conditions in the order in which they should be evaluated.
+        """
+        orders = {}
+        for key, stats in self._stats.items():
+            orders[key] = sorted(stats, key=lambda x: get_rank(x, *stats[x]))
+        return orders
+
+    def apply(self):
+        """Replace :attr:`template` by a copy in which the conditions
+        are reordered as profiled so far. The template passed to the
+        profiler, which may be shared through a cache, is not modified.
+        """
+        self.template = apply_orders(self.template, self.get_orders())
+        self.applied = True
+
+    def as_dict(self):
+        """Return the profile as a JSON-encodable dictionary."""
+        orders = self.get_orders()
+        return {
+            'country': self.template.country,
+            'digest': self.template.digest,
+            'samples': self.count,
+            'triggers': [{
+                'selector': i,
+                'group': j,
+                'order': orders[(i, j)],
+                'stats': dict((tag, {
+                    'evaluations': evaluations,
+                    'failures': failures,
+                    'seconds': seconds
+                }) for tag, (evaluations, failures, seconds) in stats.items())
+            } for (i, j), stats in sorted(self._stats.items())]
+        }
+
+    def save(self, filepath):
+        """Store the profile in the JSON file at `filepath`, keyed by
+        the digest of the template. The profiles of other templates
+        that the file holds are kept.
+        """
+        profiles = read_profiles(filepath)
+        profiles[self.template.digest] = self.as_dict()
+        tmp = filepath + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(profiles, f, indent=2, sort_keys=True)
+        os.rename(tmp, filepath)
+
+
+def get_rank(tag, evaluations, failures, seconds):
+    # The expected cost of rejecting an address is lowest when the
+    # conditions are sorted by cost divided by failure rate; conditions
+    # that never failed go last.
+    if not failures:
+        ratio = float('inf')
+    else:
+        ratio = seconds / failures
+    return (tag == 'hasResult', ratio)
+
+
+def apply_orders(template, orders):
+    """Return a copy of `template` in which the conditions of the
+    triggers are reordered as returned by
+    :meth:`TriggerProfiler.get_orders`. Orders that do not match the
+    conditions of their trigger are ignored. `template` itself is not
+    modified.
+
+    Returns:
+        :class:`~s42.template.base.Template`
+    """
+    selectors = []
+    for i, selector in enumerate(template.selectors):
+        groups = []
+        for j, trigger in enumerate(selector.groups):
+            order = orders.get((i, j))
+            conditions = dict((get_tag(x), x) for x in trigger.conditions)
+            if order is not None and sorted(order) == sorted(conditions):
+                trigger = trigger.reordered([conditions[x] for x in order])
+            groups.append(trigger)
+        selectors.append(type(selector)(template, groups))
+    return template.with_selectors(selectors)
+
+
+def read_profiles(filepath):
+    """Return the dictionary of profiles held by the JSON file at
+    `filepath`, keyed by template digest, or an empty dictionary if it
+    does not exist.
+    """
+    if not os.path.exists(filepath):
+        return {}
+    with open(filepath) as f:
+        return json.load(f)
+
+
+def load_profile(template, filepath):
+    """Return a copy of the optimized `template` in which the conditions
+    are reordered as recorded in the profile file at `filepath`.
+    `template` itself is not modified.
+
+    Returns:
+        :class:`~s42.template.base.Template`: the reordered copy, or
+            ``None`` if the file holds no profile for the template,
+            e.g. because the template changed since it was profiled.
+    """
+    if template.optimization is None:
+        raise ValueError(
+            "Adaptive ordering requires an optimized template.")
+    profile = read_profiles(filepath).get(template.digest)
+    if profile is None:
+        return None
+    return apply_orders(template, dict(((x['selector'], x['group']),
+        x['order']) for x in profile['triggers']))
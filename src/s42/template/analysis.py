@@ -0,0 +1,151 @@
+"""Static cost analysis of PATDL templates.
+
+The figures are upper bounds derived from the structure of a template:
+every trigger group is assumed to fire and every element to be
+populated, which is the most expensive address a template can render.
+"""
+from os.path import basename
+from os.path import join
+import collections
+import glob
+
+from s42.benchmark import time_template_load
+from s42.const import TEMPLATE_DIR
+from s42.template.base import Template
+from s42.template.optimizer import optimize_selectors
+from s42.template.trigger import CONDITION_TAGS
+from s42.template.trigger import DefaultCase
+from s42.template.trigger import HasResult
+from s42.template.trigger import IsNotPopulated
+from s42.template.trigger import IsPopulated
+
+
+def count_condition_checks(condition):
+    """Return the maximum number of elements whose population is tested
+    when `condition` is evaluated.
+    """
+    if isinstance(condition, (IsPopulated, IsNotPopulated)):
+        return sum(len(codeset) for arg in condition.args for codeset in arg)
+    return 0
+
+
+def count_line_checks(line):
+    """Return the maximum number of elements whose population is tested
+    when `line` is rendered.
+    """
+    return sum(len(c.required_elements) + len(c.elements)
+        for c in line.components)
+
+
+def count_line_nodes(line):
+    """Return the maximum number of nodes created when `line` is
+    rendered: the line, its components, and an element, a value and a
+    separator node per element.
+    """
+    return 1 + sum(1 + 3 * len(c.elements) for c in line.components)
+
+
+def analyze_template(template):
+    """Return a JSON-encodable dictionary describing the structure and
+    the worst-case cost of rendering an address with `template`.
+    """
+    conditions = collections.Counter()
+    hot_spots = []
+    undefined = set()
+    groups = 0
+    selection_checks = 0
+    line_checks = 0
+    nodes = 1
+    procedures = Template.get_procedures(template.country)
+
+    for i, selector in enumerate(template.selectors):
+        for j, trigger in enumerate(selector.groups):
+            groups += 1
+            for condition in trigger.conditions:
+                conditions[CONDITION_TAGS[type(condition)]] += 1
+                selection_checks += count_condition_checks(condition)
+                if isinstance(condition, HasResult):
+                    hot_spots.extend(get_procedure_hot_spots(template,
+                        procedures, i, j, trigger, condition))
+            for identifier in trigger.lines:
+                try:
+                    line = template.get_line(identifier)
+                except KeyError:
+                    undefined.add(identifier)
+                    continue
+                line_checks += count_line_checks(line)
+                nodes += count_line_nodes(line)
+
+    for identifier in sorted(undefined, key=tuple):
+        hot_spots.append({
+            'type': 'undefined-line',
+            'line': list(identifier),
+            'detail': "The line is selected but not defined; rendering "
+                "it raises KeyError."
+        })
+
+    lines = template.lines
+    report = optimize_selectors(template, template.selectors)[1]
+    return {
+        'country': template.country,
+        'digest': template.digest,
+        'selectors': len(template.selectors),
+        'groups': groups,
+        'conditions': dict(conditions),
+        'lines': len(lines),
+        'components': sum(len(x.components) for x in lines),
+        'elements': sum(len(c.elements) for x in lines for c in x.components),
+        'worst_case': {
+            'is_populated': selection_checks + line_checks,
+            'selection_checks': selection_checks,
+            'line_checks': line_checks,
+            'nodes': nodes
+        },
+        'optimization': report.as_dict(),
+        'hot_spots': hot_spots
+    }
+
+
+def get_procedure_hot_spots(template, procedures, selector, group, trigger,
+    condition):
+    # Procedures run arbitrary code; unoptimized triggers evaluate every
+    # condition, so a procedure runs on every render unless the trigger
+    # is optimized and a cheaper condition can fail first.
+    guarded = any(not isinstance(x, (HasResult, DefaultCase))
+        for x in trigger.conditions)
+    hot_spots = []
+    for func, retval in condition.args:
+        arguments = template.get_procedure_arguments(func)
+        hot_spots.append({
+            'type': 'procedure',
+            'selector': selector,
+            'group': group,
+            'procedure': func,
+            'registered': func in procedures,
+            'arguments': [str(x) for x in arguments]
+                if arguments is not None else None,
+            'guarded': guarded,
+            'detail': "Invoked on every render." if not guarded else
+                "Invoked on every render unless optimized."
+        })
+    return hot_spots
+
+
+def analyze_file(src, repeat=5):
+    """Analyze the template file at `src`; see :func:`analyze_template`.
+    The result also holds the fastest parse time in seconds, as measured
+    by :func:`~s42.benchmark.time_template_load`.
+    """
+    result = analyze_template(Template.fromfilepath(src))
+    result['parse_time'] = time_template_load(src, repeat)['min']
+    return result
+
+
+def analyze_directory(directory=TEMPLATE_DIR, repeat=5):
+    """Analyze every template file in `directory`.
+
+    Returns:
+        dict: a mapping of filenames to the result of :func:`analyze_file`.
+    """
+    return dict((basename(src), analyze_file(src, repeat))
+        for src in sorted(glob.glob(join(directory, '*.xml'))))
@@ -1,15 +1,30 @@
 import collections
+import copy
+import hashlib
 
 import lxml.etree as xml
 
+from s42.const import ADDRESS_MAP
 from s42.datastructures import Code
 from s42.datastructures import AddressDTO
+from s42.datastructures import get_country
+from s42.template.dependencies import DependencyIndex
+from s42.template.optimizer import optimize_selectors
 from s42.template.rendition import AddressRendition
 from s42.template.trigger import selector_factory
 from s42.template.exc import TemplateDoesNotExist
 from s42.template.lines import line_factory
 
 
+#: Maps the tags of the default tokens to the :class:`Template`
+#: attributes holding them.
+DEFAULT_TOKENS = {
+    'defaultDelimiter': 'delimiter',
+    'defaultSeparator': 'separator',
+    'defaultSequencer': 'sequencer',
+    'defaultCollector': 'collector'
+}
+
 class Template(object):
     """Represents a S42 PATDL template."""
     __preprocessors = collections.defaultdict(
@@ -20,14 +35,37 @@ class Template(object):
     def selectors(self):
         return tuple(self.__selectors)
 
+    @property
+    def lines(self):
+        """Return a tuple holding the :class:`~s42.template.lines.Line`
+        instances defined by the template.
+        """
+        return tuple(self.__lines.values())
+
+    @property
+    def dependencies(self):
+        """Return the :class:`~s42.template.dependencies.DependencyIndex`
+        of the template, building it on first use.
+        """
+        try:
+            return self.__dependencies
+        except AttributeError:
+            pass
+        # The index is derived from immutable state only, so building
+        # it concurrently from several threads is harmless.
+        index = DependencyIndex(self)
+        object.__setattr__(self, '_Template__dependencies', index)
+        return index
+
     @classmethod
-    def fromfilepath(cls, src):
+    def fromfilepath(cls, src, optimize=False):
         """Instantiate a new :class:`Template` instance using a
         filepath.
 
         Args:
             str: a string holding the filepath to an XML file holding a
                 PATDL template.
+            optimize: see :meth:`__init__`.
 
         Returns:
             :class:`Template`
@@ -37,67 +75,275 @@ class Template(object):
                 doc = f.read()
         except IOError:
             raise TemplateDoesNotExist([src])
-        return cls(doc)
+        return cls(doc, optimize=optimize)
 
-    def __init__(self, doc):
+    def __init__(self, doc, optimize=False):
         """Instantiate a new :class:`Template` instance.
 
+        A :class:`Template` is immutable once constructed and may be
+        shared between threads. The preprocessors and procedures that
+        are registered for its country at construction time are copied
+        into the instance; later registrations only apply to templates
+        that are constructed afterwards.
+
         Args:
             doc: a string holding the XML template definition.
+            optimize: a boolean indicating if the selectors are rewritten
+                by :func:`~s42.template.optimizer.optimize_selectors`.
+                The report of the changes is held by the
+                :attr:`optimization` attribute.
         """
         self.__selectors = []
         self.__lines = collections.OrderedDict()
-
+        self.__arguments = {}
+        self.country = None
+        self.digest = hashlib.sha1(
+            doc if isinstance(doc, bytes) else doc.encode('utf-8')).hexdigest()
+
+        # The PATDL schema places the default tokens, the template
+        # identifier, the trigger conditions and the line data at the
+        # second level of the document, so a single walk over those
+        # elements replaces a descendant scan for each of them. Selectors
+        # and lines are parsed after the walk because their arguments
+        # are split using the default tokens.
+        selects = []
+        lines = []
         root = xml.fromstring(doc)
-        self.delimiter = root.xpath('//defaultDelimiter')[0].text.strip("'")
-        self.separator = root.xpath('//defaultSeparator')[0].text.strip("'")
-        self.sequencer = root.xpath('//defaultSequencer')[0].text.strip("'")
-        self.collector = root.xpath('//defaultCollector')[0].text.strip("'")
-
-        self._parse_selectors(root)
-        self._parse_lines(root)
-
-        for child in root.xpath('contentDefinition/templateIdentifier/*'):
-            tag = child.tag
-            value = child.text
-            if tag == 'countryCode':
-                self.country = value
+        for section in root:
+            for child in section:
+                tag = child.tag
+                if tag in DEFAULT_TOKENS:
+                    setattr(self, DEFAULT_TOKENS[tag], child.text.strip("'"))
+                elif tag == 'triggerConditions':
+                    selects.extend(child)
+                elif tag == 'lineData':
+                    lines.append(child)
+                elif tag == 'templateIdentifier':
+                    self._parse_identifier(child)
+                elif tag == 'externalEntityData':
+                    self._parse_external_entity(child)
+
+        self._parse_selectors(selects)
+        self._parse_lines(lines)
+
+        self.__selectors = tuple(self.__selectors)
+        self.optimization = None
+        if optimize:
+            self.__selectors, self.optimization = optimize_selectors(
+                self, self.__selectors)
+        self.__local_preprocessors = dict(
+            (code, tuple(funcs)) for code, funcs
+            in self.__preprocessors.get(self.country, {}).items())
+        self.__local_procedures = dict(
+            self.__procedures.get(self.country, {}))
+        self.__frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, '_Template__frozen', False):
+            raise AttributeError("Template instances are immutable.")
+        object.__setattr__(self, name, value)
+
+    def with_selectors(self, selectors):
+        """Return a copy of the template holding `selectors` instead of
+        its own line selectors, e.g. with their trigger conditions
+        evaluated in a different order. The template itself is not
+        modified, so instances held by a cache remain safe to share.
+        """
+        clone = copy.copy(self)
+        object.__setattr__(clone, '_Template__selectors', tuple(selectors))
+        clone.__dict__.pop('_Template__dependencies', None)
+        return clone
 
-    def get_selected_lines(self, dto):
-        """Return a list of :class:`~s42.template.LineIdentifier` instances
+    def get_selected_lines(self, dto, selection=None):
+        """Return a list of :class:`~s42.template.lines.Line` instances
         representing the lines of the address rendition that will be selected.
         
         Args:
             dto: a :class:`~s42.datastructures.AddressDTO` instance.
+            selection: a set of :class:`~s42.datastructures.LineIdentifier`
+                instances, as returned by :meth:`resolve_lines`. If
+                provided, only these lines are considered.
 
         Returns:
             list
         """
-        lines = []
+        return list(self.iter_selected_lines(dto, selection))
+
+    def iter_selected_lines(self, dto, selection=None):
+        """Like :meth:`get_selected_lines`, but evaluate the selectors
+        one at a time as the lines are consumed.
+        """
         for selector in self.selectors:
-            candidates = selector.get_lines(dto)
+            if selection is not None\
+            and selection.isdisjoint(selector.get_identifiers()):
+                continue
+            candidates = selector.get_lines(dto, selection)
             if not candidates:
                 continue
-            lines.extend([self._get_line(x) for x in candidates])
-        return lines
+            for x in candidates:
+                yield self._get_line(x)
+
+    def resolve_lines(self, names):
+        """Return a frozenset holding the identifiers of the lines that
+        `names` refer to, by numeric name (e.g. ``'009'`` or ``9``),
+        symbolic name or :class:`~s42.datastructures.LineIdentifier`.
+        A numeric name refers to all alternative lines with that number.
 
-    def render(self, dto, abstract=False):
+        Raises:
+            LookupError: a name does not refer to any line.
+        """
+        identifiers = set(x for selector in self.selectors
+            for x in selector.get_identifiers())
+        identifiers.update(self.__lines.keys())
+        selection = set()
+        for name in names:
+            matches = [x for x in identifiers if x.matches(name)]
+            if not matches:
+                raise LookupError("Unknown line: " + repr(name))
+            selection.update(matches)
+        return frozenset(selection)
+
+    def validate(self, dto):
+        """Check that `dto` populates the required elements of the lines
+        that it selects, without rendering it.
+
+        Args:
+            dto: a :class:`~s42.datastructures.AddressDTO` instance or
+                a dictionary.
+
+        Returns:
+            list: a list of ``(identifier, codes)`` tuples holding the
+                :class:`~s42.datastructures.LineIdentifier` of each
+                incomplete line and the list of codes that are missing.
+                The list is empty if the address is complete.
+        """
+        if isinstance(dto, dict):
+            dto = AddressDTO.fromdict(dto)
+        errors = []
+        for line in self.get_selected_lines(dto):
+            missing = line.get_missing_codes(dto)
+            if missing:
+                errors.append((line.identifier, missing))
+        return errors
+
+    def validate_many(self, dtos):
+        """Validate an iterable of address elements; see :meth:`validate`.
+
+        Returns:
+            list: the result of :meth:`validate` for each item of `dtos`,
+                in order.
+        """
+        return [self.validate(x) for x in dtos]
+
+    def render(self, dto, abstract=False, lines=None):
         """Render an :class:`~s42.datastructures.AddressDTO` into a
         :class:`~s42.template.RenderedAddress` instance.
+
+        Args:
+            dto: a :class:`~s42.datastructures.AddressDTO` instance or
+                a dictionary.
+            abstract: see :class:`~s42.template.rendition.AddressRendition`.
+            lines: an iterable of line names, see :meth:`resolve_lines`.
+                If provided, only the triggers that can select these
+                lines are evaluated and only these lines are rendered.
         """
         if isinstance(dto, dict):
             dto = AddressDTO.fromdict(dto)
-        return AddressRendition(self, dto, abstract=abstract)
+        selection = self.resolve_lines(lines) if lines is not None else None
+        return AddressRendition(self, dto, abstract=abstract,
+            selection=selection)
 
-    def _parse_selectors(self, root):
-        for el in root.xpath('//triggerConditions/lineSelect'):
-            self.__selectors.append(selector_factory(self, el))
+    def _parse_identifier(self, element):
+        for child in element:
+            tag = child.tag
+            value = child.text
+            if tag == 'countryCode':
+                self.country = value
+
+    def _parse_external_entity(self, element):
+        # Procedures declare their parameters as a sequence of
+        # parameterName and dataMode elements; the input parameters
+        # that are element codes are the elements the procedure reads.
+        name = None
+        params = []
+        for child in element:
+            if child.tag == 'entityId':
+                name = child.text
+            elif child.tag == 'entityArguments':
+                params = [x.text for x in child]
+        if name is None:
+            return
+        codes = []
+        for param, mode in zip(params[::2], params[1::2]):
+            if mode not in ('IN', 'INOUT'):
+                continue
+            try:
+                codes.append(Code.declare(param))
+            except ValueError:
+                continue
+        self.__arguments[name] = tuple(codes)
 
-    def _parse_lines(self, root):
-        for el in root.xpath('//lineData'):
+    def _parse_selectors(self, elements):
+        for el in elements:
+            if el.tag == 'lineSelect':
+                self.__selectors.append(selector_factory(self, el))
+
+    def _parse_lines(self, elements):
+        for el in elements:
             line = line_factory(el)
             self.__lines[line.identifier] = line
 
+    def get_procedure_arguments(self, func_name):
+        """Return a tuple holding the codes of the elements that the
+        procedure `func_name` declares as its input parameters, or
+        ``None`` if the template does not declare the procedure.
+        """
+        return self.__arguments.get(func_name)
+
+    def consumed_codes(self):
+        """Return a frozenset holding the codes of all input elements
+        that can affect the output of the template, i.e. the elements
+        referenced by its trigger conditions and lines, and the base
+        elements they fall back on.
+
+        Raises:
+            ValueError: the template invokes a procedure that does not
+                declare its input parameters.
+        """
+        index = self.dependencies
+        if index.volatile:
+            raise ValueError(
+                "The template invokes procedures with undeclared inputs.")
+        codes = set()
+        for code in index.codes:
+            codes.add(str(code))
+            codes.add(str(code.base))
+        return frozenset(codes)
+
+    def consumed_fields(self):
+        """Return a frozenset holding the mnemonic field names of
+        :data:`~s42.const.ADDRESS_MAP` that map to an element returned
+        by :meth:`consumed_codes`.
+        """
+        codes = self.consumed_codes()
+        mapping = ADDRESS_MAP.get(get_country(self.country).numeric3, {})
+        return frozenset(name for name, code in mapping.items()
+            if str(Code.fromstring(code)) in codes)
+
+    def project(self, elements):
+        """Return a copy of the dictionary `elements`, keyed by element
+        code, without the elements that cannot affect the output.
+        """
+        codes = self.consumed_codes()
+        return dict((k, v) for k, v in elements.items()
+            if str(Code.fromstring(k)) in codes)
+
+    def get_line(self, identifier):
+        """Return the :class:`~s42.template.lines.Line` identified by
+        a :class:`~s42.datastructures.LineIdentifier`.
+        """
+        return self.__lines[identifier]
+
     def _get_line(self, identifier):
         return self.__lines[identifier]
 
@@ -107,7 +353,7 @@ class Template(object):
         return value
 
     def _get_preprocessors(self, code):
-        return self.__preprocessors.get(self.country, {}).get(code, [])
+        return self.__local_preprocessors.get(code, ())
 
     @classmethod
     def register_preprocessor(cls, country, code):
@@ -122,8 +368,15 @@ class Template(object):
             cls.__procedures[country][func_name] = func
         return decorator
 
+    @classmethod
+    def get_procedures(cls, country):
+        """Return a dictionary holding the procedures that are currently
+        registered for `country`, keyed by function name.
+        """
+        return dict(cls.__procedures.get(country, {}))
+
     def invoke_procedure(self, func_name, dto):
-        return self.__procedures[self.country][func_name](dto)
+        return self.__local_procedures[func_name](dto)
 
 
 #: TODO: Build a real framework.
@@ -0,0 +1,63 @@
+import threading
+
+
+class TemplateCache(object):
+    """A registry of parsed templates keyed by their filepath.
+
+    Loading is serialized per filepath, so concurrent first requests
+    for the same template result in a single parse, while lookups of
+    templates that are already loaded never take a lock.
+    """
+
+    def __init__(self, loader):
+        """Initialize a new :class:`TemplateCache` instance.
+
+        Args:
+            loader: a callable accepting a filepath and returning a
+                :class:`~s42.template.base.Template` instance.
+        """
+        self._loader = loader
+        self._templates = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, src):
+        """Return the template loaded from `src`, loading it if it
+        is not in the cache.
+        """
+        try:
+            return self._templates[src]
+        except KeyError:
+            pass
+
+        with self._lock:
+            lock = self._locks.setdefault(src, threading.Lock())
+        with lock:
+            if src not in self._templates:
+                self._templates[src] = self.load(src)
+        return self._templates[src]
+
+    def load(self, src):
+        """Load the template at `src` with the loader of the cache,
+        without caching it.
+        """
+        return self._loader(src)
+
+    def set(self, src, template):
+        """Replace the template cached for `src`. Renditions that
+        already hold a reference to the previous template are not
+        affected.
+        """
+        self._templates[src] = template
+
+    def clear(self):
+        self._templates.clear()
+
+    def __contains__(self, src):
+        return src in self._templates
+
+    def __iter__(self):
+        return iter(list(self._templates.keys()))
+
+    def __len__(self):
+        return len(self._templates)
@@ -0,0 +1,190 @@
+from s42.datastructures import AddressDTO
+from s42.datastructures import Code
+from s42.datastructures import LineIdentifier
+from s42.template.base import Template
+from s42.template.lines import ElementData
+from s42.template.lines import Line
+from s42.template.lines import LineComponent
+from s42.template.lines import RenditionOperator
+from s42.template.trigger import CONDITION_TAGS
+
+
+#: The version of the program format produced by :func:`compile_template`.
+PROGRAM_VERSION = 2
+
+
+def compile_template(template):
+    """Compile a :class:`~s42.template.base.Template` into a program
+    made of tuples, strings and ``None`` only, so that it can be
+    serialized with :mod:`marshal` and shared between processes.
+
+    Element codes are kept as strings because the bits of their masks
+    are assigned per process.
+
+    Returns:
+        tuple: ``(version, country, digest, selectors, lines)``.
+    """
+    selectors = []
+    for selector in template.selectors:
+        groups = []
+        for trigger in selector.groups:
+            conditions = tuple(_compile_condition(x)
+                for x in trigger.conditions)
+            groups.append((conditions, tuple(tuple(x) for x in trigger.lines)))
+        selectors.append(tuple(groups))
+
+    lines = []
+    for line in template.lines:
+        components = tuple((component.is_required(),
+            tuple(_compile_element(e) for e in component.elements))
+            for component in line.components)
+        lines.append((tuple(line.identifier), components))
+
+    return (PROGRAM_VERSION, template.country, template.digest,
+        tuple(selectors), tuple(lines))
+
+
+def _compile_condition(condition):
+    try:
+        tag = CONDITION_TAGS[type(condition)]
+    except KeyError:
+        raise TypeError("Cannot compile condition: " + repr(condition))
+    if tag in ('isPopulated', 'isNotPopulated'):
+        args = tuple(tuple(tuple(str(code) for code in codeset)
+            for codeset in arg) for arg in condition.args)
+    elif tag == 'hasValue':
+        args = tuple((str(code), value) for code, value in condition.args)
+    elif tag == 'hasResult':
+        args = tuple((func, retval) for func, retval in condition.args)
+    else:
+        args = ()
+    return (tag, args)
+
+
+def _compile_element(element):
+    operator = element.operator
+    return (str(element.code), element.is_required(),
+        (operator.text,) if operator is not None else None)
+
+
+class CompiledTemplate(object):
+    """Renders addresses from a program produced by
+    :func:`compile_template`.
+
+    The output of :meth:`render` is identical to the string value of
+    each line rendered by the :class:`~s42.template.base.Template` the
+    program was compiled from, but no selector or node objects are
+    created: the program is decoded once into flat tuples holding the
+    masks of the element codes of the current process, and into
+    :class:`~s42.template.lines.Line` instances whose
+    :meth:`~s42.template.lines.Line.get_text` renders the lines.
+
+    Decoding skips the XML parse, but the decoded objects belong to the
+    current process; they take about two thirds of the memory of the
+    parsed template.
+    """
+
+    def __init__(self, program):
+        """Initialize a new :class:`CompiledTemplate` instance.
+
+        Args:
+            program: a tuple as returned by :func:`compile_template`.
+
+        Raises:
+            ValueError: the program was produced by an incompatible
+                version of :func:`compile_template`.
+        """
+        version, country, digest, selectors, lines = program
+        if version != PROGRAM_VERSION:
+            raise ValueError(
+                "Unsupported program version: {0}".format(version))
+        self.country = country
+        self.digest = digest
+        self._procedures = Template.get_procedures(country)
+        self._selectors = tuple(
+            tuple((tuple(self._decode_condition(*x) for x in conditions),
+                identifiers) for conditions, identifiers in groups)
+            for groups in selectors)
+        self._lines = dict((identifier, self._decode_line(identifier,
+            components)) for identifier, components in lines)
+
+    @staticmethod
+    def _decode_condition(tag, args):
+        if tag == 'isPopulated':
+            args = tuple(tuple(tuple(Code.declare(x).mask for x in codeset)
+                for codeset in arg) for arg in args)
+        elif tag == 'isNotPopulated':
+            # No code of a codeset may be populated, so their masks
+            # are tested at once.
+            args = tuple(tuple(_union(Code.declare(x).mask for x in codeset)
+                for codeset in arg) for arg in args)
+        elif tag == 'hasValue':
+            args = tuple((Code.declare(code), value) for code, value in args)
+        return (tag, args)
+
+    @staticmethod
+    def _decode_line(identifier, components):
+        return Line(LineIdentifier(*identifier), [LineComponent(None,
+            [_decode_element(*x) for x in elements], None, required)
+            for required, elements in components])
+
+    def get_selected_lines(self, dto):
+        """Return a list holding the ``(numeric, symbolic)`` identifiers
+        of the lines that are selected for `dto`.
+        """
+        return [x for selector in self._selectors
+            for x in self._select(selector, dto)]
+
+    def render(self, dto):
+        """Render address elements into a list of strings, one per line.
+
+        Args:
+            dto: a :class:`~s42.datastructures.AddressDTO` instance or
+                a dictionary.
+        """
+        if isinstance(dto, dict):
+            dto = AddressDTO.fromdict(dto)
+        output = []
+        for selector in self._selectors:
+            for identifier in self._select(selector, dto):
+                output.append(self._lines[identifier].get_text(dto))
+        return output
+
+    def _select(self, groups, dto):
+        identifiers = []
+        for conditions, lines in groups:
+            # All conditions are evaluated, as in Trigger.is_satisfied.
+            if all([self._is_satisfied(tag, args, dto)
+                    for tag, args in conditions]):
+                identifiers.extend(lines)
+        return identifiers
+
+    def _is_satisfied(self, tag, args, dto):
+        if tag == 'isPopulated':
+            mask = dto.mask
+            return all(any(all([mask & x for x in codeset])
+                for codeset in arg) for arg in args)
+        elif tag == 'isNotPopulated':
+            mask = dto.mask
+            return all(any(not (mask & x) for x in arg) for arg in args)
+        elif tag == 'hasValue':
+            return all(dto.get(code) == value for code, value in args)
+        elif tag == 'hasResult':
+            return all(self._procedures[func](dto) == retval
+                for func, retval in args)
+        return True
+
+
+def _decode_element(code, required, operator):
+    element = ElementData(Code.declare(code), None, required=required)
+    if operator is not None:
+        element.set_succeeding_rendition_operator(
+            RenditionOperator(RenditionOperator.CONCAT, *operator))
+    return element
+
+
+def _union(masks):
+    result = 0
+    for mask in masks:
+        result |= mask
+    return result
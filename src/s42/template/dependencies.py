@@ -0,0 +1,62 @@
+import collections
+
+
+class DependencyIndex(object):
+    """Maps the element codes of a template to the line selectors and
+    the lines whose outcome they can affect.
+
+    Codes are indexed by their base element: an element and its
+    sub-types fall back on each other when they are looked up in an
+    :class:`~s42.datastructures.AddressDTO`, so a change to any of
+    them may affect the others.
+    """
+
+    @property
+    def codes(self):
+        """Return a frozenset holding every
+        :class:`~s42.datastructures.Code` referenced by the template.
+        """
+        return self._codes
+
+    @property
+    def volatile(self):
+        """Return a tuple holding the indexes of the selectors that must
+        be evaluated whenever any element changes.
+        """
+        return self._volatile
+
+    def __init__(self, template):
+        codes = set()
+        selectors = collections.defaultdict(set)
+        lines = collections.defaultdict(set)
+        volatile = []
+        for i, selector in enumerate(template.selectors):
+            for trigger in selector.groups:
+                for condition in trigger.conditions:
+                    if condition.is_volatile():
+                        volatile.append(i)
+                    for code in condition.get_codes():
+                        codes.add(code)
+                        selectors[str(code.base)].add(i)
+
+        for line in template.lines:
+            for code in line.get_codes():
+                codes.add(code)
+                lines[str(code.base)].add(line.identifier)
+
+        self._codes = frozenset(codes)
+        self._selectors = dict(selectors)
+        self._lines = dict(lines)
+        self._volatile = tuple(sorted(set(volatile)))
+
+    def get_selectors(self, code):
+        """Return a set holding the indexes of the selectors that test
+        `code`, excluding volatile selectors.
+        """
+        return self._selectors.get(str(code.base), set())
+
+    def get_lines(self, code):
+        """Return a set holding the identifiers of the lines that hold
+        `code`.
+        """
+        return self._lines.get(str(code.base), set())
@@ -0,0 +1,238 @@
+import mmap
+
+from s42.datastructures import AddressDTO
+
+
+JUSTIFY_LEFT = 'L'
+JUSTIFY_RIGHT = 'R'
+JUSTIFY_CENTER = 'C'
+
+
+class Field(object):
+    """A run of elements on a line that starts at a fixed column.
+
+    A new field begins at every element that declares a ``posStart``
+    beyond the start of the preceding field; the elements that follow
+    it without a position, or at the same position, are appended to
+    it, joined by their succeeding separators.
+    """
+
+    def __init__(self, start, justify, elements):
+        self.start = start
+        self.justify = justify or JUSTIFY_LEFT
+        self.elements = tuple(elements)
+        self.width = None
+        self._members = frozenset(self.elements)
+
+    def get_text(self, dto, line):
+        """Return the text of the field for `dto`; see
+        :meth:`~s42.template.lines.Line.get_text`.
+        """
+        return line.get_text(dto, elements=self._members)
+
+
+def get_fields(line, line_width):
+    """Return the list of :class:`Field` instances of a
+    :class:`~s42.template.lines.Line`, with their widths bounded
+    by `line_width`.
+
+    Raises:
+        ValueError: the positions of the elements are not ordered, or
+            a field starts beyond `line_width`.
+    """
+    runs = []
+    for component in line.components:
+        for element in component.elements:
+            position = element.position
+            start = (position or 1) - 1
+            if runs and (position is None or start == runs[-1][0]):
+                runs[-1][2].append(element)
+                continue
+            if runs and start < runs[-1][0]:
+                raise ValueError(
+                    "Elements are not ordered by position: {0}".format(
+                        repr(line)))
+            if start >= line_width:
+                raise ValueError(
+                    "Column {0} of {1} exceeds the line width of {2}.".format(
+                        start + 1, repr(line), line_width))
+            runs.append((start, element.justify, [element]))
+
+    fields = [Field(*x) for x in runs]
+    for i, field in enumerate(fields):
+        end = fields[i + 1].start if (i + 1) < len(fields) else line_width
+        field.width = end - field.start
+    return fields
+
+
+class FixedWidthLayout(object):
+    """Lays out address renditions as fixed-length records of
+    encoded bytes.
+
+    A record holds `lines` lines of `line_width` bytes, each followed
+    by `newline`. Selected lines that produce no text are skipped and
+    lines beyond the capacity of the record are dropped. Field values
+    are justified as declared by ``fldJustify`` within the columns
+    reserved by ``posStart``, and truncated if they do not fit.
+    Elements that declare the same position share a field.
+    """
+
+    @property
+    def record_length(self):
+        return len(self._blank)
+
+    def __init__(self, template, line_width=40, lines=6, encoding='latin-1',
+        errors='replace', newline=b'\n', fill=b' '):
+        """Initialize a new :class:`FixedWidthLayout` instance.
+
+        Args:
+            template: the :class:`~s42.template.Template` instance
+                that selects the lines.
+            line_width: the number of bytes of a line, excluding the
+                newline sequence.
+            lines: the number of lines of a record.
+            encoding: the codec that is used to encode values.
+            errors: the error handler passed to the codec.
+            newline: the byte sequence terminating each line.
+            fill: the byte that pads unused columns.
+
+        Raises:
+            ValueError: a line of `template` has a field that starts
+                beyond `line_width`; see :func:`get_fields`.
+        """
+        assert len(fill) == 1
+        self.template = template
+        self.line_width = line_width
+        self.lines = lines
+        self.encoding = encoding
+        self.errors = errors
+        self._stride = line_width + len(newline)
+        self._blank = bytes(((fill * line_width) + newline) * lines)
+        self._fields = dict((line, get_fields(line, line_width))
+            for line in template.lines)
+
+    def _encode(self, text, width):
+        data = text.encode(self.encoding, self.errors)
+        if len(data) > width:
+            # Drop any partial multi-byte sequence at the cut.
+            data = data[:width].decode(self.encoding, 'ignore')\
+                .encode(self.encoding, self.errors)
+        return data
+
+    def write(self, dto, buf, offset=0):
+        """Write the record of `dto` into `buf` at `offset`.
+
+        Args:
+            dto: a :class:`~s42.datastructures.AddressDTO` instance or
+                a dictionary.
+            buf: a writable buffer, e.g. a :class:`bytearray` or a
+                :class:`mmap.mmap`.
+            offset: the position in `buf` at which the record starts.
+
+        Returns:
+            int: the position following the record.
+        """
+        if isinstance(dto, dict):
+            dto = AddressDTO.fromdict(dto)
+        end = offset + len(self._blank)
+        buf[offset:end] = self._blank
+
+        pos = offset
+        for line in self.template.get_selected_lines(dto):
+            if pos == end:
+                break
+            written = False
+            for field in self._fields[line]:
+                text = field.get_text(dto, line)
+                if not text:
+                    continue
+                data = self._encode(text, field.width)
+                start = pos + field.start
+                padding = field.width - len(data)
+                if field.justify == JUSTIFY_RIGHT:
+                    start += padding
+                elif field.justify == JUSTIFY_CENTER:
+                    start += padding // 2
+                buf[start:start + len(data)] = data
+                written = True
+            if written:
+                pos += self._stride
+        return end
+
+    def write_many(self, dtos, buf=None, offset=0):
+        """Write the records of a sequence of address elements into a
+        buffer that is allocated once.
+
+        Args:
+            dtos: a sequence of :class:`~s42.datastructures.AddressDTO`
+                instances or dictionaries.
+            buf: a writable buffer large enough to hold all records. If
+                omitted, a :class:`bytearray` is allocated.
+            offset: the position in `buf` at which the first record
+                starts.
+
+        Returns:
+            the buffer holding the records.
+        """
+        if buf is None:
+            buf = bytearray(offset + len(self._blank) * len(dtos))
+        for dto in dtos:
+            offset = self.write(dto, buf, offset)
+        return buf
+
+    def render(self, dto):
+        """Return the record of `dto` as bytes."""
+        buf = bytearray(len(self._blank))
+        self.write(dto, buf)
+        return bytes(buf)
+
+
+class FixedWidthFile(object):
+    """Writes fixed-length records into a memory-mapped file.
+
+    The file is preallocated for `capacity` records and grown by
+    doubling when full; it is truncated to the records written when
+    the :class:`FixedWidthFile` is closed.
+    """
+
+    def __init__(self, filepath, layout, capacity=1024):
+        self.layout = layout
+        self.count = 0
+        self._file = open(filepath, 'w+b')
+        self._capacity = 0
+        self._map = None
+        self._resize(max(capacity, 1))
+
+    def _resize(self, capacity):
+        if self._map is not None:
+            self._map.close()
+        self._file.truncate(capacity * self.layout.record_length)
+        self._map = mmap.mmap(self._file.fileno(),
+            capacity * self.layout.record_length)
+        self._capacity = capacity
+
+    def write(self, dto):
+        """Append the record of `dto` to the file."""
+        if self.count == self._capacity:
+            self._resize(self._capacity * 2)
+        self.layout.write(dto, self._map,
+            self.count * self.layout.record_length)
+        self.count += 1
+
+    def write_many(self, dtos):
+        for dto in dtos:
+            self.write(dto)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(self.count * self.layout.record_length)
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,97 @@
+from s42.datastructures import AddressDTO
+from s42.datastructures import Code
+
+
+class IncrementalRendition(object):
+    """An address rendition that is kept up to date as individual
+    elements change.
+
+    The outcome of every line selector and the text of every selected
+    line are cached. When an element changes, only the selectors that
+    test it (and those invoking procedures) are evaluated again, and
+    only the lines that hold it are rebuilt, as reported by the
+    template's :class:`~s42.template.dependencies.DependencyIndex`.
+    """
+
+    @property
+    def lines(self):
+        """Return a list holding the text of each line of the rendition."""
+        return [self._get_text(x) for x in self._get_selected()]
+
+    def __init__(self, template, dto):
+        """Initialize a new :class:`IncrementalRendition` instance.
+
+        Args:
+            template: the :class:`~s42.template.Template` instance
+                that is used to render the address.
+            dto: a :class:`~s42.datastructures.AddressDTO` instance or a
+                dictionary holding the initial address elements. It is
+                copied; later changes must go through :meth:`update`.
+        """
+        self._template = template
+        self._index = template.dependencies
+        self._dto = dto.copy() if isinstance(dto, AddressDTO)\
+            else AddressDTO.fromdict(dto)
+        self._candidates = [x.get_lines(self._dto)
+            for x in template.selectors]
+        self._texts = {}
+        self._stale = set()
+
+    def update(self, code, value):
+        """Set the value of a single element; see :meth:`update_many`."""
+        return self.update_many({code: value})
+
+    def update_many(self, elements):
+        """Set the values of the given elements, a value of ``None``
+        removing the element, and bring the rendition up to date.
+
+        Returns:
+            tuple: a list holding the text of each line of the rendition
+                and a list holding the
+                :class:`~s42.datastructures.LineIdentifier` of each line
+                that was added, removed or changed, in no particular
+                order.
+        """
+        previous = self._get_snapshot()
+        elements = [(Code.fromstring(k), v) for k, v in elements.items()]
+        # The selectors and lines depending on each element are marked
+        # before the element is changed, so that if an update fails
+        # part way, e.g. in a procedure, whatever changed already is
+        # brought up to date on the next update.
+        self._stale.update(self._index.volatile)
+        for code, value in elements:
+            self._stale.update(self._index.get_selectors(code))
+            for identifier in self._index.get_lines(code):
+                self._texts.pop(identifier, None)
+            self._dto.set(code, value)
+
+        for i in sorted(self._stale):
+            self._candidates[i] = self._template.selectors[i].get_lines(
+                self._dto)
+        self._stale = set()
+
+        current = self._get_snapshot()
+        changed = [k for k in set(previous) | set(current)
+            if previous.get(k) != current.get(k)]
+        return self.lines, changed
+
+    def _get_selected(self):
+        return [x for candidates in self._candidates for x in candidates]
+
+    def _get_snapshot(self):
+        return dict((x, self._get_text(x)) for x in self._get_selected())
+
+    def _get_text(self, identifier):
+        try:
+            return self._texts[identifier]
+        except KeyError:
+            pass
+        line = self._template.get_line(identifier)
+        text = self._texts[identifier] = line.get_text(self._dto)
+        return text
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __str__(self):
+        return '\n'.join(self.lines)
@@ -9,19 +9,20 @@ from s42.template.node import LineNode
 from s42.template.node import SeparatorNode
 from s42.template.node import ValueNode
 
-def parse_lines(element):
-    """Parse a list of :class:`~s42.datastructures.LineIdentifier`
-    instance from a ``lineSelect`` element.
-    """
-    return [LineIdentifier.fromxml(x) for x in element.xpath('lineName')]
- 
 
 def line_factory(el):
-    """Create a new :class:`Line` instance from an XML element."""
-    assert len(parse_lines(el)) == 1
-    identifier = parse_lines(el)[0]
+    """Create a new :class:`Line` instance from a ``lineData`` element."""
+    identifiers = []
+    components = []
+    for child in el:
+        tag = child.tag
+        if tag == 'lineName':
+            identifiers.append(LineIdentifier.fromxml(child))
+        elif tag == 'lineComponent':
+            components.append(LineComponent.fromxml(child))
+    assert len(identifiers) == 1
 
-    return Line.fromxml(identifier, el)
+    return Line(identifiers[0], components)
 
 
 class Line(object):
@@ -31,28 +32,91 @@ class Line(object):
     def identifier(self):
         return self._identifier
 
+    @property
+    def components(self):
+        return self._components
+
     @classmethod
     def fromxml(cls, identifier, element):
         components = []
-        for child in element.xpath('lineComponent'):
-            components.append(LineComponent.fromxml(child))
+        for child in element:
+            if child.tag == 'lineComponent':
+                components.append(LineComponent.fromxml(child))
 
         return cls(identifier, components)
 
     def __init__(self, identifier, components):
         self._identifier = identifier
-        self._components = components
+        self._components = tuple(components)
+
+        # The codes of the required elements of all components that
+        # are required if the line is selected, in template order.
+        self._required_codes = tuple(code for c in components
+            if c.is_required() for code in c.required_elements)
+
+    @property
+    def required_codes(self):
+        """Return a tuple holding the codes of the elements that must be
+        populated for the line to be complete once it is selected.
+        """
+        return self._required_codes
+
+    def get_codes(self):
+        """Return a list of the codes of all elements on the line."""
+        return [e.code for c in self._components for e in c.elements]
+
+    def get_missing_codes(self, dto):
+        """Return a list of the required codes that are not populated
+        in `dto`.
+        """
+        return [x for x in self._required_codes if not dto.is_populated(x)]
 
     def as_node(self, template, dto):
         """Return a :class:`~s42.template.node.Line` instance representing
         a line on an address rendition.
         """
-        node = LineNode(template, dto)
+        node = LineNode(template, dto, self)
         for component in self.get_components(dto):
             node.add(component.as_node(template, dto))
 
         return node
 
+    def get_text(self, dto, parts=None, elements=None):
+        """Return the text of the line for `dto`. This is the string
+        value of the node returned by :meth:`as_node`, and it does not
+        build the node tree.
+
+        Args:
+            dto: a :class:`~s42.datastructures.AddressDTO` instance.
+            parts: a list that is cleared and used as scratch space, so
+                that it can be reused between calls.
+            elements: a container of :class:`ElementData` instances
+                restricting the elements that are rendered. Components
+                are still omitted if any of their required elements,
+                rendered or not, is not populated.
+        """
+        if parts is None:
+            parts = []
+        else:
+            del parts[:]
+        for component in self._components:
+            if not component.is_valid(dto):
+                continue
+            for element in component.elements:
+                if elements is not None and element not in elements:
+                    continue
+                code = element.code
+                if dto.is_populated(code):
+                    parts.append(dto.get(code))
+                    parts.append(element.get_succeeding_separator())
+        if not parts:
+            return ''
+        # The separator following the last element is not rendered.
+        del parts[-1]
+        text = ''.join(parts)
+        del parts[:]
+        return text
+
     def get_components(self, dto):
         """Return all :class:`LineComponent` instances that are
         valid i.e. have one or more values.
@@ -85,6 +149,10 @@ class RenditionOperator(object):
 
         return cls(**kwargs)
 
+    @property
+    def text(self):
+        return self._text
+
     def __init__(self, operator_type, text=None, justify=None):
         self._text = text
         self._operator_type = operator_type
@@ -100,9 +168,13 @@ class LineComponent(object):
     Empty = type('Empty', (ValueError,), {})
     Missing = type('Missing', (ValueError,), {})
 
+    @property
+    def elements(self):
+        return self._elements
+
     @property
     def required_elements(self):
-        return [x.code for x in self._elements if x.is_required()]
+        return list(self._required_elements)
 
     @classmethod
     def fromxml(cls, element):
@@ -130,9 +202,11 @@ class LineComponent(object):
 
     def __init__(self, component_id, elements, priority, required=False):
         self._component_id = component_id
-        self._elements = elements
+        self._elements = tuple(elements)
         self._priority = priority
         self._required = required
+        self._required_elements = tuple(
+            x.code for x in elements if x.is_required())
 
     def as_node(self, template, dto):
         node = ComponentNode(template, dto)
@@ -144,8 +218,14 @@ class LineComponent(object):
             node.add(element.as_node(template, dto))
         return node
 
+    def is_required(self):
+        """Return a boolean indicating if the component must be present
+        when its line is selected.
+        """
+        return self._required
+
     def is_valid(self, dto):
-        return all([dto.is_populated(x) for x in self.required_elements])
+        return all([dto.is_populated(x) for x in self._required_elements])
 
 
 class ElementData(object):
@@ -154,6 +234,24 @@ class ElementData(object):
     def code(self):
         return self._code
 
+    @property
+    def justify(self):
+        return self._justify
+
+    @property
+    def operator(self):
+        """Return the :class:`RenditionOperator` following the element,
+        or ``None``.
+        """
+        return self._succeeding_operator
+
+    @property
+    def position(self):
+        """Return the 1-based column at which the element starts on
+        its line, or ``None`` if it follows the preceding element.
+        """
+        return int(self._position) if self._position else None
+
     @classmethod
     def fromxml(cls, element):
         kwargs = {
@@ -163,7 +261,7 @@ class ElementData(object):
             value = child.text
             tag = child.tag
             if tag == 'elementId':
-                kwargs['code'] = Code.fromstring(value)
+                kwargs['code'] = Code.declare(value)
             elif tag == 'elementDef':
                 kwargs['name'] = value
             elif tag == 'fldJustify':
@@ -6,6 +6,13 @@ from s42.template.node.base import Node
 
 class LineNode(Node):
 
+    def __init__(self, template, dto, line):
+        Node.__init__(self, template, dto)
+
+        # The text of the node is rendered by the line definition, so
+        # that it does not depend on the nodes that are built.
+        self.line = line
+
     @property
     def nodeseq(self):
         """Return all nodes in the tree as a single, sequential
@@ -17,15 +24,5 @@ class LineNode(Node):
                     yield atomic
 
     def render(self):
-        if not self.children:
-            return ''
-
-        output = ''
-        nodes = list(self.nodeseq)
-        for node in nodes:
-            if (nodes[-1] == node) and not node.is_element():
-                continue
-            output += str(node)
-
-        return output
+        return self.line.get_text(self.dto)
 
@@ -0,0 +1,129 @@
+"""Rewrites the selectors of a template into an equivalent form that
+is cheaper to evaluate.
+
+The optimizer removes the trigger groups that can never select a
+line, drops ``defaultCase`` conditions, which are always satisfied,
+and orders the remaining conditions of each group by their cost so
+that evaluation stops at the first condition that fails. Procedures
+invoked by ``hasResult`` conditions are assumed to have no side
+effects: an address that the original template renders is rendered
+identically, but a procedure that raises is no longer invoked when a
+cheaper condition of its group fails.
+"""
+from s42.template.trigger import DefaultCase
+from s42.template.trigger import HasResult
+from s42.template.trigger import HasValue
+from s42.template.trigger import IsNotPopulated
+from s42.template.trigger import IsPopulated
+from s42.template.trigger import LineSelector
+from s42.template.trigger import ShortCircuitTrigger
+
+
+#: The relative cost of evaluating each type of condition. Conditions
+#: of unknown types are evaluated last.
+CONDITION_COST = {
+    IsPopulated: 0,
+    IsNotPopulated: 0,
+    HasValue: 1,
+    HasResult: 2
+}
+
+ACTION_REMOVED = 'removed'
+ACTION_FOLDED = 'folded'
+ACTION_REORDERED = 'reordered'
+
+
+class OptimizationReport(object):
+    """The changes applied by :func:`optimize_selectors`, as a list of
+    ``(selector, group, action, detail)`` tuples holding the index of
+    the selector and of the trigger group in the original template.
+    """
+
+    def __init__(self):
+        self.changes = []
+
+    def add(self, selector, group, action, detail=None):
+        self.changes.append((selector, group, action, detail))
+
+    def count(self, action):
+        return len([x for x in self.changes if x[2] == action])
+
+    def as_dict(self):
+        """Return the report as a JSON-encodable dictionary."""
+        return {
+            'removed': self.count(ACTION_REMOVED),
+            'folded': self.count(ACTION_FOLDED),
+            'reordered': self.count(ACTION_REORDERED),
+            'changes': [{
+                'selector': selector,
+                'group': group,
+                'action': action,
+                'detail': detail
+            } for selector, group, action, detail in self.changes]
+        }
+
+    def __len__(self):
+        return len(self.changes)
+
+
+def optimize_selectors(template, selectors):
+    """Return a tuple holding the optimized copies of `selectors` and the
+    :class:`OptimizationReport` of the changes.
+    """
+    report = OptimizationReport()
+    optimized = []
+    for i, selector in enumerate(selectors):
+        groups = []
+        for j, trigger in enumerate(selector.groups):
+            reason = get_dead_reason(trigger)
+            if reason is not None:
+                report.add(i, j, ACTION_REMOVED, reason)
+                continue
+            conditions = [x for x in trigger.conditions
+                if not isinstance(x, DefaultCase)]
+            if len(conditions) != len(trigger.conditions):
+                report.add(i, j, ACTION_FOLDED)
+            ordered = sorted(conditions, key=get_cost)
+            if ordered != conditions:
+                report.add(i, j, ACTION_REORDERED, [type(x).__name__
+                    for x in ordered])
+            groups.append(ShortCircuitTrigger(template, ordered,
+                trigger.lines))
+        optimized.append(LineSelector(template, groups))
+    return tuple(optimized), report
+
+
+def get_cost(condition):
+    return CONDITION_COST.get(type(condition), len(CONDITION_COST))
+
+
+def get_dead_reason(trigger):
+    """Return a string describing why `trigger` can never select a
+    line, or ``None`` if it may.
+    """
+    if not trigger.lines:
+        return "selects no lines"
+
+    # Arguments holding a single codeset require all of its codes to be
+    # populated, or all of them not to be populated.
+    populated = []
+    not_populated = []
+    values = {}
+    for condition in trigger.conditions:
+        if isinstance(condition, IsPopulated):
+            populated.extend(code for arg in condition.args
+                if len(arg) == 1 for code in arg[0])
+        elif isinstance(condition, IsNotPopulated):
+            not_populated.extend(code for arg in condition.args
+                if len(arg) == 1 for code in arg[0])
+        elif isinstance(condition, HasValue):
+            for code, value in condition.args:
+                if values.setdefault(code, value) != value:
+                    return "{0} has conflicting values".format(code)
+
+    for x in populated:
+        for y in not_populated:
+            # Populating x sets a bit of the mask of y.
+            if not (x.mask & ~y.mask):
+                return "{0} is populated and {1} is not".format(x, y)
+    return None
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import threading
+
+from s42.template.cache import TemplateCache
+
+
+def get_file_stamp(src, checksum=False):
+    """Return a value that changes whenever the file at `src` is
+    modified, or ``None`` if it does not exist.
+
+    Args:
+        src: a string holding a filepath.
+        checksum: a boolean indicating if the SHA-1 digest of the
+            file contents is used instead of its modification time
+            and size.
+    """
+    try:
+        if checksum:
+            with open(src, 'rb') as f:
+                return hashlib.sha1(f.read()).hexdigest()
+        st = os.stat(src)
+    except (IOError, OSError):
+        return None
+    return (st.st_mtime, st.st_size)
+
+
+class TemplateReloader(object):
+    """Polls the files of the templates held by one or more
+    :class:`~s42.template.cache.TemplateCache` instances and replaces
+    the templates whose file changed.
+
+    Changed templates are parsed on the polling thread and swapped
+    into the cache with a single assignment, so renditions that are
+    in progress finish with the template they started with and
+    :func:`~s42.template.get_template` never waits for a parse. If
+    a changed file cannot be parsed by any of the caches holding it,
+    the previous templates are kept in all of them. The first poll
+    that sees a template compares its digest with the file, so a file
+    that changed after the template was loaded is reloaded as well.
+    """
+
+    def __init__(self, cache=None, interval=5.0, checksum=False):
+        """Initialize a new :class:`TemplateReloader` instance.
+
+        Args:
+            cache: the :class:`~s42.template.cache.TemplateCache`, or a
+                list of caches, to watch. Defaults to
+                :data:`s42.template.TEMPLATES` and
+                :data:`s42.template.OPTIMIZED_TEMPLATES`.
+            interval: the number of seconds between two polls.
+            checksum: a boolean indicating if file contents are hashed
+                instead of comparing modification times and sizes.
+        """
+        if cache is None:
+            from s42.template import OPTIMIZED_TEMPLATES
+            from s42.template import TEMPLATES
+            cache = [TEMPLATES, OPTIMIZED_TEMPLATES]
+        elif isinstance(cache, TemplateCache):
+            cache = [cache]
+        self.caches = list(cache)
+        self.interval = interval
+        self.checksum = checksum
+        self.errors = {}
+        self._stamps = {}
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def check(self):
+        """Poll all templates in the caches once and reload those whose
+        file changed since the previous poll.
+
+        Returns:
+            list: the filepaths of the reloaded templates.
+        """
+        reloaded = []
+        for src in self.get_sources():
+            stamp = get_file_stamp(src, self.checksum)
+            if src not in self._stamps:
+                # The file may have changed between the load of the
+                # template and the first poll that sees it.
+                self._stamps[src] = stamp
+                if stamp is None or self._is_current(src):
+                    continue
+            elif stamp is None or stamp == self._stamps[src]:
+                continue
+            try:
+                templates = [(cache, cache.load(src))
+                    for cache in self.caches if src in cache]
+            except Exception as e:
+                # Keep serving the previous version; the parse is retried
+                # when the file changes again.
+                self.errors[src] = e
+            else:
+                self.errors.pop(src, None)
+                for cache, tpl in templates:
+                    cache.set(src, tpl)
+                reloaded.append(src)
+            self._stamps[src] = stamp
+        return reloaded
+
+    def _is_current(self, src):
+        try:
+            with open(src, 'rb') as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+        except (IOError, OSError):
+            return True
+        return all(cache.get(src).digest == digest
+            for cache in self.caches if src in cache)
+
+    def get_sources(self):
+        """Return a list holding the filepaths of the templates held by
+        the caches, without duplicates.
+        """
+        sources = []
+        for cache in self.caches:
+            for src in cache:
+                if src not in sources:
+                    sources.append(src)
+        return sources
+
+    def start(self):
+        """Start polling on a daemon thread."""
+        if self._thread is not None:
+            raise RuntimeError("The reloader is already running.")
+        self._stopped.clear()
+        self.check()
+        self._thread = threading.Thread(target=self._run,
+            name='s42-template-reloader')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop polling and wait for the polling thread to exit."""
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.check()
@@ -11,7 +11,8 @@ class AddressRendition(object):
             self._render()
         return self._lines
 
-    def __init__(self, template, dto, abstract=False, sep=None):
+    def __init__(self, template, dto, abstract=False, sep=None,
+        selection=None):
         """Initialize a new :class:`AddressRendition` instance.
 
         Args:
@@ -22,10 +23,13 @@ class AddressRendition(object):
             abstract: a boolean indicating if the rendtion is abstract
                 e.g. only the element descriptions are rendered instead
                 of their actual values.
+            selection: a set of :class:`~s42.datastructures.LineIdentifier`
+                instances restricting the lines that are rendered.
         """
         self._template = template
         self._dto = dto
         self._abstract = abstract
+        self._selection = selection
         self._lines = None
         self._candidates = []
         self._sep = os.linesep
@@ -37,15 +41,28 @@ class AddressRendition(object):
         return self._abstract
 
     def _render(self):
-        self._candidates = self._template.get_selected_lines(self._dto)
+        for line in self._iter_lines():
+            pass
+
+    def _iter_lines(self):
+        # Lines are selected and built as they are consumed, so that
+        # a caller that stops early does not pay for the other lines.
+        candidates = []
         node = AddressNode(self._template, self._dto)
-        for line in self._candidates:
-            node.add(line.as_node(self._template, self._dto))
+        for line in self._template.iter_selected_lines(
+                self._dto, self._selection):
+            candidates.append(line)
+            child = line.as_node(self._template, self._dto)
+            node.add(child)
+            yield child
 
+        self._candidates = candidates
         self._lines = node
 
     def __str__(self):
         return os.linesep.join(self.lines)
 
     def __iter__(self):
-        return iter(self.lines)
+        if self._lines is not None:
+            return iter(self._lines)
+        return self._iter_lines()
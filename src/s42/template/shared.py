@@ -0,0 +1,199 @@
+import marshal
+import mmap
+import os
+import struct
+import threading
+
+from s42.template.compiled import CompiledTemplate
+from s42.template.compiled import compile_template
+
+
+MAGIC = b'S42T'
+
+#: The magic number, the format version and the size of the index.
+HEADER = struct.Struct('<4sII')
+
+STORE_VERSION = 1
+
+
+def build_image(templates):
+    """Compile templates into a single buffer that can be attached by
+    :class:`SharedTemplateStore`.
+
+    The buffer starts with a header and an index, mapping the country
+    code of each template to the offset and size of its
+    :mod:`marshal`-encoded program, followed by the programs.
+
+    Args:
+        templates: an iterable of :class:`~s42.template.base.Template`
+            instances.
+
+    Returns:
+        bytes
+    """
+    blobs = []
+    index = {}
+    offset = 0
+    for template in templates:
+        blob = marshal.dumps(compile_template(template))
+        index[template.country] = (offset, len(blob), template.digest)
+        blobs.append(blob)
+        offset += len(blob)
+    header = marshal.dumps(index)
+    return HEADER.pack(MAGIC, STORE_VERSION, len(header)) + header\
+        + b''.join(blobs)
+
+
+class SharedTemplateStore(object):
+    """A read-only store of compiled templates held in a single block of
+    shared memory or in a memory-mapped file.
+
+    The store is built once, e.g. by the master process of a worker
+    pool, and attached by the workers. Each worker decodes only the
+    programs of the countries it renders, on first use, into a
+    :class:`~s42.template.compiled.CompiledTemplate`, so the workers do
+    not parse any XML. Instances can be pickled, in which case the copy
+    attaches to the same block or file.
+
+    The store is a serialized cache: only the encoded programs are
+    shared. Each worker still holds its own decoded objects, which
+    take about two thirds of the memory of a parsed
+    :class:`~s42.template.base.Template`.
+
+    A block of shared memory is removed by :meth:`unlink`, which must
+    be called by the process that created it. Processes that are not
+    started by that process should use a file-backed store instead, as
+    the resource tracker of Python versions before 3.13 removes a
+    block when the last process that attached it exits.
+    """
+
+    @property
+    def countries(self):
+        return sorted(self._index.keys())
+
+    @classmethod
+    def create(cls, templates, name=None):
+        """Build a store in a new block of shared memory.
+
+        Args:
+            templates: an iterable of :class:`~s42.template.base.Template`
+                instances.
+            name: the name of the block. A unique name is generated if
+                omitted.
+        """
+        from multiprocessing import shared_memory
+        image = build_image(templates)
+        shm = shared_memory.SharedMemory(name=name, create=True,
+            size=len(image))
+        shm.buf[:len(image)] = image
+        return cls(shm=shm)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach the store held by the block of shared memory `name`."""
+        from multiprocessing import shared_memory
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm=shm)
+
+    @classmethod
+    def write(cls, filepath, templates):
+        """Build a store into the file at `filepath` and open it.
+
+        The file is written under a temporary name and renamed, so that
+        processes that opened a previous version keep reading it.
+        """
+        tmp = filepath + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(build_image(templates))
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(tmp, filepath)
+        return cls.open(filepath)
+
+    @classmethod
+    def open(cls, filepath):
+        """Open the store held by the file at `filepath`."""
+        with open(filepath, 'rb') as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buf=buf, filepath=filepath)
+
+    def __init__(self, shm=None, buf=None, filepath=None):
+        self._shm = shm
+        self._filepath = filepath
+        self._buf = shm.buf if shm is not None else buf
+        self._compiled = {}
+        self._lock = threading.Lock()
+
+        magic, version, size = HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != STORE_VERSION:
+            self.close()
+            raise ValueError("Not a template store.")
+        self._start = HEADER.size + size
+        self._index = marshal.loads(bytes(self._buf[HEADER.size:self._start]))
+
+    @property
+    def name(self):
+        """Return the name of the block of shared memory, or ``None``
+        if the store is file-backed.
+        """
+        return self._shm.name if self._shm is not None else None
+
+    def get_digest(self, country):
+        """Return the SHA-1 digest of the source document of the
+        template of `country`.
+        """
+        return self._index[country][2]
+
+    def get(self, country):
+        """Return the :class:`~s42.template.compiled.CompiledTemplate`
+        of `country`, decoding it on first use.
+
+        Raises:
+            KeyError: the store holds no template for `country`.
+        """
+        try:
+            return self._compiled[country]
+        except KeyError:
+            pass
+        offset, size, digest = self._index[country]
+        with self._lock:
+            if country not in self._compiled:
+                start = self._start + offset
+                program = marshal.loads(bytes(self._buf[start:start + size]))
+                self._compiled[country] = CompiledTemplate(program)
+        return self._compiled[country]
+
+    def render(self, country, dto):
+        """Render address elements with the template of `country`; see
+        :meth:`~s42.template.compiled.CompiledTemplate.render`.
+        """
+        return self.get(country).render(dto)
+
+    def close(self):
+        """Detach from the block or file. Decoded templates remain
+        usable.
+        """
+        if self._shm is not None:
+            # The memoryview must be released before the block is closed.
+            self._buf.release()
+            self._shm.close()
+        elif self._buf is not None and not self._buf.closed:
+            self._buf.close()
+
+    def unlink(self):
+        """Remove the block of shared memory once all processes have
+        detached from it.
+        """
+        if self._shm is not None:
+            self._shm.unlink()
+
+    def __contains__(self, country):
+        return country in self._index
+
+    def __reduce__(self):
+        if self._shm is not None:
+            return (type(self).attach, (self._shm.name,))
+        return (type(self).open, (self._filepath,))
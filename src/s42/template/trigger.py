@@ -1,5 +1,6 @@
 import collections
 
+from s42.datastructures import Code
 from s42.datastructures import LineIdentifier
 
 
@@ -17,6 +18,10 @@ class LineSelector(object):
     def lines(self):
         raise NotImplementedError("This property is retired.")
 
+    @property
+    def groups(self):
+        return self._groups
+
     @classmethod
     def fromxml(cls, element):
         raise NotImplementedError("Subclasses must override this method.")
@@ -69,14 +74,32 @@ class LineSelector(object):
         return cls(template, cls.parse_line_triggers(template, element))
 
     def __init__(self, template, groups):
-        self._groups = groups
+        self._groups = tuple(groups)
+
+    def get_identifiers(self):
+        """Return a set holding the identifiers of all lines that the
+        selector can select.
+        """
+        return set(x for trigger in self._groups for x in trigger.lines)
+
+    def get_lines(self, dto, selection=None):
+        """Get a list of :class:`~s42.datastructures.LineIdentifier`
+        instances based on the elements provided by `dto`.
 
-    def get_lines(self, dto):
-        """Get a list of :class:`~s42.template.line.Line` instance
-        based on the elements provided by `dto`.
+        Args:
+            dto: a :class:`~s42.datastructures.AddressDTO` instance.
+            selection: a set of line identifiers. If provided, only the
+                triggers yielding one of these lines are evaluated and
+                only these lines are returned.
         """
         lines = []
         for trigger in self._groups:
+            if selection is not None:
+                candidates = [x for x in trigger.lines if x in selection]
+                if not candidates or not trigger.is_satisfied(dto):
+                    continue
+                lines.extend(candidates)
+                continue
             if not trigger.is_satisfied(dto):
                 continue
             lines.extend(trigger.lines)
@@ -91,6 +114,10 @@ class Trigger(object):
     def lines(self):
         return self._lines
 
+    @property
+    def conditions(self):
+        return self._conditions
+
     @classmethod
     def fromelements(cls, template, triggers, lines):
         args = collections.defaultdict(list)
@@ -103,13 +130,40 @@ class Trigger(object):
         )
 
     def __init__(self, template, conditions, lines):
-        self._conditions = conditions
-        self._lines = lines
+        self._conditions = tuple(conditions)
+        self._lines = tuple(lines)
 
     def is_satisfied(self, dto):
         return all([x.is_satisfied(dto) for x in self._conditions])
 
 
+class ShortCircuitTrigger(Trigger):
+    """A :class:`Trigger` that stops evaluating its conditions at the
+    first one that is not satisfied. Used by the
+    :mod:`~s42.template.optimizer`, which orders the conditions so that
+    the cheapest are evaluated first.
+    """
+
+    def reordered(self, conditions):
+        """Return a copy of the trigger that evaluates `conditions` in
+        the given order. The trigger itself is not modified.
+
+        Raises:
+            ValueError: `conditions` is not a permutation of the
+                conditions of the trigger.
+        """
+        conditions = tuple(conditions)
+        if sorted(map(id, conditions)) != sorted(map(id, self._conditions)):
+            raise ValueError("The conditions of a trigger cannot change.")
+        return type(self)(None, conditions, self._lines)
+
+    def is_satisfied(self, dto):
+        for condition in self._conditions:
+            if not condition.is_satisfied(dto):
+                return False
+        return True
+
+
 class TriggerCondition(object):
 
     @staticmethod
@@ -132,6 +186,18 @@ class TriggerCondition(object):
         self.args = args
         self.template = template
 
+    def get_codes(self):
+        """Return a list of the :class:`~s42.datastructures.Code`
+        instances that the condition tests.
+        """
+        return []
+
+    def is_volatile(self):
+        """Return a boolean indicating if the outcome of the condition
+        may depend on elements that :meth:`get_codes` does not report.
+        """
+        return False
+
     def is_satisfied(self, dto):
         return all(map(lambda x: self.process_arg(dto, *x), self.args))
 
@@ -146,42 +212,54 @@ class DefaultCase(TriggerCondition):
         return True
 
 
+def parse_codesets(template, element):
+    """Parse the sets of element codes from the argument of a trigger
+    condition into lists of :class:`~s42.datastructures.Code` instances.
+    """
+    return [[Code.declare(y.strip()) for y in x.split(template.separator)]
+        for x in map(str.strip, element.text.split(template.sequencer))]
+
+
 class IsPopulated(TriggerCondition):
 
     @staticmethod
     def parse_arg(template, element):
-        return [list(map(str.strip, x.split(template.separator))) for x in 
-            map(str.strip, element.text.split(template.sequencer))]
+        return parse_codesets(template, element)
+
+    def get_codes(self):
+        return [x for arg in self.args for codeset in arg for x in codeset]
 
     def process_arg(self, dto, *codes):
         # The isPopulated trigger condition can have multiple arguments
         # and is satisfied only if all arguments, including at least one
         # of a set of elements within an argument, meet the condition
         # of being populated (NEN 2011: 47).
-        is_satisfied = False
+        mask = dto.mask
         for codeset in codes:
-            is_satisfied |= all(map(dto.is_populated, codeset))
-
-        return is_satisfied
+            if all([mask & x.mask for x in codeset]):
+                return True
+        return False
 
 
 class IsNotPopulated(TriggerCondition):
 
     @staticmethod
     def parse_arg(template, element):
-        return [list(map(str.strip, x.split(template.separator))) for x in 
-            map(str.strip, element.text.split(template.sequencer))]
+        return parse_codesets(template, element)
+
+    def get_codes(self):
+        return [x for arg in self.args for codeset in arg for x in codeset]
 
     def process_arg(self, dto, *codes):
         # The isNotPopulated trigger condition has the same options
         # and is satisfied only if all arguments, including at least
         # one of a set of elements within an argument, are not populated,
         # that is, null or an empty string.
-        is_satisfied = False
+        mask = dto.mask
         for codeset in codes:
-            is_satisfied |= not any(map(dto.is_populated, codeset))
-
-        return is_satisfied
+            if not any([mask & x.mask for x in codeset]):
+                return True
+        return False
 
 
 
@@ -190,7 +268,11 @@ class HasValue(TriggerCondition):
     @staticmethod
     def parse_arg(template, element):
         f = lambda x: x.strip().strip('"')
-        return list(map(f, element.text.split(template.separator)))
+        code, value = map(f, element.text.split(template.separator))
+        return [Code.declare(code), value]
+
+    def get_codes(self):
+        return [code for code, value in self.args]
 
     def process_arg(self, dto, code, value):
         # The hasValue trigger condition can test whether an element
@@ -207,6 +289,18 @@ class HasResult(TriggerCondition):
         return list(map(lambda x: str.strip(x).strip('"'),
             element.text.split(template.separator)))
 
+    def get_codes(self):
+        codes = []
+        for func, retval in self.args:
+            codes.extend(self.template.get_procedure_arguments(func) or ())
+        return codes
+
+    def is_volatile(self):
+        # Procedures that do not declare their input parameters may
+        # read any element of the address.
+        return any([self.template.get_procedure_arguments(func) is None
+            for func, retval in self.args])
+
     def process_arg(self, dto, func, retval):
         # The hasResult trigger condition and the preCondition trigger condition
         # compare the result of an external called function to a specified value.
@@ -230,4 +324,8 @@ TRIGGER_CONDITION_MAPPING = {
 }
 
 
+#: Maps the condition classes to their tags.
+CONDITION_TAGS = dict((v, k) for k, v in TRIGGER_CONDITION_MAPPING.items())
+
+
 VALID_TRIGGER_CONDITIONS = list(TRIGGER_CONDITION_MAPPING.keys())
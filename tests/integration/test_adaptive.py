@@ -0,0 +1,94 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from s42.template import Template
+from s42.template import get_template
+from s42.template import get_template_path
+from s42.template import preload
+from s42.template.adaptive import TriggerProfiler
+from s42.template.adaptive import get_tag
+from s42.template.adaptive import load_profile
+from s42.test.utils import get_test_fixture
+
+
+class TriggerProfilerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.src = get_template_path('NL')
+        self.fixtures = [x['data'] for x in get_test_fixture('NL')]
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def test_requires_optimized_template(self):
+        with self.assertRaises(ValueError):
+            TriggerProfiler(get_template('NL'))
+
+    def get_conditions(self, template):
+        return [[trigger.conditions for trigger in selector.groups]
+            for selector in template.selectors]
+
+    def test_profile(self):
+        tpl = Template.fromfilepath(self.src, optimize=True)
+        conditions = self.get_conditions(tpl)
+        profiler = TriggerProfiler(tpl, window=len(self.fixtures))
+        expected = [[str(x) for x in get_template('NL').render(dto)]
+            for dto in self.fixtures]
+        for i in range(2):
+            self.assertEqual([[str(x) for x in profiler.render(dto)]
+                for dto in self.fixtures], expected)
+        self.assertTrue(profiler.applied)
+        self.assertIsNot(profiler.template, tpl)
+        self.assertEqual(self.get_conditions(tpl), conditions)
+
+        filepath = os.path.join(self.workdir, 'profile.json')
+        profiler.save(filepath)
+        with open(filepath) as f:
+            profile = json.load(f)[tpl.digest]
+        self.assertEqual(profile['samples'], len(self.fixtures))
+
+        other = Template.fromfilepath(self.src, optimize=True)
+        conditions = self.get_conditions(other)
+        reordered = load_profile(other, filepath)
+        self.assertIsNot(reordered, other)
+        self.assertEqual(self.get_conditions(other), conditions)
+        self.assertEqual(reordered.digest, other.digest)
+        orders = dict(((x['selector'], x['group']), x['order'])
+            for x in profile['triggers'])
+        for (i, j), order in orders.items():
+            trigger = reordered.selectors[i].groups[j]
+            self.assertEqual([get_tag(x) for x in trigger.conditions], order)
+        self.assertEqual([[str(x) for x in reordered.render(dto)]
+            for dto in self.fixtures], expected)
+
+    def test_unknown_profile(self):
+        filepath = os.path.join(self.workdir, 'profile.json')
+        with open(filepath, 'w') as f:
+            json.dump({}, f)
+        tpl = Template.fromfilepath(self.src, optimize=True)
+        self.assertIsNone(load_profile(tpl, filepath))
+
+    def test_get_template(self):
+        filepath = os.path.join(self.workdir, 'profile.json')
+        tpl = get_template('NL', optimize=True)
+        conditions = self.get_conditions(tpl)
+        profiler = TriggerProfiler(tpl, window=len(self.fixtures))
+        for dto in self.fixtures:
+            profiler.render(dto)
+        profiler.save(filepath)
+
+        profiled = get_template('NL', optimize=True, profile=filepath)
+        self.assertIsNot(profiled, tpl)
+        self.assertIs(get_template('NL', optimize=True), tpl)
+        self.assertIs(
+            get_template('NL', optimize=True, profile=filepath), profiled)
+        self.assertEqual(self.get_conditions(tpl), conditions)
+        self.assertEqual(
+            preload(['NL'], warmup=False, freeze=False, optimize=True,
+                profile=filepath), {'NL': profiled})
+        with self.assertRaises(ValueError):
+            get_template('NL', profile=filepath)
@@ -0,0 +1,82 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+import unittest
+
+from s42.aio import AsyncRenderer
+from s42.template import Template
+from s42.template import get_template
+from s42.template.cache import TemplateCache
+from s42.test.utils import get_test_fixture
+
+
+class AsyncRendererTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dtos = [x['data'] for x in get_test_fixture('NL')]
+        tpl = get_template('NL')
+        self.expected = [[str(x) for x in tpl.render(dto)]
+            for dto in self.dtos]
+
+    def test_render(self):
+        renderer = AsyncRenderer(max_concurrency=2)
+
+        async def main():
+            return await asyncio.gather(*[renderer.render('NL', dto)
+                for dto in self.dtos])
+
+        self.assertEqual(asyncio.run(main()), self.expected)
+
+    def test_render_many(self):
+        executor = concurrent.futures.ProcessPoolExecutor(2)
+        try:
+            renderer = AsyncRenderer(executor, max_concurrency=2)
+            results = asyncio.run(
+                renderer.render_many('NL', self.dtos, chunksize=2))
+        finally:
+            executor.shutdown()
+        self.assertEqual(results, self.expected)
+
+    def test_template_loading_is_coalesced(self):
+        calls = []
+
+        def loader(src):
+            calls.append(src)
+            time.sleep(0.05)
+            return Template.fromfilepath(src)
+
+        renderer = AsyncRenderer(cache=TemplateCache(loader))
+
+        async def main():
+            return await asyncio.gather(*[renderer.render('NL', dto)
+                for dto in self.dtos])
+
+        self.assertEqual(asyncio.run(main()), self.expected)
+        self.assertEqual(len(calls), 1)
+
+    def test_timeout(self):
+        event = threading.Event()
+
+        def loader(src):
+            event.wait(5)
+            return Template.fromfilepath(src)
+
+        executor = concurrent.futures.ThreadPoolExecutor(1)
+        renderer = AsyncRenderer(executor, max_concurrency=1,
+            cache=TemplateCache(loader))
+
+        async def main():
+            # The first render occupies the only thread of the executor
+            # loading the template until the event is set.
+            first = asyncio.ensure_future(renderer.render('NL', self.dtos[0]))
+            await asyncio.sleep(0.01)
+            try:
+                with self.assertRaises(asyncio.TimeoutError):
+                    await renderer.render('NL', self.dtos[0], timeout=0.05)
+            finally:
+                event.set()
+            return await first
+
+        self.assertEqual(asyncio.run(main()), self.expected[0])
+        executor.shutdown()
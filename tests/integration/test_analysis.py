@@ -0,0 +1,39 @@
+import io
+import json
+import sys
+import unittest
+
+from s42.__main__ import main
+from s42.template import get_template
+from s42.template import get_template_path
+from s42.template.analysis import analyze_template
+
+
+class AnalysisTestCase(unittest.TestCase):
+
+    def test_analyze_template(self):
+        tpl = get_template('US')
+        result = analyze_template(tpl)
+        self.assertEqual(result['selectors'], len(tpl.selectors))
+        self.assertEqual(result['lines'], len(tpl.lines))
+        self.assertEqual(result['worst_case']['is_populated'],
+            result['worst_case']['selection_checks']
+            + result['worst_case']['line_checks'])
+        procedures = [x for x in result['hot_spots']
+            if x['type'] == 'procedure']
+        self.assertEqual([x['procedure'] for x in procedures],
+            ['US-RuralRouteTypeTest'])
+        self.assertTrue(procedures[0]['registered'])
+
+    def test_inspect(self):
+        src = get_template_path('NL')
+        stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            self.assertEqual(main(['inspect', '--repeat', '1', src]), 0)
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+        result = json.loads(output)[src]
+        self.assertEqual(result['country'], 'NL')
+        self.assertGreater(result['parse_time'], 0)
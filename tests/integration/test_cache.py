@@ -0,0 +1,99 @@
+import functools
+import os
+import shutil
+import tempfile
+import unittest
+
+from s42.template import OPTIMIZED_TEMPLATES
+from s42.template import TEMPLATES
+from s42.template import Template
+from s42.template import TemplateReloader
+from s42.template import get_available_countries
+from s42.template import get_template
+from s42.template import get_template_path
+from s42.template import preload
+from s42.template.cache import TemplateCache
+
+
+class PreloadTestCase(unittest.TestCase):
+
+    def test_preload(self):
+        TEMPLATES.clear()
+        templates = preload(freeze=False)
+        countries = get_available_countries()
+        self.assertEqual(sorted(templates), countries)
+        self.assertEqual(len(TEMPLATES), len(countries))
+        for country_code in countries:
+            self.assertIn(get_template_path(country_code), TEMPLATES)
+            self.assertIs(get_template(country_code),
+                templates[country_code])
+
+    def test_preload_countries(self):
+        templates = preload(['NL'], warmup=False, freeze=False)
+        self.assertEqual(list(templates), ['NL'])
+        self.assertIs(get_template('NL'), templates['NL'])
+
+
+class TemplateReloaderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.src = os.path.join(self.workdir, 'template.xml')
+        shutil.copy(get_template_path('NL'), self.src)
+        self.cache = TemplateCache(Template.fromfilepath)
+        self.optimized = TemplateCache(
+            functools.partial(Template.fromfilepath, optimize=True))
+        self.reloader = TemplateReloader([self.cache, self.optimized],
+            checksum=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def append(self, data):
+        with open(self.src, 'ab') as f:
+            f.write(data)
+
+    def test_default_caches(self):
+        self.assertEqual(TemplateReloader().caches,
+            [TEMPLATES, OPTIMIZED_TEMPLATES])
+
+    def test_check(self):
+        tpl = self.cache.get(self.src)
+        optimized = self.optimized.get(self.src)
+        self.assertEqual(self.reloader.check(), [])
+        self.assertEqual(self.reloader.check(), [])
+
+        self.append(b'\n')
+        self.assertEqual(self.reloader.check(), [self.src])
+        self.assertIsNot(self.cache.get(self.src), tpl)
+        self.assertNotEqual(self.cache.get(self.src).digest, tpl.digest)
+        self.assertIsNot(self.optimized.get(self.src), optimized)
+        self.assertIsNotNone(self.optimized.get(self.src).optimization)
+        self.assertEqual(self.reloader.check(), [])
+
+    def test_changed_before_first_check(self):
+        self.assertEqual(self.reloader.check(), [])
+        tpl = self.cache.get(self.src)
+        self.append(b'\n')
+        self.assertEqual(self.reloader.check(), [self.src])
+        self.assertNotEqual(self.cache.get(self.src).digest, tpl.digest)
+        self.assertEqual(self.reloader.check(), [])
+
+    def test_parse_error(self):
+        tpl = self.cache.get(self.src)
+        optimized = self.optimized.get(self.src)
+        self.reloader.check()
+
+        self.append(b'<not-xml')
+        self.assertEqual(self.reloader.check(), [])
+        self.assertIn(self.src, self.reloader.errors)
+        self.assertIs(self.cache.get(self.src), tpl)
+        self.assertIs(self.optimized.get(self.src), optimized)
+
+        shutil.copy(get_template_path('NL'), self.src)
+        self.assertEqual(self.reloader.check(), [self.src])
+        self.assertNotIn(self.src, self.reloader.errors)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from s42.bulk import CheckedRenderer
+from s42.bulk import JSONLSource
+from s42.bulk import QuarantineFile
+from s42.bulk import render_record
+
+
+RECORDS = [
+    {'country': 'NL', 'thoroughfare': 'Drieslag', 'street_number': '51',
+     'postcode': '6832AM', 'town': 'Arnhem'},
+    {'thoroughfare': 'Drieslag'},
+    {'country': 'XX'},
+    {'country': 'BE', 'town': 'Brussel'},
+    {'country': 'NLD', 'town': 'Arnhem'},
+    ['NL'],
+    {'country': 528, 'town': 'Arnhem'},
+]
+
+
+class CheckedRendererTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def test_render(self):
+        renderer = CheckedRenderer()
+        results = list(renderer.render(RECORDS))
+        self.assertEqual([x for x, lines in results], [0, 4])
+        self.assertEqual(results[0][1], render_record(RECORDS[0]))
+        self.assertEqual([(x, code) for x, code, detail in renderer.errors], [
+            (1, 'no-country'),
+            (2, 'unknown-country'),
+            (3, 'no-mapping'),
+            (5, 'invalid-record'),
+            (6, 'unknown-country')
+        ])
+
+    def test_invalid_code(self):
+        renderer = CheckedRenderer(mnemonic=False)
+        records = [{'country': 'NL', '40.16': 'Arnhem'},
+            {'country': 'NL', '40.1x': 'Arnhem'}]
+        self.assertEqual([x for x, lines in renderer.render(records)], [0])
+        self.assertEqual(list(renderer.errors), [(1, 'invalid-code', '40.1x')])
+
+    def test_quarantine(self):
+        src = os.path.join(self.workdir, 'input.jsonl')
+        with open(src, 'w') as f:
+            f.write(json.dumps(RECORDS[0]) + '\n{"country"\n')
+        dst = os.path.join(self.workdir, 'quarantine.jsonl')
+        with QuarantineFile(dst) as quarantine:
+            renderer = CheckedRenderer(quarantine=quarantine)
+            results = list(renderer.render_source(JSONLSource(src)))
+        self.assertEqual(len(results), 1)
+        self.assertEqual(renderer.errors.counts(), {'invalid-record': 1})
+        with open(dst) as f:
+            failures = [json.loads(x) for x in f]
+        self.assertEqual(failures[0]['record'], '{"country"\n')
@@ -0,0 +1,128 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from s42.bulk import JSONLSource
+from s42.bulk import JobRunner
+from s42.bulk import MappedJSONLSource
+from s42.bulk import QuarantineFile
+from s42.bulk import ThreadedWriter
+from s42.bulk import open_stream
+from s42.bulk import open_writer
+from s42.bulk.errors import ERROR_INVALID_RECORD
+
+
+class CompressionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.records = [{'country': 'NL', 'town': 'Town {0}'.format(i)}
+            for i in range(50)]
+        self.plain = os.path.join(self.workdir, 'input.jsonl')
+        with open(self.plain, 'w') as f:
+            for record in self.records:
+                f.write(json.dumps(record) + '\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def write(self, filename):
+        src = os.path.join(self.workdir, filename)
+        with open_writer(src) as f:
+            for record in self.records:
+                f.write(json.dumps(record) + '\n')
+        return src
+
+    def test_round_trip(self):
+        for ext in ('.gz', '.bz2', '.xz'):
+            src = self.write('input.jsonl' + ext)
+            with open(src, 'rb') as f:
+                self.assertNotEqual(f.read(1), b'{')
+            with open_stream(src, 'rt') as f:
+                self.assertEqual([json.loads(x) for x in f], self.records)
+
+    def test_source(self):
+        source = JSONLSource(self.write('input.jsonl.gz'))
+        self.assertTrue(source.compressed)
+        self.assertEqual(source.ranges(4), [(0, None)])
+        self.assertEqual(list(source.read()),
+            list(JSONLSource(self.plain).read()))
+        self.assertRaises(ValueError, MappedJSONLSource, source.filepath)
+
+    def test_job(self):
+        dst = os.path.join(self.workdir, 'output.jsonl.xz')
+        errors = os.path.join(self.workdir, 'errors.jsonl.gz')
+        for threaded in (True, False):
+            runner = JobRunner(self.write('input.jsonl.bz2'),
+                os.path.join(self.workdir, 'job-{0}'.format(threaded)),
+                shards=3, processes=1, strategy='hash', threaded=threaded)
+            self.assertEqual(runner.get_spans(), [(0, None)])
+            self.assertEqual(runner.run(dst, errors), [0])
+            with open_stream(dst, 'rt') as f:
+                self.assertEqual(len(f.readlines()), 50)
+            with open_stream(errors, 'rt') as f:
+                self.assertEqual(f.read(), '')
+
+    def test_job_processes(self):
+        # The input is decompressed once and its records are rendered
+        # in batches by the worker processes.
+        src = os.path.join(self.workdir, 'input.jsonl.gz')
+        with open_writer(src) as f:
+            for i, record in enumerate(self.records):
+                f.write(json.dumps(record) + '\n')
+                if i == 20:
+                    f.write('{invalid\n')
+        outputs = []
+        for processes in (1, 2):
+            runner = JobRunner(src, os.path.join(self.workdir,
+                'job-{0}'.format(processes)), processes=processes)
+            dst = os.path.join(self.workdir, 'output-{0}.jsonl'.format(
+                processes))
+            errors = os.path.join(self.workdir, 'errors-{0}.jsonl'.format(
+                processes))
+            with mock.patch('s42.bulk.jobs.BATCH_SIZE', 8):
+                self.assertEqual(runner.run(dst, errors), [0])
+            with open(dst) as f, open(errors) as g:
+                outputs.append((f.read(), [json.loads(x)['error']
+                    for x in g]))
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(len(outputs[0][0].splitlines()), 50)
+        self.assertEqual(outputs[0][1], [ERROR_INVALID_RECORD])
+
+    def test_quarantine(self):
+        for threaded in (True, False):
+            src = os.path.join(self.workdir,
+                'errors-{0}.jsonl.gz'.format(threaded))
+            with QuarantineFile(src, threaded=threaded) as quarantine:
+                quarantine.add(0, 1, 'detail', b'{')
+            with open_stream(src, 'rt') as f:
+                self.assertEqual(json.loads(f.read())['record'], '{')
+
+    def test_writer_is_text(self):
+        for filename, threaded in (('output.jsonl.gz', True),
+                ('output.jsonl.gz', False), ('output.jsonl', True)):
+            src = os.path.join(self.workdir, filename)
+            with open_writer(src, threaded) as f:
+                self.assertEqual(f.write(u'\u00e9\n'), 2)
+                self.assertRaises(TypeError, f.write, b'data')
+            with open_stream(src, 'rt') as f:
+                self.assertEqual(f.read(), u'\u00e9\n')
+
+    def test_threaded_writer_error(self):
+
+        class FailingStream(io.BytesIO):
+
+            def write(self, data):
+                raise IOError("disk full")
+
+        writer = ThreadedWriter(FailingStream(), chunk_size=4)
+        writer.write('data')
+        self.assertRaises(IOError, writer.close)
+
+
+if __name__ == '__main__':
+    unittest.main()
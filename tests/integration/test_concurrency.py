@@ -0,0 +1,55 @@
+import threading
+import unittest
+
+from s42.bulk import ThreadedRenderer
+from s42.datastructures import AddressDTO
+from s42.template import get_template
+from s42.test.utils import get_test_fixture
+
+
+THREADS = 8
+
+ITERATIONS = 25
+
+
+class ConcurrencyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.templates = [get_template(x) for x in ('NL', 'US')]
+        self.dtos = dict((tpl, [AddressDTO.fromdict(x['data'])
+            for x in get_test_fixture(tpl.country)])
+            for tpl in self.templates)
+        self.expected = dict((tpl, [[str(x) for x in tpl.render(dto)]
+            for dto in self.dtos[tpl]]) for tpl in self.templates)
+
+    def test_template_is_immutable(self):
+        with self.assertRaises(AttributeError):
+            self.templates[0].country = 'XX'
+
+    def test_shared_templates_render_concurrently(self):
+        barrier = threading.Barrier(THREADS)
+        failures = []
+
+        def render():
+            barrier.wait()
+            for i in range(ITERATIONS):
+                for tpl in self.templates:
+                    for dto, expected in zip(self.dtos[tpl],
+                            self.expected[tpl]):
+                        actual = [str(x) for x in tpl.render(dto)]
+                        if actual != expected:
+                            failures.append((tpl.country, actual, expected))
+
+        threads = [threading.Thread(target=render) for i in range(THREADS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(failures, [])
+
+    def test_threaded_renderer(self):
+        tpl = self.templates[1]
+        dtos = self.dtos[tpl] * 50
+        with ThreadedRenderer(max_workers=THREADS, chunksize=7) as renderer:
+            actual = renderer.render_many(tpl, dtos)
+        self.assertEqual(actual, self.expected[tpl] * 50)
@@ -0,0 +1,96 @@
+import unittest
+
+import lxml.etree as xml
+
+from s42.bulk.fingerprint import get_consumed_codes
+from s42.bulk.fingerprint import get_fingerprint
+from s42.const import ADDRESS_MAP
+from s42.datastructures import Code
+from s42.template import Template
+from s42.template import get_template
+from s42.template import get_template_path
+from s42.template.trigger import HasResult
+from s42.test.utils import get_test_fixture
+
+
+def get_conditions(template, cls):
+    return [c for selector in template.selectors for trigger in selector.groups
+        for c in trigger.conditions if isinstance(c, cls)]
+
+
+def load_undeclared(country_code):
+    # The template without the declarations of its procedures.
+    root = xml.parse(get_template_path(country_code)).getroot()
+    for element in root.iter('externalEntityData'):
+        element.getparent().remove(element)
+    return Template(xml.tostring(root))
+
+
+class ConsumedCodesTestCase(unittest.TestCase):
+
+    def test_consumed_codes(self):
+        codes = get_template('NL').consumed_codes()
+        for code in ('40.16', '40.21-1-1', '40.21', '10.08'):
+            self.assertIn(str(Code.fromstring(code)), codes)
+        self.assertNotIn(str(Code.fromstring('40.19-0-3')), codes)
+
+    def test_consumed_fields(self):
+        template = get_template('NL')
+        fields = template.consumed_fields()
+        self.assertTrue(fields)
+        self.assertTrue(fields <= set(ADDRESS_MAP['528']))
+        self.assertIn('town', fields)
+
+    def test_project(self):
+        for country_code in ('NL', 'US'):
+            template = get_template(country_code)
+            for fixture in get_test_fixture(country_code):
+                elements = dict(fixture['data'])
+                elements['90.00'] = 'Unused'
+                projected = template.project(elements)
+                self.assertEqual(projected, fixture['data'])
+                self.assertEqual(
+                    [str(x) for x in template.render(projected)],
+                    [str(x) for x in template.render(elements)])
+
+    def test_declared_procedures(self):
+        template = get_template('US')
+        conditions = get_conditions(template, HasResult)
+        self.assertTrue(conditions)
+        for condition in conditions:
+            self.assertFalse(condition.is_volatile())
+            self.assertEqual([str(x) for x in condition.get_codes()],
+                [str(Code.fromstring(x))
+                    for x in ('40.24', '40.21-2-2', '40.21-1-1')])
+        self.assertEqual(template.dependencies.volatile, ())
+
+    def test_undeclared_procedures(self):
+        template = load_undeclared('US')
+        for condition in get_conditions(template, HasResult):
+            self.assertTrue(condition.is_volatile())
+            self.assertEqual(condition.get_codes(), [])
+        self.assertTrue(template.dependencies.volatile)
+        self.assertRaises(ValueError, template.consumed_codes)
+        self.assertRaises(ValueError, template.project, {})
+        self.assertIsNone(get_consumed_codes(template))
+
+    def test_fingerprint(self):
+        elements = dict(get_test_fixture('US')[0]['data'])
+        unused = dict(elements)
+        unused['40.26-0-2'] = 'Unused'
+
+        template = get_template('US')
+        codes = get_consumed_codes(template)
+        self.assertEqual(get_fingerprint(template, elements, codes),
+            get_fingerprint(template, unused, codes))
+
+        # Procedures that do not declare their inputs may read any
+        # element, so every element is fingerprinted.
+        template = load_undeclared('US')
+        codes = get_consumed_codes(template)
+        self.assertNotEqual(get_fingerprint(template, elements, codes),
+            get_fingerprint(template, unused, codes))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from s42.bulk import DeltaRenderer
+from s42.bulk import FingerprintStore
+from s42.bulk import render_record
+
+
+class DeltaRendererTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.store = FingerprintStore(os.path.join(self.workdir, 'fp.db'))
+        self.records = [{'id': i, 'country': 'NL', 'thoroughfare': 'Drieslag',
+            'street_number': str(i), 'postcode': '6832AM', 'town': 'Arnhem'}
+            for i in range(5)]
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.workdir)
+
+    def render(self, records):
+        renderer = DeltaRenderer(self.store, batch_size=2)
+        return renderer, list(renderer.render(records))
+
+    def test_unchanged(self):
+        renderer, results = self.render(self.records)
+        self.assertEqual([key for key, lines in results],
+            ['0', '1', '2', '3', '4'])
+        record = dict(self.records[0])
+        del record['id']
+        self.assertEqual(results[0][1], render_record(record))
+        self.assertEqual(self.render(self.records)[1], [])
+
+    def test_changed(self):
+        self.render(self.records)
+        self.records[3]['town'] = 'Utrecht'
+        self.records[4]['unknown'] = 'ignored'
+        results = self.render(self.records)[1]
+        self.assertEqual([key for key, lines in results], ['3'])
+        self.assertIn('6832AM Utrecht', results[0][1])
+
+    def test_deleted(self):
+        self.render(self.records)
+        renderer, results = self.render(self.records[:3])
+        self.assertEqual(results, [])
+        self.assertEqual(renderer.get_deleted(), ['3', '4'])
+        self.assertEqual(renderer.purge(), ['3', '4'])
+        self.assertEqual(self.store.get_many(['3', '4']), {})
+        self.assertEqual(sorted(self.store.get_many(['0', '1', '2'])),
+            ['0', '1', '2'])
+        results = self.render(self.records)[1]
+        self.assertEqual([key for key, lines in results], ['3', '4'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from s42.datastructures import Code
+from s42.datastructures import LineIdentifier
+from s42.template import get_template
+from s42.template.fixedwidth import FixedWidthLayout
+from s42.template.fixedwidth import get_fields
+from s42.template.lines import ElementData
+from s42.template.lines import Line
+from s42.template.lines import LineComponent
+from s42.test.utils import get_test_fixture
+
+
+def create_line(*positions):
+    elements = [ElementData(Code.fromstring('10.0{0}'.format(i)), None,
+        position=x) for i, x in enumerate(positions)]
+    return Line(LineIdentifier('001', 'TEST'),
+        [LineComponent('1', elements, '1')])
+
+
+class FixedWidthLayoutTestCase(unittest.TestCase):
+
+    def test_fixtures(self):
+        for country_code in ('NL', 'US'):
+            template = get_template(country_code)
+            layout = FixedWidthLayout(template, line_width=80, lines=16)
+            for fixture in get_test_fixture(country_code):
+                expected = [str(x) for x in template.render(fixture['data'])]
+                record = layout.render(fixture['data']).decode('latin-1')
+                lines = [x.rstrip() for x in record.split('\n')[:-1]]
+                self.assertEqual([x for x in lines if x],
+                    [x for x in expected if x])
+
+    def test_same_position(self):
+        fields = get_fields(create_line('1', '1', None, '20'), 40)
+        self.assertEqual([(x.start, x.width, len(x.elements))
+            for x in fields], [(0, 19, 3), (19, 21, 1)])
+
+    def test_field_beyond_line_width(self):
+        self.assertRaises(ValueError, get_fields,
+            create_line('1', '41'), 40)
+        self.assertRaises(ValueError, get_fields,
+            create_line('20', '10'), 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
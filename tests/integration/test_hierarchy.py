@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from s42.const import HIERARCHY_INDEX
+from s42.const import HierarchyIndex
+from s42.datastructures import AddressDTO
+from s42.datastructures import Code
+
+
+HIERARCHY = b"""<?xml version="1.0"?>
+<hierarchy>
+  <element><code>U40.21</code>
+    <subtype><code>U40.21-1-1</code></subtype>
+    <subtype><code>U40.21-1-2</code></subtype>
+  </element>
+  <element><code>U40.24</code></element>
+  <element><name>Not a code</name></element>
+</hierarchy>
+"""
+
+
+class HierarchyIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        filepath = os.path.join(self.workdir, 'hierarchy.xml')
+        with open(filepath, 'wb') as f:
+            f.write(HIERARCHY)
+        self.index = HierarchyIndex.fromfile(filepath)
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def test_index(self):
+        index = self.index
+        self.assertEqual(index.bases(), ['U40.21', 'U40.24'])
+        self.assertEqual(index.get_subtypes('U40.21'),
+            ('U40.21-1-1', 'U40.21-1-2'))
+        self.assertEqual(index.get_subtypes('U40.24'), ())
+        self.assertEqual(index.get_base('U40.21-1-2'), 'U40.21')
+        self.assertIsNone(index.get_base('U40.21'))
+        self.assertEqual(index.get_default('U40.21'), 'U40.21-1-1')
+        self.assertIsNone(index.get_default('U40.24'))
+        self.assertIn('U40.21-1-1', index)
+        self.assertNotIn('U40.16', index)
+
+    def test_ids(self):
+        index = self.index
+        codes = ['U40.21', 'U40.21-1-1', 'U40.21-1-2', 'U40.24']
+        self.assertEqual([index.get_id(x) for x in codes], [0, 1, 2, 3])
+        self.assertEqual([index.get_code(x) for x in range(4)], codes)
+        self.assertIsNone(index.get_id('U40.16'))
+        self.assertEqual(index.add('U40.24'), 3)
+        self.assertEqual(index.add('U40.16'), 4)
+        self.assertEqual(len(index), 5)
+
+
+class CodeTestCase(unittest.TestCase):
+
+    def test_id(self):
+        code = Code.fromstring('40.21-1-1')
+        self.assertEqual(code.id, HIERARCHY_INDEX.get_id('U40.21-1-1'))
+        self.assertEqual(code.mask, (1 << code.id) | (1 << code.base.id))
+        self.assertEqual(code.base.mask, 1 << code.base.id)
+        self.assertIs(Code.fromstring('U40.21-1-1'), code)
+
+    def test_unknown_codes(self):
+        # Codes that only appear in input have no identifier and are not
+        # interned, so they do not grow the index or the cache.
+        size = len(HIERARCHY_INDEX)
+        instances = len(Code._instances)
+        for i in range(1000):
+            code = Code.fromstring('X{0:02d}.{1:02d}'.format(*divmod(i, 100)))
+            self.assertIsNone(code.id)
+            self.assertEqual(code.mask, 0)
+        self.assertEqual(len(HIERARCHY_INDEX), size)
+        self.assertEqual(len(Code._instances), instances)
+
+        # The bit of a known base element is set.
+        code = Code.fromstring('40.21-9-9')
+        self.assertIsNone(code.id)
+        self.assertEqual(code.mask, 1 << code.base.id)
+
+    def test_declare(self):
+        undeclared = Code.fromstring('X97.97-1-1')
+        self.assertIsNone(undeclared.id)
+        code = Code.declare('X97.97-1-1')
+        self.assertIsNotNone(code.id)
+        self.assertIsNotNone(code.base.id)
+        self.assertEqual(code.mask, (1 << code.id) | (1 << code.base.id))
+        self.assertIs(Code.fromstring('X97.97-1-1'), code)
+        self.assertIs(Code.fromstring(undeclared), code)
+        self.assertIs(Code.declare(code), code)
+
+
+class AddressDTOMaskTestCase(unittest.TestCase):
+
+    def test_mask(self):
+        dto = AddressDTO({'40.21-1-1': 'Drieslag', '40.24': '5'})
+        self.assertEqual(dto.mask, (1 << Code.fromstring('40.21-1-1').id)
+            | (1 << Code.fromstring('40.24').id))
+        dto.set('40.24', None)
+        self.assertEqual(dto.mask, 1 << Code.fromstring('40.21-1-1').id)
+        self.assertTrue(dto.is_populated('40.21-1-1'))
+        self.assertFalse(dto.is_populated('40.21'))
+        self.assertFalse(dto.is_populated('40.24'))
+
+    def test_unknown_codes(self):
+        dto = AddressDTO({'X99.99': 'a', '40.21': 'Drieslag'})
+        self.assertEqual(dto.mask, 1 << Code.fromstring('40.21').id)
+        self.assertTrue(dto.is_populated('X99.99'))
+        self.assertFalse(dto.is_populated('X99.98'))
+        # Sub-types are populated by their base element.
+        self.assertTrue(dto.is_populated('40.21-9-9'))
+        dto.set('X99.99', None)
+        self.assertFalse(dto.is_populated('X99.99'))
+        self.assertEqual(dto.get('X99.99'), None)
+
+
+if __name__ == '__main__':
+    unittest.main()
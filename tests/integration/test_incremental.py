@@ -0,0 +1,130 @@
+import collections
+import unittest
+from unittest import mock
+
+from s42.datastructures import Code
+from s42.template import get_template
+from s42.template.incremental import IncrementalRendition
+from s42.test.utils import get_test_fixture
+
+
+class IncrementalRenditionTestCase(unittest.TestCase):
+
+    def assertRendered(self, template, rendition, elements):
+        self.assertEqual(rendition.lines,
+            [str(x) for x in template.render(dict(elements))])
+
+    def update(self, template, rendition, elements, code, value):
+        # Procedures of the US template may raise; the rendition must
+        # then raise as well and recover on a later update.
+        if value is None:
+            del elements[code]
+        else:
+            elements[code] = value
+        try:
+            expected = [str(x) for x in template.render(dict(elements))]
+        except Exception as e:
+            expected = type(e)
+        try:
+            actual = rendition.update(code, value)[0]
+        except Exception as e:
+            actual = type(e)
+        self.assertEqual(actual, expected)
+
+    def test_updates(self):
+        for country_code in ('NL', 'US'):
+            template = get_template(country_code)
+            fixtures = [x['data'] for x in get_test_fixture(country_code)]
+            elements = {}
+            rendition = IncrementalRendition(template, elements)
+            self.assertRendered(template, rendition, elements)
+            for fixture in fixtures:
+                for code, value in sorted(fixture.items()):
+                    self.update(template, rendition, elements, code, value)
+                for code in sorted(elements):
+                    if code not in fixture:
+                        self.update(template, rendition, elements, code, None)
+                for code in sorted(fixture)[::2]:
+                    self.update(template, rendition, elements, code,
+                        'CHANGED')
+
+    def test_update_many(self):
+        template = get_template('NL')
+        first, second = [x['data'] for x in get_test_fixture('NL')][:2]
+        rendition = IncrementalRendition(template, first)
+        elements = dict((k, None) for k in first)
+        elements.update(second)
+        lines, changed = rendition.update_many(elements)
+        self.assertEqual(lines, [str(x) for x in template.render(second)])
+        self.assertTrue(changed)
+
+    def test_failed_update(self):
+        template = get_template('NL')
+        elements = dict(get_test_fixture('NL')[0]['data'])
+        rendition = IncrementalRendition(template, elements)
+        code = Code.fromstring('40.21-1-1')
+        index = sorted(template.dependencies.get_selectors(code))[0]
+        selector = template.selectors[index]
+        with mock.patch.object(selector, 'get_lines',
+                side_effect=RuntimeError):
+            self.assertRaises(RuntimeError, rendition.update,
+                '40.21-1-1', None)
+        del elements['40.21-1-1']
+        elements['40.16'] = 'Utrecht'
+        rendition.update('40.16', 'Utrecht')
+        self.assertRendered(template, rendition, elements)
+
+    def test_failed_set(self):
+        template = get_template('NL')
+        elements = {'40.21-1-1': 'Drieslag', '40.24': '5'}
+        rendition = IncrementalRendition(template, elements)
+        dto = rendition._dto
+        calls = []
+
+        def set(code, value):
+            # The second element cannot be set.
+            calls.append(code)
+            if len(calls) > 1:
+                raise TypeError
+            type(dto).set(dto, code, value)
+
+        with mock.patch.object(dto, 'set', side_effect=set):
+            self.assertRaises(TypeError, rendition.update_many,
+                collections.OrderedDict([('10.00', 'Megasoft BV'),
+                    ('40.16', 'Utrecht')]))
+        elements['10.00'] = 'Megasoft BV'
+        elements['40.24'] = '6'
+        rendition.update('40.24', '6')
+        self.assertRendered(template, rendition, elements)
+
+    def test_invalid_code(self):
+        template = get_template('NL')
+        elements = {'40.21-1-1': 'Drieslag', '40.24': '5'}
+        rendition = IncrementalRendition(template, elements)
+        self.assertRaises(ValueError, rendition.update_many,
+            collections.OrderedDict([('10.00', 'Megasoft BV'),
+                ('bogus', 'value')]))
+        self.assertRendered(template, rendition, elements)
+
+
+class DependencyIndexTestCase(unittest.TestCase):
+
+    def test_index(self):
+        template = get_template('NL')
+        index = template.dependencies
+        lines = index.get_lines(Code.fromstring('40.16'))
+        self.assertEqual([x.symbolic for x in lines],
+            ['postcode and locality'])
+        # Sub-types are indexed by their base element.
+        self.assertEqual(index.get_lines(Code.fromstring('40.21-1-1')),
+            index.get_lines(Code.fromstring('40.21')))
+        self.assertEqual(index.get_lines(Code.fromstring('90.00')), set())
+        for i in index.get_selectors(Code.fromstring('40.21-1-1')):
+            self.assertIn(str(Code.fromstring('40.21')), [str(x.base) for trigger
+                in template.selectors[i].groups
+                for c in trigger.conditions for x in c.get_codes()])
+        self.assertEqual(index.volatile, ())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from s42.bulk import JSONLSource
+from s42.bulk import JobRunner
+from s42.bulk import MappedJSONLSource
+
+
+class MappedJSONLSourceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.src = os.path.join(self.workdir, 'input.jsonl')
+        self.records = [{'country': 'NL', 'town': 'Town {0}'.format(i)}
+            for i in range(50)]
+        with open(self.src, 'w') as f:
+            for i, record in enumerate(self.records):
+                f.write(json.dumps(record) + '\n')
+                if i % 7 == 0:
+                    f.write('\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def test_lines(self):
+        source = MappedJSONLSource(self.src)
+        self.assertEqual(list(source.iter_lines()),
+            list(JSONLSource(self.src).iter_lines()))
+        self.assertEqual(len(source), 50)
+        self.assertEqual(source[42], self.records[42])
+        source.close()
+
+    def test_index_is_cached(self):
+        MappedJSONLSource(self.src).get_offsets()
+        self.assertTrue(os.path.exists(self.src + '.idx'))
+        source = pickle.loads(pickle.dumps(MappedJSONLSource(self.src)))
+        self.assertEqual(source[-1], self.records[-1])
+
+    def test_ranges(self):
+        source = MappedJSONLSource(self.src)
+        ranges = source.ranges(4)
+        self.assertEqual(len(ranges), 4)
+        self.assertEqual([len(list(source.iter_lines(*x))) for x in ranges],
+            [12, 13, 12, 13])
+        self.assertEqual([x for span in ranges for x in source.read(*span)],
+            list(JSONLSource(self.src).read()))
+
+    def test_job(self):
+        dst = os.path.join(self.workdir, 'output.jsonl')
+        runner = JobRunner(MappedJSONLSource(self.src),
+            os.path.join(self.workdir, 'job'), shards=3, processes=1)
+        runner.run(dst)
+        with open(dst) as f:
+            self.assertEqual(len(f.readlines()), 50)
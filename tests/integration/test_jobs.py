@@ -0,0 +1,72 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from s42.bulk import JobRunner
+from s42.bulk import render_record
+
+
+class JobRunnerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.src = os.path.join(self.workdir, 'input.jsonl')
+        self.records = [{'country': 'NL', 'thoroughfare': 'Drieslag',
+            'street_number': str(i), 'postcode': '6832AM', 'town': 'Arnhem'}
+            for i in range(30)]
+        with open(self.src, 'w') as f:
+            for record in self.records:
+                f.write(json.dumps(record) + '\n')
+        self.dst = os.path.join(self.workdir, 'output.jsonl')
+        self.jobdir = os.path.join(self.workdir, 'job')
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def read(self, filepath):
+        with open(filepath) as f:
+            return [json.loads(x) for x in f]
+
+    def test_run(self):
+        runner = JobRunner(self.src, self.jobdir, shards=3, processes=1)
+        self.assertEqual(runner.run(self.dst), [0, 1, 2])
+        self.assertEqual(self.read(self.dst),
+            [render_record(x) for x in self.records])
+
+    def test_resume(self):
+        runner = JobRunner(self.src, self.jobdir, shards=3, processes=1)
+        runner.run(self.dst)
+        expected = self.read(self.dst)
+        self.assertEqual(runner.run(self.dst), [])
+
+        os.remove(runner.get_shard_path(1))
+        runner = JobRunner(self.src, self.jobdir, shards=3, processes=1)
+        self.assertEqual(runner.run(self.dst), [1])
+        self.assertEqual(self.read(self.dst), expected)
+
+    def test_strategy_mismatch(self):
+        JobRunner(self.src, self.jobdir, shards=3, processes=1).run()
+        runner = JobRunner(self.src, self.jobdir, shards=3, processes=1,
+            strategy='hash')
+        self.assertRaises(ValueError, runner.run)
+
+    def test_failed_records(self):
+        with open(self.src, 'a') as f:
+            f.write('{"country": \n')
+            f.write(json.dumps({'country': 'XX'}) + '\n')
+            f.write(json.dumps(self.records[0]) + '\n')
+        errors = os.path.join(self.workdir, 'errors.jsonl')
+        runner = JobRunner(self.src, self.jobdir, shards=2, processes=1)
+        self.assertEqual(runner.run(self.dst, errors), [0, 1])
+        self.assertEqual(len(self.read(self.dst)), 31)
+        failures = self.read(errors)
+        self.assertEqual([x['error'] for x in failures],
+            ['invalid-record', 'render-error'])
+        self.assertEqual(failures[1]['record'], {'country': 'XX'})
+        self.assertLess(failures[0]['index'], failures[1]['index'])
+
+
+if __name__ == '__main__':
+    unittest.main()
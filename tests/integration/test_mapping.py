@@ -0,0 +1,69 @@
+import unittest
+
+from s42 import create_dps
+from s42 import create_dps_many
+from s42.datastructures import get_country
+from s42.mapping import MnemonicMapper
+from s42.mapping import get_mapper
+
+
+class MnemonicMapperTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.mapper = MnemonicMapper('528', {
+            'postcode': '40.13',
+            'town': '40.16'
+        })
+
+    def test_map(self):
+        record = {'postcode': '1234 AB', 'town': 'AMSTERDAM', 'other': 1}
+        self.assertEqual(self.mapper.map(record),
+            {'40.13': '1234 AB', '40.16': 'AMSTERDAM'})
+        self.assertEqual(len(record), 3)
+        self.mapper.map(record, pop=True)
+        self.assertEqual(record, {'other': 1})
+
+    def test_map_many(self):
+        records = [{'postcode': '1234 AB'}, {'town': 'AMSTERDAM'}, {}]
+        self.assertEqual(self.mapper.map_many(records),
+            [{'40.13': '1234 AB'}, {'40.16': 'AMSTERDAM'}, {}])
+        self.assertEqual(self.mapper.map_many(records, pop=True),
+            [{'40.13': '1234 AB'}, {'40.16': 'AMSTERDAM'}, {}])
+        self.assertEqual(records, [{}, {}, {}])
+
+    def test_map_rows(self):
+        rows = [('AMSTERDAM', 'x', '1234 AB'), ('UTRECHT', 'y', None)]
+        self.assertEqual(
+            self.mapper.map_rows(rows, ('town', 'unknown', 'postcode')),
+            [{'40.13': '1234 AB', '40.16': 'AMSTERDAM'},
+             {'40.16': 'UTRECHT'}])
+
+    def test_get_mapper(self):
+        self.assertIs(get_mapper('528'), get_mapper('528'))
+        self.assertRaises(KeyError, get_mapper, '000')
+
+
+class CountryTestCase(unittest.TestCase):
+
+    def test_interned(self):
+        country = get_country('NL')
+        self.assertIs(get_country('NLD'), country)
+        self.assertIs(get_country('528'), country)
+        self.assertIs(get_country(country), country)
+        self.assertIsNot(get_country('US'), country)
+
+    def test_create_dps_many(self):
+        records = [
+            {'country': 'NL', 'town': 'AMSTERDAM', 'postcode': '1234 AB'},
+            {'country': 'US', 'town': 'SPRINGFIELD'},
+            {'country': 'NLD', 'town': 'UTRECHT'}
+        ]
+        expected = [create_dps(dict(x)) for x in records]
+        result = create_dps_many([dict(x) for x in records])
+        self.assertEqual(result, expected)
+        self.assertIs(result[0][0], result[2][0])
+        self.assertRaises(TypeError, create_dps_many, [{'country': None}])
+
+
+if __name__ == '__main__':
+    unittest.main()
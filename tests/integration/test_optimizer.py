@@ -0,0 +1,70 @@
+import unittest
+
+from s42.datastructures import Code
+from s42.datastructures import LineIdentifier
+from s42.template import get_template
+from s42.template.optimizer import get_dead_reason
+from s42.template.trigger import HasResult
+from s42.template.trigger import HasValue
+from s42.template.trigger import IsNotPopulated
+from s42.template.trigger import IsPopulated
+from s42.template.trigger import Trigger
+from s42.test.utils import get_test_fixture
+
+
+class OptimizerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.template = get_template('US')
+        self.lines = [LineIdentifier('001', 'Line')]
+
+    def get_trigger(self, *conditions):
+        return Trigger(self.template, conditions, self.lines)
+
+    def test_contradictory_conditions(self):
+        base = Code.fromstring('40.21')
+        subtype = Code.fromstring('40.21-1-1')
+        trigger = self.get_trigger(
+            IsPopulated(self.template, [[[base]]]),
+            IsNotPopulated(self.template, [[[subtype]]]))
+        self.assertIsNotNone(get_dead_reason(trigger))
+
+        # The subtype can be populated without its base element.
+        trigger = self.get_trigger(
+            IsPopulated(self.template, [[[subtype]]]),
+            IsNotPopulated(self.template, [[[base]]]))
+        self.assertIsNone(get_dead_reason(trigger))
+
+        # Either codeset of the argument may be populated.
+        trigger = self.get_trigger(
+            IsPopulated(self.template, [[[base], [Code.fromstring('40.16')]]]),
+            IsNotPopulated(self.template, [[[subtype]]]))
+        self.assertIsNone(get_dead_reason(trigger))
+
+    def test_conflicting_values(self):
+        code = Code.fromstring('40.16')
+        trigger = self.get_trigger(HasValue(self.template,
+            [[code, 'Arnhem'], [code, 'Utrecht']]))
+        self.assertIsNotNone(get_dead_reason(trigger))
+
+    def test_no_lines(self):
+        trigger = Trigger(self.template, [], [])
+        self.assertIsNotNone(get_dead_reason(trigger))
+
+    def test_output_is_identical(self):
+        for country in ('NL', 'US'):
+            tpl = get_template(country)
+            optimized = get_template(country, optimize=True)
+            self.assertIsNone(tpl.optimization)
+            for fixture in get_test_fixture(country):
+                self.assertEqual(
+                    [str(x) for x in optimized.render(fixture['data'])],
+                    [str(x) for x in tpl.render(fixture['data'])])
+
+    def test_conditions_are_ordered_by_cost(self):
+        optimized = get_template('US', optimize=True)
+        for selector in optimized.selectors:
+            for trigger in selector.groups:
+                types = [type(x) for x in trigger.conditions]
+                if HasResult in types:
+                    self.assertEqual(types[-1], HasResult)
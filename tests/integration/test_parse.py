@@ -0,0 +1,66 @@
+import unittest
+
+import lxml.etree as xml
+
+from s42.datastructures import Code
+from s42.template import Template
+from s42.template import get_available_countries
+from s42.template import get_template_path
+from s42.template.lines import line_factory
+from s42.template.trigger import selector_factory
+
+
+def describe(value):
+    if isinstance(value, Code):
+        return str(value)
+    if isinstance(value, (list, tuple)):
+        return [describe(x) for x in value]
+    return value
+
+
+def describe_selector(selector):
+    return [([(type(c).__name__, describe(c.args)) for c in trigger.conditions],
+        [tuple(x) for x in trigger.lines]) for trigger in selector.groups]
+
+
+def describe_line(line):
+    return (tuple(line.identifier), [(c.is_required(),
+        [(str(e.code), e.position, e.justify, e.is_required())
+            for e in c.elements]) for c in line.components])
+
+
+class SinglePassParseTestCase(unittest.TestCase):
+    """Compares templates with the descendant XPath scans that the
+    single-pass parse replaced.
+    """
+
+    def test_parse(self):
+        for country_code in get_available_countries():
+            with open(get_template_path(country_code), 'rb') as f:
+                doc = f.read()
+            template = Template(doc)
+            root = xml.fromstring(doc)
+
+            for tag, attr in (('defaultDelimiter', 'delimiter'),
+                    ('defaultSeparator', 'separator'),
+                    ('defaultSequencer', 'sequencer'),
+                    ('defaultCollector', 'collector')):
+                self.assertEqual(getattr(template, attr),
+                    root.xpath('//' + tag)[0].text.strip("'"))
+            self.assertEqual(template.country, root.xpath(
+                'contentDefinition/templateIdentifier/countryCode')[0].text)
+
+            selectors = [selector_factory(template, x)
+                for x in root.xpath('//triggerConditions/lineSelect')]
+            self.assertTrue(selectors)
+            self.assertEqual([describe_selector(x) for x in template.selectors],
+                [describe_selector(x) for x in selectors])
+
+            lines = [line_factory(x) for x in root.xpath('//lineData')]
+            self.assertTrue(lines)
+            self.assertEqual([describe_line(x) for x in template.lines],
+                [describe_line(x) for x in lines])
+
+
+if __name__ == '__main__':
+    unittest.main()
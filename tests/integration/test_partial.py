@@ -0,0 +1,70 @@
+import unittest
+
+from s42.datastructures import AddressDTO
+from s42.datastructures import LineIdentifier
+from s42.template import get_template
+from s42.test.utils import get_test_fixture
+
+
+class PartialRenderingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.template = get_template('NL')
+        self.fixtures = [x['data'] for x in get_test_fixture('NL')]
+
+    def get_lines(self, elements):
+        lines = self.template.get_selected_lines(AddressDTO.fromdict(elements))
+        texts = [str(x) for x in self.template.render(elements)]
+        self.assertEqual(len(lines), len(texts))
+        return [(x.identifier, text) for x, text in zip(lines, texts)]
+
+    def test_render_lines(self):
+        line = LineIdentifier('010', 'postcode and locality')
+        for names in (['009'], [9], ['postcode and locality'], [line],
+                ['003', 'external country'], ['001', '002', '011']):
+            selection = self.template.resolve_lines(names)
+            for elements in self.fixtures:
+                expected = [text for identifier, text
+                    in self.get_lines(elements) if identifier in selection]
+                self.assertEqual([str(x) for x
+                    in self.template.render(elements, lines=names)], expected)
+
+    def test_resolve_lines(self):
+        self.assertEqual(set(x.symbolic for x
+            in self.template.resolve_lines(['009'])),
+            set(['thoroughfare information', 'post office box']))
+        self.assertEqual(self.template.resolve_lines([9]),
+            self.template.resolve_lines(['009']))
+        self.assertRaises(LookupError, self.template.resolve_lines, ['999'])
+        self.assertRaises(LookupError, self.template.resolve_lines, ['9'])
+
+    def test_matches(self):
+        identifier = LineIdentifier('009', 'post office box')
+        self.assertTrue(identifier.matches('009'))
+        self.assertTrue(identifier.matches(9))
+        self.assertTrue(identifier.matches('post office box'))
+        self.assertTrue(identifier.matches(
+            LineIdentifier('009', 'post office box')))
+        self.assertFalse(identifier.matches('9'))
+        self.assertFalse(identifier.matches(10))
+        self.assertFalse(identifier.matches(
+            LineIdentifier('009', 'thoroughfare information')))
+
+    def test_lazy_iteration(self):
+        for elements in self.fixtures:
+            expected = [text for identifier, text in self.get_lines(elements)]
+            rendition = self.template.render(elements)
+            lines = iter(rendition)
+            first = str(next(lines))
+            self.assertEqual([first] + [str(x) for x in lines], expected)
+            self.assertEqual([str(x) for x in rendition], expected)
+
+            # A rendition whose iteration stopped early starts over.
+            rendition = self.template.render(elements)
+            next(iter(rendition))
+            self.assertEqual([str(x) for x in rendition], expected)
+            self.assertEqual([str(x) for x in rendition.lines], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from s42.bulk import ReusableRenderer
+from s42.datastructures import AddressDTO
+from s42.template import get_template
+from s42.test.utils import get_test_fixture
+
+
+class ReusableRendererTestCase(unittest.TestCase):
+
+    def test_render(self):
+        for country in ('NL', 'US'):
+            tpl = get_template(country)
+            dtos = [x['data'] for x in get_test_fixture(country)]
+            expected = [[str(x) for x in tpl.render(dto)] for dto in dtos]
+            renderer = ReusableRenderer(tpl)
+            for i in range(2):
+                self.assertEqual(list(renderer.render_many(dtos)), expected)
+
+    def test_render_selected_lines(self):
+        tpl = get_template('NL')
+        dto = get_test_fixture('NL')[0]['data']
+        renderer = ReusableRenderer(tpl, lines=[9])
+        self.assertEqual(renderer.render(dto),
+            [str(x) for x in tpl.render(dto, lines=[9])])
+
+    def test_reset(self):
+        dto = AddressDTO({'40.16': 'Arnhem'})
+        dto.reset({'40.13': '6832AM'})
+        self.assertFalse(dto.is_populated('40.16'))
+        self.assertEqual(dto.get('40.13'), '6832AM')
+        self.assertEqual(dto.mask, AddressDTO({'40.13': '6832AM'}).mask)
+        dto.reset()
+        self.assertEqual(dto.mask, 0)
+
+    def test_values(self):
+        # Values are stored as given; only rendering a line that holds a
+        # value that is not a string fails.
+        dto = AddressDTO({'40.24': 51, '40.16': None, '90.00': 1})
+        self.assertEqual(dto.get('40.24'), 51)
+        self.assertTrue(dto.is_populated('40.16'))
+        template = get_template('NL')
+        elements = {'40.21-1-1': 'Drieslag', '40.24': '5', '90.00': 1}
+        renderer = ReusableRenderer(template)
+        self.assertEqual(renderer.render(elements),
+            [str(x) for x in template.render(elements)])
+        elements['40.24'] = 5
+        self.assertRaises(TypeError, renderer.render, elements)
+        self.assertRaises(TypeError,
+            lambda: [str(x) for x in template.render(elements)])
+
+    def test_line_nodes(self):
+        tpl = get_template('US')
+        for fixture in get_test_fixture('US'):
+            dto = AddressDTO.fromdict(fixture['data'])
+            for line in tpl.get_selected_lines(dto):
+                node = line.as_node(tpl, dto)
+                self.assertIs(node.line, line)
+                self.assertEqual(str(node), line.get_text(dto))
@@ -0,0 +1,21 @@
+import unittest
+
+from s42.bulk import CountryRouter
+from s42.bulk import render_record
+
+
+class CountryRouterTestCase(unittest.TestCase):
+
+    def test_route(self):
+        records = []
+        for i, country in enumerate(['NL', 'USA', '528', 'US', 'NLD']):
+            records.append({'country': country, 'town': 'Town {0}'.format(i),
+                'postcode': '{0:04d}'.format(i)})
+        router = CountryRouter(window=2)
+        self.assertEqual(list(router.route(records)),
+            [render_record(x) for x in records])
+        self.assertIs(router.get_route('NL')[2], router.get_route('NLD')[2])
+
+    def test_missing_country(self):
+        with self.assertRaises(TypeError):
+            list(CountryRouter().route([{'town': 'Arnhem'}]))
@@ -0,0 +1,48 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from s42.template import SharedTemplateStore
+from s42.template import get_template
+from s42.test.utils import get_test_fixture
+
+
+class SharedTemplateStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.templates = [get_template(x) for x in ('NL', 'US')]
+        self.workdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def assertRendersLikeTemplates(self, store):
+        for tpl in self.templates:
+            for fixture in get_test_fixture(tpl.country):
+                expected = [str(x) for x in tpl.render(fixture['data'])]
+                self.assertEqual(
+                    store.render(tpl.country, fixture['data']), expected)
+
+    def test_shared_memory(self):
+        store = SharedTemplateStore.create(self.templates)
+        try:
+            attached = pickle.loads(pickle.dumps(store))
+            self.assertEqual(attached.countries, ['NL', 'US'])
+            self.assertRendersLikeTemplates(attached)
+            attached.close()
+        finally:
+            store.close()
+            store.unlink()
+
+    def test_file(self):
+        filepath = os.path.join(self.workdir, 'templates.bin')
+        SharedTemplateStore.write(filepath, self.templates).close()
+        store = SharedTemplateStore.open(filepath)
+        try:
+            self.assertEqual(store.get_digest('NL'), self.templates[0].digest)
+            self.assertNotIn('BE', store)
+            self.assertRendersLikeTemplates(store)
+        finally:
+            store.close()
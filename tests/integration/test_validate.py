@@ -0,0 +1,69 @@
+import unittest
+
+from s42.bulk import CheckedRenderer
+from s42.datastructures import AddressDTO
+from s42.template import get_template
+from s42.test.utils import get_test_fixture
+
+
+class ValidateTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.template = get_template('NL')
+        self.fixtures = [x['data'] for x in get_test_fixture('NL')]
+
+    def get_line(self, name):
+        for line in self.template.lines:
+            if line.identifier.symbolic == name:
+                return line
+        raise KeyError(name)
+
+    def test_complete(self):
+        for elements in self.fixtures:
+            self.assertEqual(self.template.validate(elements), [])
+            self.assertEqual(
+                self.template.validate(AddressDTO.fromdict(elements)), [])
+
+    def test_missing_required_element(self):
+        elements = dict(self.fixtures[0])
+        del elements['40.16']
+        line = self.get_line('postcode and locality')
+        self.assertEqual(self.template.validate(elements),
+            [(line.identifier, line.get_missing_codes(
+                AddressDTO.fromdict(elements)))])
+        self.assertEqual([str(x) for x in line.get_missing_codes(
+            AddressDTO.fromdict(elements))], ['U40.16'])
+
+    def test_required_line_not_selected(self):
+        # The post office box line requires 40.19-0-1 and 40.19-0-2 but
+        # is not selected for an address with a thoroughfare.
+        line = self.get_line('post office box')
+        dto = AddressDTO.fromdict(self.fixtures[0])
+        self.assertEqual(len(line.get_missing_codes(dto)), 2)
+        self.assertNotIn(line, list(self.template.get_selected_lines(dto)))
+        self.assertEqual(self.template.validate(dto), [])
+
+    def test_validate_many(self):
+        incomplete = dict(self.fixtures[0])
+        del incomplete['40.13']
+        results = self.template.validate_many(
+            [self.fixtures[0], incomplete, self.fixtures[1]])
+        self.assertEqual([len(x) for x in results], [0, 1, 0])
+
+    def test_checked_renderer_complete(self):
+        records = [
+            {'country': 'NL', 'thoroughfare': 'Drieslag',
+             'street_number': '51', 'postcode': '6832AM', 'town': 'Arnhem'},
+            {'country': 'NL', 'thoroughfare': 'Drieslag',
+             'street_number': '51', 'postcode': '6832AM'}
+        ]
+        self.assertEqual(
+            [x for x, lines in CheckedRenderer().render(records)], [0, 1])
+        renderer = CheckedRenderer(complete=True)
+        self.assertEqual([x for x, lines in renderer.render(records)], [0])
+        self.assertEqual([(x, code) for x, code, detail in renderer.errors],
+            [(1, 'incomplete')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from unittest import mock
+
+from s42.benchmark import LatencyHistogram
+from s42.benchmark import bench_latency
+
+
+class LatencyHistogramTestCase(unittest.TestCase):
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram(precision=7)
+        for value in range(1, 100001):
+            histogram.record(value)
+        self.assertEqual(histogram.percentile(100), 100000)
+        for percentile in (50, 90, 99, 99.9):
+            expected = percentile * 1000
+            actual = histogram.percentile(percentile)
+            self.assertGreaterEqual(actual, expected)
+            self.assertLess((actual - expected) / float(expected), 2 ** -6)
+
+    def test_merge(self):
+        a, b = LatencyHistogram(), LatencyHistogram()
+        a.record(10)
+        b.record(1000000)
+        a.merge(b)
+        self.assertEqual((a.count, a.min, a.max), (2, 10, 1000000))
+        self.assertEqual(a.percentile(50), 10)
+
+    def bench_latency(self, seconds):
+        # A fake clock that advances by a microsecond when it is read
+        # and otherwise only when the benchmark sleeps, oversleeping by
+        # 300us unless it only yields, or renders, taking `seconds`.
+        clock = [0.0]
+
+        def timer():
+            clock[0] += 1e-6
+            return clock[0]
+
+        def sleep(seconds):
+            clock[0] += seconds + (0.0003 if seconds else 0)
+
+        def render(dto):
+            clock[0] += seconds
+
+        fake = mock.Mock(perf_counter=timer, time=timer, sleep=sleep)
+        with mock.patch('s42.benchmark.time', fake),\
+        mock.patch('s42.benchmark.get_renderer', return_value=render):
+            return bench_latency(['NL'], rate=100, duration=0.05,
+                workers=1, lead=0.01)['NL']
+
+    def test_bench_latency(self):
+        # Renders take 5ms and start every 10ms; the oversleep is not
+        # charged to them.
+        result = self.bench_latency(0.005)
+        self.assertEqual(result['count'], 5)
+        self.assertAlmostEqual(result['min'], 5000, delta=50)
+        self.assertAlmostEqual(result['max'], 5000, delta=50)
+
+    def test_bench_latency_queueing(self):
+        # Renders take 15ms and start every 10ms, so each one waits 5ms
+        # longer than the previous one.
+        result = self.bench_latency(0.015)
+        self.assertEqual(result['count'], 5)
+        self.assertAlmostEqual(result['min'], 15000, delta=50)
+        self.assertAlmostEqual(result['max'], 35000, delta=50)
+        self.assertAlmostEqual(result['mean'], 25000, delta=50)
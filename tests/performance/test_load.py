@@ -0,0 +1,29 @@
+import io
+import json
+import sys
+import unittest
+
+from s42.benchmark import main
+from s42.template import get_available_countries
+
+
+class LoadBenchmarkTestCase(unittest.TestCase):
+
+    def test_load(self):
+        stdout = sys.stdout
+        sys.stdout = output = io.StringIO()
+        try:
+            self.assertEqual(main(['load', '--repeat', '2']), 0)
+        finally:
+            sys.stdout = stdout
+        results = json.loads(output.getvalue())
+        self.assertEqual(len(results), len(get_available_countries()) + 1)
+        for timings in results.values():
+            self.assertGreater(timings['min'], 0)
+            self.assertGreaterEqual(timings['mean'], timings['min'])
+        self.assertAlmostEqual(results['total']['min'],
+            sum(x['min'] for k, x in results.items() if k != 'total'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""Allocation and memory regression tests.
+
+The measurements are compared against the baseline committed in
+``memory_baseline.json``. A baseline recorded by another minor version
+of the same major Python version is compared with a wider tolerance,
+since allocation sizes change between releases; the tests are skipped
+on other major versions. Set ``S42_UPDATE_MEMORY_BASELINE=1`` to record a new
+baseline after an intentional change, and ``S42_MEMORY_RENDERS`` to
+change the number of renders that are measured.
+"""
+from os.path import dirname
+from os.path import join
+import gc
+import json
+import os
+import platform
+import tracemalloc
+import unittest
+
+from s42.datastructures import AddressDTO
+from s42.template import Template
+from s42.template import get_template_path
+from s42.test.utils import get_test_fixture
+
+
+BASELINE = join(dirname(__file__), 'memory_baseline.json')
+
+#: The relative increase over the baseline at which a test fails.
+TOLERANCE = 0.25
+
+#: The additional relative increase that is allowed when the baseline
+#: was recorded by another minor version of Python.
+VERSION_TOLERANCE = 0.25
+
+RENDERS = int(os.environ.get('S42_MEMORY_RENDERS', 10000))
+
+TOP_SITES = 10
+
+
+def measure(func):
+    """Run `func` under :mod:`tracemalloc` and return a dictionary
+    holding the peak traced memory, the memory and number of blocks
+    still allocated once garbage is collected, and the allocation sites
+    holding the most memory, including uncollected garbage, when `func`
+    returns.
+    """
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot().filter_traces(filters)
+        func()
+        current, peak = tracemalloc.get_traced_memory()
+        pending = tracemalloc.take_snapshot().filter_traces(filters)
+        gc.collect()
+        after = tracemalloc.take_snapshot().filter_traces(filters)
+    finally:
+        tracemalloc.stop()
+
+    retained = after.compare_to(before, 'lineno')
+    sites = pending.compare_to(before, 'lineno')
+    return {
+        'peak': peak,
+        'retained_size': sum(x.size_diff for x in retained),
+        'retained_blocks': sum(x.count_diff for x in retained),
+        'sites': ["{0}:{1} {2} {3}".format(
+            x.traceback[0].filename.split(os.sep + 's42' + os.sep)[-1],
+            x.traceback[0].lineno, x.size_diff, x.count_diff)
+            for x in sites[:TOP_SITES]]
+    }
+
+
+class MemoryTestCase(unittest.TestCase):
+    country_code = None
+    version = ('6', '2.6')
+    baseline = None
+
+    @classmethod
+    def factory(cls, country_code):
+        return type(country_code + 'MemoryTestCase', (cls,), {
+            'country_code': country_code
+        })
+
+    @classmethod
+    def setUpClass(cls):
+        if cls.country_code is None:
+            raise unittest.SkipTest("Abstract test case.")
+        cls.src = get_template_path(cls.country_code, *cls.version)
+        cls.fixtures = get_test_fixture(cls.country_code)
+
+    def assertBaseline(self, name, measurement):
+        key = "{0}/{1}".format(self.country_code, name)
+        python = platform.python_version_tuple()[:2]
+        python = "{0}.{1}".format(*python)
+        if os.environ.get('S42_UPDATE_MEMORY_BASELINE'):
+            baseline = {}
+            if os.path.exists(BASELINE):
+                with open(BASELINE) as f:
+                    baseline = json.load(f)
+            if baseline.get('python') != python:
+                baseline = {'python': python}
+            baseline[key] = measurement
+            with open(BASELINE, 'w') as f:
+                json.dump(baseline, f, indent=2, sort_keys=True)
+                f.write('\n')
+            return
+
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+        recorded = baseline.get('python', '')
+        if recorded.split('.')[0] != python.split('.')[0]\
+        or key not in baseline:
+            self.skipTest("No baseline for {0} on Python {1}".format(
+                key, python))
+        tolerance = TOLERANCE
+        if recorded != python:
+            tolerance += VERSION_TOLERANCE
+        expected = baseline[key]
+        for metric in ('peak', 'retained_size', 'retained_blocks'):
+            limit = max(expected[metric], 0) * (1 + tolerance)
+            if metric != 'peak':
+                # Small absolute changes in retained memory are noise,
+                # e.g. interpreter caches warming up.
+                limit += 64 * 1024 if metric == 'retained_size' else 256
+            self.assertLessEqual(measurement[metric], limit,
+                "{0} {1} regressed from {2} to {3}; top sites:\n{4}".format(
+                    key, metric, expected[metric], measurement[metric],
+                    '\n'.join(measurement['sites'])))
+
+    def test_template_load(self):
+        with open(self.src, 'rb') as f:
+            doc = f.read()
+        templates = []
+        self.assertBaseline('load',
+            measure(lambda: templates.append(Template(doc))))
+
+    def test_render(self):
+        template = Template.fromfilepath(self.src)
+        dtos = [AddressDTO.fromdict(x['data']) for x in self.fixtures]
+
+        def render():
+            for i in range(RENDERS):
+                [str(x) for x in template.render(dtos[i % len(dtos)])]
+
+        render()
+        self.assertBaseline('render', measure(render))
+
+
+NL = MemoryTestCase.factory('NL')
+US = MemoryTestCase.factory('US')